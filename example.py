@@ -6,33 +6,89 @@ This script provides a unified interface for creating and deploying ComfyUI work
 
 import os
 import sys
+import json
 import argparse
+import importlib
 import logging
 import shutil
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Union, Any
 
+class _LogHandler(logging.StreamHandler):
+    """Stream handler that stays quiet when the reader of the stream has gone away"""
+    
+    def handleError(self, record: logging.LogRecord) -> None:
+        # Output piped into a command that exits early (e.g. head) is not an error
+        if isinstance(sys.exc_info()[1], BrokenPipeError):
+            return
+        super().handleError(record)
+
+
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+# A plain handler on the root logger; the basicConfig calls in the
+# local modules become no-ops once it is installed
+_log_handler = _LogHandler()
+_log_handler.setFormatter(logging.Formatter(
+    '{asctime} - {levelname} - {message}',
+    datefmt='%Y-%m-%d %H:%M:%S',
+    style='{'
+))
+logging.root.addHandler(_log_handler)
+logging.root.setLevel(logging.INFO)
 logger = logging.getLogger("ComfyUIPackager")
 
-# Add local module search path
-sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+# Add local module search paths, skipping any already present
+# Local modules are imported inside the command handlers that need them,
+# so --help and the test command don't pay for loading them.
+_HERE = Path(__file__).resolve().parent
+for _module_dir in (str(_HERE), str(_HERE / "scripts")):
+    if _module_dir not in sys.path:
+        sys.path.insert(0, _module_dir)
 
-# Import local modules
-try:
-    from interactive_package_creator import InteractivePackageCreator, MODEL_TYPES
-    from simplified_workflow_parser import WorkflowParser
-except ImportError as e:
-    logger.error(f"Error importing required modules: {e}")
+
+# Civitai API key from the environment, used when --civitai-key isn't given
+_CIVITAI_KEY = os.environ.get("CIVITAI_API_KEY")
+
+
+def _exit_on_import_error(e: ImportError) -> None:
+    """Report a missing local module and exit"""
+    logger.error("Error importing required modules: %s", e)
     logger.error("Make sure you're running this script from the project root directory.")
     sys.exit(1)
 
 
+def _resolve_comfyui_dir(comfyui_dir: str) -> str:
+    """
+    Resolve the ComfyUI directory to an absolute path, exiting if it doesn't exist
+    
+    Args:
+        comfyui_dir: ComfyUI directory as given on the command line
+        
+    Returns:
+        Absolute path to the ComfyUI directory
+    """
+    try:
+        return str(Path(comfyui_dir).resolve(strict=True))
+    except (FileNotFoundError, NotADirectoryError):
+        logger.error("ComfyUI directory not found: %s", os.path.abspath(comfyui_dir))
+        sys.exit(1)
+
+
+def _open_comfyui(comfyui_path: str) -> List[os.DirEntry]:
+    """
+    List the top-level entries of the ComfyUI directory
+    
+    Args:
+        comfyui_path: Path to ComfyUI installation
+        
+    Returns:
+        Directory entries; raises FileNotFoundError if the directory is missing
+    """
+    with os.scandir(comfyui_path) as it:
+        return list(it)
+
+
 def create_package(args: argparse.Namespace) -> str:
     """
     Create a ComfyUI workflow package
@@ -43,41 +99,51 @@ def create_package(args: argparse.Namespace) -> str:
     Returns:
         Path to the created package file
     """
-    logger.info(f"Creating package for workflow: {args.workflow}")
+    try:
+        from interactive_package_creator import InteractivePackageCreator
+    except ImportError as e:
+        _exit_on_import_error(e)
     
-    # Validate ComfyUI path
-    comfyui_path = os.path.abspath(args.comfyui_dir)
-    if not os.path.exists(comfyui_path):
-        logger.error(f"ComfyUI directory not found: {comfyui_path}")
+    workflow, comfyui_dir, output, output_dir, civitai_key, size_threshold, no_manager = (
+        args.workflow, args.comfyui_dir, args.output, args.output_dir,
+        args.civitai_key, args.size_threshold, args.no_manager
+    )
+    
+    logger.info("Creating package for workflow: %s", workflow)
+    
+    # Validate ComfyUI path, reading its top-level entries in the same pass
+    comfyui_path = os.path.abspath(comfyui_dir)
+    try:
+        entries = _open_comfyui(comfyui_path)
+    except (FileNotFoundError, NotADirectoryError):
+        logger.error("ComfyUI directory not found: %s", comfyui_path)
         sys.exit(1)
     
     # Create package creator instance
-    creator = InteractivePackageCreator(comfyui_path)
+    creator = InteractivePackageCreator(comfyui_path, preloaded_entries=entries)
     
-    # Get Civitai API key from environment or argument
-    civitai_api_key = args.civitai_key or os.environ.get("CIVITAI_API_KEY")
+    # Get Civitai API key from argument or environment
+    civitai_api_key = civitai_key or _CIVITAI_KEY
     
     # Create the package
     try:
         package_path = creator.create_package(
-            workflow_path=args.workflow,
-            output_name=args.output,
-            output_dir=args.output_dir,
+            workflow_path=workflow,
+            output_name=output,
+            output_dir=output_dir,
             civitai_api_key=civitai_api_key,
-            size_threshold_gb=args.size_threshold,
-            include_manager=not args.no_manager
+            size_threshold_gb=size_threshold,
+            include_manager=not no_manager
         )
         
         if package_path:
-            logger.info(f"Package created successfully: {package_path}")
+            logger.info("Package created successfully: %s", package_path)
             return package_path
         else:
             logger.error("Failed to create package")
             sys.exit(1)
     except Exception as e:
-        logger.error(f"Error creating package: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error creating package: %s", e)
         sys.exit(1)
 
 
@@ -88,43 +154,117 @@ def analyze_workflow(args: argparse.Namespace) -> None:
     Args:
         args: Command line arguments
     """
-    logger.info(f"Analyzing workflow: {args.workflow}")
+    try:
+        from simplified_workflow_parser import get_parser
+    except ImportError as e:
+        _exit_on_import_error(e)
+    
+    logger.info("Analyzing workflow: %s", args.workflow)
     
     # Validate ComfyUI path
-    comfyui_path = os.path.abspath(args.comfyui_dir)
-    if not os.path.exists(comfyui_path):
-        logger.error(f"ComfyUI directory not found: {comfyui_path}")
-        sys.exit(1)
+    comfyui_path = _resolve_comfyui_dir(args.comfyui_dir)
     
     # Create workflow parser instance
-    parser = WorkflowParser(comfyui_path)
+    parser = get_parser(comfyui_path, use_cache=not args.no_cache)
     
     # Parse the workflow
     try:
         dependencies = parser.parse_workflow(args.workflow)
         
-        # Print results
-        print("\n=== Workflow Analysis Results ===")
-        
-        print("\nCustom Nodes:")
+        # Print results in a single write
+        lines = ["\n=== Workflow Analysis Results ===", "\nCustom Nodes:"]
         if dependencies['custom_nodes']:
-            for name, path in dependencies['custom_nodes']:
-                print(f"  - {name}")
+            lines.extend(f"  - {name}" for name, path in dependencies['custom_nodes'])
         else:
-            print("  No custom nodes found")
+            lines.append("  No custom nodes found")
         
-        print("\nModel References:")
+        lines.append("\nModel References:")
         if dependencies['model_references']:
-            for model in dependencies['model_references']:
-                print(f"  - {model}")
+            lines.extend(f"  - {model}" for model in dependencies['model_references'])
         else:
-            print("  No model references found")
+            lines.append("  No model references found")
+        
+        lines.append("\nAnalysis complete.")
+        sys.stdout.write("\n".join(lines) + "\n")
+    except Exception as e:
+        logger.exception("Error analyzing workflow: %s", e)
+        sys.exit(1)
+
+
+# Workflow parser for batch analysis, set up by _init_worker in each process
+_PARSER = None
+
+
+def _init_worker(comfyui_path: str, use_cache: bool = True) -> None:
+    """
+    Create the batch workflow parser once per process
+    
+    Args:
+        comfyui_path: Path to ComfyUI installation
+        use_cache: Whether to reuse the cached custom node inventory
+    """
+    global _PARSER
+    from simplified_workflow_parser import get_parser
+    
+    _PARSER = get_parser(comfyui_path, use_cache=use_cache)
+
+
+def _analyze_one(workflow_path: str) -> Dict[str, Any]:
+    """
+    Analyze a single workflow for batch mode
+    
+    Args:
+        workflow_path: Path to the workflow JSON file
         
-        print("\nAnalysis complete.")
+    Returns:
+        JSON-serializable analysis result, or the error for a workflow that
+        couldn't be analyzed so one bad file doesn't stop the batch
+    """
+    try:
+        dependencies = _PARSER.parse_workflow(workflow_path, raise_errors=True)
+    except Exception as e:
+        return {"workflow": workflow_path, "error": str(e)}
+    
+    return {
+        "workflow": workflow_path,
+        "custom_nodes": [{"name": name, "path": path} for name, path in dependencies['custom_nodes']],
+        "model_references": dependencies['model_references']
+    }
+
+
+def analyze_batch(args: argparse.Namespace) -> None:
+    """
+    Analyze several ComfyUI workflows, reusing one parser for all of them
+    
+    Prints one JSON object per workflow to stdout.
+    
+    Args:
+        args: Command line arguments
+    """
+    # Fail early here rather than inside every worker
+    try:
+        import simplified_workflow_parser
+    except ImportError as e:
+        _exit_on_import_error(e)
+    
+    logger.info("Analyzing %s workflows", len(args.workflows))
+    
+    # Validate ComfyUI path
+    comfyui_path = _resolve_comfyui_dir(args.comfyui_dir)
+    
+    try:
+        if args.jobs > 1:
+            with ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker,
+                                     initargs=(comfyui_path, not args.no_cache)) as executor:
+                # Hand out workflows in small batches to cut inter-process overhead
+                for result in executor.map(_analyze_one, args.workflows, chunksize=8):
+                    print(json.dumps(result))
+        else:
+            _init_worker(comfyui_path, not args.no_cache)
+            for workflow_path in args.workflows:
+                print(json.dumps(_analyze_one(workflow_path)))
     except Exception as e:
-        logger.error(f"Error analyzing workflow: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error analyzing workflows: %s", e)
         sys.exit(1)
 
 
@@ -135,15 +275,14 @@ def test_installation(args: argparse.Namespace) -> None:
     Args:
         args: Command line arguments
     """
-    logger.info(f"Testing ComfyUI installation at: {args.comfyui_dir}")
+    logger.info("Testing ComfyUI installation at: %s", args.comfyui_dir)
     
     try:
         # Import the test module
-        sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-        from test_installation import ComfyUIInstallationTester
+        test_module = importlib.import_module("test_installation")
         
         # Run tests
-        tester = ComfyUIInstallationTester(args.comfyui_dir)
+        tester = test_module.ComfyUIInstallationTester(args.comfyui_dir)
         success = tester.run_tests()
         
         if success:
@@ -152,12 +291,17 @@ def test_installation(args: argparse.Namespace) -> None:
             logger.error("✗ Some tests failed. See logs above for details.")
             sys.exit(1)
     except Exception as e:
-        logger.error(f"Error testing installation: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error testing installation: %s", e)
         sys.exit(1)
 
 
+# Command run on the RunPod server to install a package from {url}
+_INSTALL_CMD_TMPL = (
+    'bash -c "$(curl -sSL https://raw.githubusercontent.com/yourusername/comfyui/main/install_package.sh)" '
+    '-- --package {url}'
+)
+
+
 def generate_install_command(package_path: str) -> str:
     """
     Generate a command to install the package on a RunPod server
@@ -172,21 +316,11 @@ def generate_install_command(package_path: str) -> str:
     # Replace this with the actual URL where the package will be hosted
     placeholder_url = "https://example.com/path/to/your-package.zip"
     
-    install_command = (
-        f"bash -c \"$(curl -sSL https://raw.githubusercontent.com/yourusername/comfyui/main/install_package.sh)\" "
-        f"-- --package {placeholder_url}"
-    )
-    
-    return install_command
+    return _INSTALL_CMD_TMPL.format(url=placeholder_url)
 
 
-def main():
-    """Main entry point"""
-    parser = argparse.ArgumentParser(description="ComfyUI RunPod Package System")
-    subparsers = parser.add_subparsers(dest="command", help="Command to execute")
-    
-    # Create package command
-    create_parser = subparsers.add_parser("create", help="Create a package from a workflow")
+def build_create_parser(create_parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the create command"""
     create_parser.add_argument("workflow", help="Path to workflow JSON file")
     create_parser.add_argument("--comfyui-dir", help="Path to ComfyUI installation", 
                               default=os.environ.get("COMFYUI_DIR", "."))
@@ -195,21 +329,102 @@ def main():
     create_parser.add_argument("--civitai-key", help="Civitai API key", default=None)
     create_parser.add_argument("--size-threshold", type=float, help="Size threshold in GB for large models", default=2.0)
     create_parser.add_argument("--no-manager", action="store_true", help="Don't include ComfyUI Manager")
-    
-    # Analyze workflow command
-    analyze_parser = subparsers.add_parser("analyze", help="Analyze a workflow without creating a package")
+
+
+def build_analyze_parser(analyze_parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the analyze command"""
     analyze_parser.add_argument("workflow", help="Path to workflow JSON file")
     analyze_parser.add_argument("--comfyui-dir", help="Path to ComfyUI installation", 
                                default=os.environ.get("COMFYUI_DIR", "."))
-    
-    # Test installation command
-    test_parser = subparsers.add_parser("test", help="Test ComfyUI installation")
+    analyze_parser.add_argument("--no-cache", action="store_true",
+                               help="Rescan custom_nodes instead of using the cached node inventory")
+
+
+def build_batch_parser(batch_parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the analyze-batch command"""
+    batch_parser.add_argument("workflows", nargs="+", help="Paths to workflow JSON files")
+    batch_parser.add_argument("--comfyui-dir", help="Path to ComfyUI installation", 
+                              default=os.environ.get("COMFYUI_DIR", "."))
+    batch_parser.add_argument("--jobs", type=int, help="Number of parallel worker processes (default: 1)", default=1)
+    batch_parser.add_argument("--no-cache", action="store_true",
+                              help="Rescan custom_nodes instead of using the cached node inventory")
+
+
+def build_test_parser(test_parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the test command"""
     test_parser.add_argument("--comfyui-dir", help="Path to ComfyUI installation", 
                             default=os.environ.get("COMFYUI_DIR", "."))
+
+
+# Command name -> (help text, function adding its arguments)
+COMMAND_PARSERS = {
+    "create": ("Create a package from a workflow", build_create_parser),
+    "analyze": ("Analyze a workflow without creating a package", build_analyze_parser),
+    "analyze-batch": ("Analyze several workflows, printing one JSON result per line", build_batch_parser),
+    "test": ("Test ComfyUI installation", build_test_parser),
+}
+
+
+def build_parser(command: Optional[str] = None) -> argparse.ArgumentParser:
+    """
+    Build the command line parser
+    
+    Args:
+        command: Command being run; only its arguments are set up.
+            If None, every command's arguments are set up.
+            
+    Returns:
+        The argument parser
+    """
+    parser = argparse.ArgumentParser(description="ComfyUI RunPod Package System")
+    subparsers = parser.add_subparsers(dest="command", help="Command to execute")
+    
+    for name, (help_text, build_arguments) in COMMAND_PARSERS.items():
+        command_parser = subparsers.add_parser(name, help=help_text)
+        if command is None or command == name:
+            build_arguments(command_parser)
     
     # Global options
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
     
+    return parser
+
+
+def run_create(args: argparse.Namespace) -> None:
+    """
+    Create a package and show how to install it
+    
+    Args:
+        args: Command line arguments
+    """
+    package_path = create_package(args)
+    
+    # Generate and display installation command
+    install_command = generate_install_command(package_path)
+    print("\n=== Installation Command ===")
+    print("Upload your package to a web-accessible location, then run this command on your RunPod server:")
+    print(f"\n{install_command}\n")
+    print("Replace the URL with the actual location where you uploaded the package.")
+
+
+# Command name -> handler
+DISPATCH = {
+    "create": run_create,
+    "analyze": analyze_workflow,
+    "analyze-batch": analyze_batch,
+    "test": test_installation,
+}
+
+
+def main():
+    """Main entry point"""
+    # Find the command first so only its parser needs building
+    pre_parser = argparse.ArgumentParser(add_help=False)
+    pre_parser.add_argument("--verbose", "-v", action="store_true")
+    pre_parser.add_argument("command", nargs="?")
+    known, _ = pre_parser.parse_known_args()
+    
+    parser = build_parser(known.command if known.command in COMMAND_PARSERS else None)
     args = parser.parse_args()
     
     # Set logging level
@@ -217,22 +432,9 @@ def main():
         logging.getLogger().setLevel(logging.DEBUG)
     
     # Execute the requested command
-    if args.command == "create":
-        package_path = create_package(args)
-        
-        # Generate and display installation command
-        install_command = generate_install_command(package_path)
-        print("\n=== Installation Command ===")
-        print("Upload your package to a web-accessible location, then run this command on your RunPod server:")
-        print(f"\n{install_command}\n")
-        print("Replace the URL with the actual location where you uploaded the package.")
-        
-    elif args.command == "analyze":
-        analyze_workflow(args)
-        
-    elif args.command == "test":
-        test_installation(args)
-        
+    handler = DISPATCH.get(args.command)
+    if handler:
+        handler(args)
     else:
         parser.print_help()
 
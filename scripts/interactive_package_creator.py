@@ -6,24 +6,50 @@ Creates packages with user-guided model discovery and selection.
 
 import os
 import sys
+import copy
+import errno
+import io
 import json
+import re
 import shutil
 import zipfile
 import hashlib
+import tempfile
+import threading
 import time
-import glob
 import fnmatch
 import argparse
 import logging
+import mmap
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Set, Tuple, Any, Optional, Union
+from typing import Dict, Iterator, List, Set, Tuple, Any, Optional, Union
+
+# PyYAML is only needed to read extra_model_paths.yaml; prefer its libyaml-based loader
+try:
+    import yaml
+    try:
+        from yaml import CSafeLoader as _SafeLoader
+    except ImportError:
+        from yaml import SafeLoader as _SafeLoader
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+# orjson writes the package config files faster than the stdlib; fall back if missing
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Add local module search path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import local modules
 try:
-    from simplified_workflow_parser import WorkflowParser
+    from simplified_workflow_parser import get_parser, load_json_file, CACHE_DIR
 except ImportError:
     print("Error: simplified_workflow_parser.py not found in the same directory.")
     sys.exit(1)
@@ -53,6 +79,370 @@ MODEL_TYPES = [
     ("sams", "Segment Anything model")
 ]
 
+# Model type names, for membership checks
+MODEL_TYPE_KEYS = frozenset(model_type for model_type, _ in MODEL_TYPES)
+
+# Model type menu lines, without the suggestion marker
+_MENU_LINES = [
+    (model_type, f"  {i}. {description} ({model_type})")
+    for i, (model_type, description) in enumerate(MODEL_TYPES, 1)
+]
+
+# Model type guesses by file extension: (name keyword, model type) rules
+# checked in order, where a keyword of None always matches
+_CHECKPOINT_RULES = (
+    ('lora', 'loras'),
+    ('vae', 'vae'),
+    ('embedding', 'embeddings'),
+    ('control', 'controlnet'),
+    (None, 'checkpoints'),
+)
+_UPSCALE_FACE_RULES = (
+    ('upscale', 'upscale_models'),
+    ('esrgan', 'upscale_models'),
+    ('face', 'facerestore_models'),
+    ('gfpgan', 'facerestore_models'),
+)
+_EXT_RULES = {
+    '.safetensors': _CHECKPOINT_RULES,
+    '.ckpt': _CHECKPOINT_RULES,
+    '.pt': _UPSCALE_FACE_RULES,
+    '.pth': _UPSCALE_FACE_RULES,
+    '.onnx': ((None, 'insightface'),),
+}
+
+
+# Directories left out when copying custom nodes
+_SKIP_DIRS = frozenset({
+    '.git', '__pycache__', '.github', '.pytest_cache', '.vscode',
+    'node_modules', 'dist', 'build', '.ipynb_checkpoints', 'venv',
+    'env', '.env', '.venv', '.mypy_cache', '.ruff_cache', '.egg-info',
+    '__MACOSX', '.DS_Store'
+})
+
+# File patterns left out when copying custom nodes, matched with one regex
+_SKIP_FILE_PATTERNS = (
+    '*.pyc', '*.pyo', '*.so', '*.egg', '*.whl', '*.zip', '*.tar.gz',
+    '*.log', '*.db', '*.sqlite', '*.swp', '*~', '*.bak', '*.tmp',
+    '*.pth', '*.onnx', '.DS_Store', 'Thumbs.db', '.gitignore',
+    '.gitattributes', '.gitmodules', '*.png', '*.jpg', '*.jpeg', 
+    '*.webp', '*.gif', '*.mp4', '*.mp3', '*.avi', '*.mov', 
+    '.env*', '*.o', '*.a', '*.dll', '*.exe'
+)
+_SKIP_FILE_RE = re.compile('|'.join(fnmatch.translate(pattern) for pattern in _SKIP_FILE_PATTERNS))
+
+# Largest custom node file copied (100MB), unless it has one of the extensions below
+_MAX_COPY_FILE_SIZE = 100 * 1024 * 1024
+_ALWAYS_COPY_EXTENSIONS = ('.py', '.txt', '.md', '.json', '.yaml', '.yml', '.html', '.js', '.css')
+
+
+def _compile_rules(rules: Tuple[Tuple[Optional[str], str], ...]) -> Tuple[Any, Tuple[str, ...], Optional[str]]:
+    """
+    Compile a model type rule list into a single regex
+    
+    Each keyword becomes a lookahead alternative tried in rule order from the
+    start of the name, so the first rule that matches wins as before.
+    
+    Args:
+        rules: (keyword, model type) rules; a keyword of None always matches
+        
+    Returns:
+        (pattern or None, model type per keyword group, default model type)
+    """
+    keyword_rules = [(keyword, model_type) for keyword, model_type in rules if keyword is not None]
+    default_type = next((model_type for keyword, model_type in rules if keyword is None), None)
+    pattern = None
+    if keyword_rules:
+        pattern = re.compile(
+            '|'.join(f'(?=.*?({re.escape(keyword)}))' for keyword, _ in keyword_rules),
+            re.IGNORECASE | re.DOTALL
+        )
+    return pattern, tuple(model_type for _, model_type in keyword_rules), default_type
+
+
+# Compiled form of _EXT_RULES
+_EXT_PATTERNS = {extension: _compile_rules(rules) for extension, rules in _EXT_RULES.items()}
+
+# Files added to the package ZIP without compression
+STORED_EXTENSIONS = ('.safetensors', '.ckpt', '.pt', '.pth', '.bin', '.onnx', '.gguf')
+
+# Model hashes from earlier runs, keyed by absolute path
+HASH_CACHE_FILE = os.path.join(CACHE_DIR, "hashes.json")
+
+# Bytes hashed between checks for a cancelled background hash
+HASH_CHUNK_SIZE = 64 * 1024 * 1024
+
+def _iter_files(top: str) -> Iterator[os.DirEntry]:
+    """
+    Iterate over all files below a directory, without following directory symlinks
+    
+    Args:
+        top: Directory to search
+        
+    Yields:
+        Directory entries of the files found
+    """
+    pending = deque([top])
+    while pending:
+        try:
+            with os.scandir(pending.popleft()) as it:
+                entries = list(it)
+        except OSError:
+            continue
+            
+        for entry in entries:
+            # DirEntry caches the file type from the directory listing, so no stat is needed
+            if entry.is_dir(follow_symlinks=False):
+                pending.append(entry.path)
+            else:
+                yield entry
+
+
+def _iter_files_named(top: str, name_lower: str) -> Iterator[str]:
+    """
+    Find files with a given name (ignoring case) anywhere below a directory
+    
+    Args:
+        top: Directory to search
+        name_lower: Lowercase file name to look for
+        
+    Yields:
+        Paths of the matching files
+    """
+    for entry in _iter_files(top):
+        if entry.name.lower() == name_lower:
+            yield entry.path
+
+
+def _iter_matches(base_dirs: List[str], pattern: str) -> Iterator[Tuple[str, int]]:
+    """
+    Find files matching a glob pattern at any depth below a set of directories
+    
+    Each path component of the pattern is matched against the trailing
+    components of a file's path, so "*.pt" and "**/loras/*.pt" both match
+    at any depth. As with glob, matching ignores case where the file system
+    does, and hidden files and directories only match components that
+    start with a dot.
+    
+    Args:
+        base_dirs: Directories to search
+        pattern: Glob pattern, optionally with directory components
+        
+    Yields:
+        (file path, size in bytes) tuples, each file once even when reachable
+        through overlapping or linked directories
+    """
+    parts = [part for part in pattern.replace('\\', '/').split('/') if part and part != '**']
+    if not parts:
+        return
+    flags = re.IGNORECASE if os.path.normcase('A') == 'a' else 0
+    # (regex, whether the component may match hidden names) for each component
+    part_res = [(re.compile(fnmatch.translate(part), flags), part.startswith('.')) for part in parts]
+    name_re, name_hidden = part_res[-1]
+    dir_res = part_res[:-1]
+    
+    seen = set()
+    for base_dir in base_dirs:
+        if not os.path.isdir(base_dir):
+            continue
+        for entry in _iter_files(base_dir):
+            if not name_re.match(entry.name) or (entry.name.startswith('.') and not name_hidden):
+                continue
+            rel_dir = os.path.relpath(os.path.dirname(entry.path), base_dir)
+            dirs = rel_dir.split(os.sep) if rel_dir != os.curdir else []
+            if len(dirs) < len(dir_res):
+                continue
+            # Directories above the matched ones stand in for "**", which skips hidden ones
+            split = len(dirs) - len(dir_res)
+            if any(name.startswith('.') for name in dirs[:split]):
+                continue
+            if not all(regex.match(name) and (hidden or not name.startswith('.'))
+                       for (regex, hidden), name in zip(dir_res, dirs[split:])):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                # Cached from the directory scan where the platform allows
+                stat = entry.stat()
+            except OSError:
+                continue
+            # DirEntry.stat() leaves st_ino zero on Windows; fall back to the path there
+            file_id = (stat.st_dev, stat.st_ino) if stat.st_ino else entry.path
+            if file_id in seen:
+                continue
+            seen.add(file_id)
+            yield entry.path, stat.st_size
+
+
+def _walk_arc(root: str, prefix: str = '') -> Iterator[Tuple[str, str, os.stat_result]]:
+    """
+    Iterate over the files below a directory along with their archive names
+    
+    Args:
+        root: Directory to walk
+        prefix: Archive name prefix for entries of root
+        
+    Yields:
+        (file path, archive name, stat result) tuples
+    """
+    with os.scandir(root) as it:
+        for entry in it:
+            name = prefix + entry.name
+            if entry.is_dir():
+                # Directory symlinks are not followed
+                if not entry.is_symlink():
+                    yield from _walk_arc(entry.path, name + '/')
+            else:
+                yield entry.path, name, entry.stat()
+
+
+def _dumps_indented(data: Any) -> bytes:
+    """
+    Serialize data as JSON indented by two spaces
+    
+    Args:
+        data: JSON-serializable data
+        
+    Returns:
+        UTF-8 encoded JSON document
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode('utf-8')
+
+
+def _file_size(path: str) -> Optional[int]:
+    """
+    Get the size of a file with a single stat
+    
+    Args:
+        path: Path to the file
+        
+    Returns:
+        Size in bytes, or None if the path doesn't exist
+    """
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return None
+
+
+def _copy_file(src: str, dst: str) -> None:
+    """
+    Copy a file with its metadata, letting the kernel copy the data with
+    copy_file_range where possible (a reflink on XFS/Btrfs)
+    
+    Args:
+        src: File to copy
+        dst: Destination path
+    """
+    if hasattr(os, 'copy_file_range'):
+        # Opening the destination for writing would truncate the source
+        if os.path.exists(dst) and os.path.samefile(src, dst):
+            raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            shutil.copystat(src, dst)
+            return
+        except OSError as e:
+            # Unsupported by the kernel or filesystem (or across devices on older kernels)
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.EINVAL, errno.ETXTBSY):
+                raise
+    
+    shutil.copy2(src, dst)
+
+
+def _fast_copy(src: str, dst: str) -> None:
+    """
+    Copy a file into the package staging directory, hard linking it when
+    source and destination are on the same filesystem
+    
+    Symlinks (e.g. models linked in from a network volume) are resolved
+    first, so the file itself is staged rather than a link that may dangle.
+    
+    Args:
+        src: File to copy
+        dst: Destination path
+    """
+    src = os.path.realpath(src)
+    try:
+        if os.stat(src).st_dev == os.stat(os.path.dirname(dst)).st_dev:
+            os.link(src, dst)
+            return
+    except OSError:
+        # Cross-device, unsupported by the filesystem, or the destination exists
+        pass
+    
+    _copy_file(src, dst)
+
+
+def _build_path_index(base_path: str) -> Dict[str, List[str]]:
+    """
+    Index all files below a directory by name
+    
+    Args:
+        base_path: Directory to index
+        
+    Returns:
+        Dictionary mapping lowercase file names to full paths
+    """
+    index = defaultdict(list)
+    for entry in _iter_files(base_path):
+        index[entry.name.lower()].append(entry.path)
+    return index
+
+
+# Parsed YAML files by path, each stored as (mtime_ns, size, data)
+_YAML_CACHE = OrderedDict()
+_YAML_CACHE_SIZE = 100
+_YAML_LOADER_LOGGED = False
+
+
+def _load_yaml_cached(path: str) -> Any:
+    """
+    Load a YAML file, reusing the parsed result while the file is unchanged
+    
+    Args:
+        path: Path to the YAML file
+        
+    Returns:
+        A copy of the parsed YAML data, safe for the caller to modify
+    """
+    global _YAML_LOADER_LOGGED
+    
+    if not YAML_AVAILABLE:
+        raise ImportError("PyYAML is required to read extra_model_paths.yaml")
+    
+    stat = os.stat(path)
+    cached = _YAML_CACHE.get(path)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        _YAML_CACHE.move_to_end(path)
+        return copy.deepcopy(cached[2])
+    
+    if not _YAML_LOADER_LOGGED:
+        if _SafeLoader.__name__ == 'CSafeLoader':
+            logger.info("Parsing YAML with libyaml (CSafeLoader)")
+        else:
+            logger.info("Parsing YAML with the pure-Python loader; install PyYAML with libyaml for faster loading")
+        _YAML_LOADER_LOGGED = True
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.load(f, Loader=_SafeLoader)
+    
+    _YAML_CACHE[path] = (stat.st_mtime_ns, stat.st_size, data)
+    _YAML_CACHE.move_to_end(path)
+    if len(_YAML_CACHE) > _YAML_CACHE_SIZE:
+        _YAML_CACHE.popitem(last=False)
+    
+    return copy.deepcopy(data)
+
+
 class RequirementsCollector:
     """Collects and processes requirements.txt files from custom nodes"""
     
@@ -68,48 +458,38 @@ class RequirementsCollector:
         self.processed_files.add(req_file)
         
         try:
-            with open(req_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
+            # Work on the raw bytes and only decode the lines that are kept
+            with open(req_file, 'rb') as f:
+                lines = iter(f.read().splitlines())
+            
+            for line in lines:
+                line = line.strip()
+                
+                # Skip comments and empty lines
+                if not line or line.startswith(b'#'):
+                    continue
                     
-                    # Skip comments and empty lines
-                    if not line or line.startswith('#'):
-                        continue
-                        
-                    # Handle line continuations
-                    while line.endswith('\\'):
-                        line = line[:-1]
-                        next_line = next(f, '').strip()
-                        line += next_line
+                # Handle line continuations
+                while line.endswith(b'\\'):
+                    line = line[:-1] + next(lines, b'').strip()
+                
+                # Remove trailing comments
+                line = line.partition(b'#')[0].strip()
                     
-                    # Clean up dependency specification
-                    # Remove comments
-                    if '#' in line:
-                        line = line.split('#')[0].strip()
-                        
-                    # Skip if empty after cleaning
-                    if not line:
-                        continue
-                        
-                    # Add to our requirements set
-                    self.requirements.add(line)
+                # Skip if empty after cleaning
+                if not line:
+                    continue
+                    
+                # Add to our requirements set
+                self.requirements.add(line.decode('utf-8'))
         except Exception as e:
             logger.warning(f"Error processing requirements file {req_file}: {e}")
     
     def process_node_directory(self, node_dir: str) -> None:
         """Process all requirements.txt files in a node directory"""
-        # First check for requirements.txt in the root directory
-        root_req = os.path.join(node_dir, "requirements.txt")
-        if os.path.exists(root_req):
-            self.process_requirements_file(root_req)
-            
-        # Then check for any subdirectories
         try:
-            for root, dirs, files in os.walk(node_dir):
-                for file in files:
-                    if file.lower() == "requirements.txt":
-                        req_path = os.path.join(root, file)
-                        self.process_requirements_file(req_path)
+            for req_path in _iter_files_named(node_dir, "requirements.txt"):
+                self.process_requirements_file(req_path)
         except Exception as e:
             logger.warning(f"Error scanning directory {node_dir} for requirements.txt: {e}")
     
@@ -125,24 +505,71 @@ class RequirementsCollector:
 class InteractivePackageCreator:
     """Creates ComfyUI packages with user-guided model discovery"""
     
-    def __init__(self, comfyui_path: str):
+    def __init__(self, comfyui_path: str, preloaded_entries: Optional[List[os.DirEntry]] = None):
         """
         Initialize the package creator
         
         Args:
             comfyui_path: Path to ComfyUI installation
+            preloaded_entries: Top-level entries of the ComfyUI directory, if the
+                caller has already listed it
         """
         self.comfyui_path = os.path.abspath(comfyui_path)
-        self.workflow_parser = WorkflowParser(comfyui_path)
+        self.top_level_names = (
+            {entry.name for entry in preloaded_entries} if preloaded_entries is not None else None
+        )
+        self.workflow_parser = get_parser(self.comfyui_path)
+        self.hash_cache = None
+        self._path_index = {}
         self.model_search_paths = self._get_model_search_paths()
         
+    def _exists(self, path: str) -> bool:
+        """Check if a path exists, using the preloaded entries for top-level paths"""
+        if self.top_level_names is not None and os.path.dirname(path) == self.comfyui_path:
+            return os.path.basename(path) in self.top_level_names
+        return os.path.exists(path)
+        
+    def _start_path_indexing(self) -> None:
+        """Start indexing every model search path in the background"""
+        base_paths = {
+            base_path for paths in self.model_search_paths.values() for base_path in paths
+            if base_path not in self._path_index
+        }
+        if not base_paths:
+            return
+        
+        pool = ThreadPoolExecutor(max_workers=min(8, len(base_paths)))
+        for base_path in base_paths:
+            self._path_index[base_path] = pool.submit(_build_path_index, base_path)
+        pool.shutdown(wait=False)
+    
+    def _index_base_path(self, base_path: str) -> Dict[str, List[str]]:
+        """
+        Get an index of all files below a model search path, built on first use
+        
+        Args:
+            base_path: Model search path
+            
+        Returns:
+            Dictionary mapping lowercase file names to full paths
+        """
+        index = self._path_index.get(base_path)
+        if index is None:
+            index = _build_path_index(base_path)
+            self._path_index[base_path] = index
+        elif isinstance(index, Future):
+            # Started by _start_path_indexing
+            index = index.result()
+            self._path_index[base_path] = index
+        return index
+    
     def _get_model_search_paths(self) -> Dict[str, List[str]]:
         """Get base paths to search for models"""
         # Start with standard ComfyUI model paths
-        search_paths = {}
-        
-        for model_type, _ in MODEL_TYPES:
-            search_paths[model_type] = [os.path.join(self.comfyui_path, "models", model_type)]
+        models_prefix = os.path.join(self.comfyui_path, "models")
+        search_paths = {
+            model_type: [f"{models_prefix}{os.sep}{model_type}"] for model_type, _ in MODEL_TYPES
+        }
         
         # Try to load extra_model_paths.yaml
         yaml_files = [
@@ -151,11 +578,9 @@ class InteractivePackageCreator:
         ]
         
         for yaml_file in yaml_files:
-            if os.path.exists(yaml_file):
+            if self._exists(yaml_file):
                 try:
-                    import yaml
-                    with open(yaml_file, 'r', encoding='utf-8') as f:
-                        data = yaml.safe_load(f)
+                    data = _load_yaml_cached(yaml_file)
                     
                     if data:
                         print(f"Loading paths from {yaml_file}")
@@ -167,7 +592,7 @@ class InteractivePackageCreator:
                                 
                                 # Add paths for each model type
                                 for k, v in ui_config.items():
-                                    if k.lower() in search_paths and k != 'base_path' and k != 'is_default':
+                                    if k.lower() in MODEL_TYPE_KEYS:
                                         if isinstance(v, str):
                                             if '\n' in v:  # Multi-line string
                                                 paths = [p.strip() for p in v.split('\n') if p.strip()]
@@ -241,11 +666,22 @@ class InteractivePackageCreator:
                 logger.info("Operation cancelled.")
                 return ""
             
+            trash_dir = None
             try:
-                shutil.rmtree(temp_dir)
-            except Exception as e:
-                logger.error(f"Failed to remove existing directory: {e}")
-                return ""
+                # Move the old directory aside and delete it in the background,
+                # so packaging doesn't wait on removing large staged files
+                trash_dir = tempfile.mkdtemp(prefix=f".{output_name}-old-", dir=output_dir)
+                os.rename(temp_dir, os.path.join(trash_dir, output_name))
+                threading.Thread(target=shutil.rmtree, args=(trash_dir,), kwargs={'ignore_errors': True}).start()
+            except OSError:
+                # Don't leave the empty trash directory behind when the rename fails
+                if trash_dir is not None:
+                    shutil.rmtree(trash_dir, ignore_errors=True)
+                try:
+                    shutil.rmtree(temp_dir)
+                except Exception as e:
+                    logger.error(f"Failed to remove existing directory: {e}")
+                    return ""
             
             # Recreate directory and restore civitai_config.json if it existed
             os.makedirs(temp_dir, exist_ok=True)
@@ -261,16 +697,17 @@ class InteractivePackageCreator:
         os.makedirs(os.path.join(temp_dir, "custom_nodes"), exist_ok=True)
         
         # Create model directories
+        pkg_models_prefix = os.path.join(temp_dir, "models")
         for model_type, _ in MODEL_TYPES:
-            os.makedirs(os.path.join(temp_dir, "models", model_type), exist_ok=True)
+            os.makedirs(f"{pkg_models_prefix}{os.sep}{model_type}", exist_ok=True)
             
         # Create Civitai API key config if provided
         if civitai_api_key:
             civitai_config = {
                 "api_key": civitai_api_key
             }
-            with open(os.path.join(temp_dir, "civitai_config.json"), 'w') as f:
-                json.dump(civitai_config, f, indent=2)
+            with open(os.path.join(temp_dir, "civitai_config.json"), 'wb') as f:
+                f.write(_dumps_indented(civitai_config))
             logger.info("Added Civitai API key configuration")
         
         # Copy workflow file
@@ -329,86 +766,114 @@ class InteractivePackageCreator:
         # Process models
         external_models = []
         models_processed = {}
+        # (source, destination) pairs, copied together once all models are classified
+        model_copies = []
         
-        for model_type, model_list in models_to_process.items():
-            if not model_list:
-                continue
-                
-            models_processed[model_type] = []
-            
-            for model_name, model_path in model_list:
-                if not model_path:
-                    logger.warning(f"  - Warning: No path provided for {model_name}")
-                    continue
-                
-                if not os.path.exists(model_path):
-                    logger.warning(f"  - Warning: Model file not found: {model_path}")
+        # Background worker that hashes large models while the user decides.
+        # Hashes of models that end up not needing one are stopped through
+        # their event, so an unneeded hash never holds up exit
+        hash_executor = ThreadPoolExecutor(max_workers=1)
+        hash_stops = []
+        try:
+            for model_type, model_list in models_to_process.items():
+                if not model_list:
                     continue
+                    
+                models_processed[model_type] = []
                 
-                # Check model size
-                model_size = os.path.getsize(model_path)
-                size_mb = model_size / (1024 * 1024)
-                size_threshold = size_threshold_gb * 1024 * 1024 * 1024
-                
-                # Determine target directory based on model type
-                dest_dir = os.path.join(temp_dir, "models", model_type)
-                
-                # Handle subdirectories in model path
-                rel_path = os.path.basename(model_name)
-                if '/' in model_name or '\\' in model_name:
-                    rel_dir = os.path.dirname(model_name)
-                    rel_path = model_name
-                    dest_dir = os.path.join(dest_dir, rel_dir)
-                    os.makedirs(dest_dir, exist_ok=True)
-                
-                dest_path = os.path.join(dest_dir, os.path.basename(rel_path))
-                
-                # Handle large model prompting
-                if model_size > size_threshold:
-                    size_gb = model_size / (1024 * 1024 * 1024)
-                    logger.info(f"Large model detected: {model_name} ({size_gb:.2f} GB)")
-                    print(f"\nModel '{model_name}' is large ({size_gb:.2f} GB)")
-                    print("Options:")
-                    print("1. Include in package (not recommended for large files)")
-                    print("2. Add download URL to config.json (recommended)")
-                    print("3. Skip this model")
+                for model_name, model_path in model_list:
+                    if not model_path:
+                        logger.warning(f"  - Warning: No path provided for {model_name}")
+                        continue
                     
-                    choice = input("Enter choice (1-3): ")
+                    # Check model size
+                    try:
+                        model_size = os.stat(model_path).st_size
+                    except FileNotFoundError:
+                        logger.warning(f"  - Warning: Model file not found: {model_path}")
+                        continue
+                    size_mb = model_size / (1024 * 1024)
+                    size_threshold = size_threshold_gb * 1024 * 1024 * 1024
                     
-                    if choice == "1":
-                        logger.info(f"  - Copying large model {model_name}...")
-                        shutil.copy2(model_path, dest_path)
-                        models_processed[model_type].append(model_name)
-                    elif choice == "2":
-                        # Get model URL
-                        print("\nPlease provide a download URL for this model.")
-                        print("Suggested sources: Civitai, Hugging Face, or other model repositories")
-                        model_url = input("URL: ")
+                    # Determine target directory based on model type
+                    dest_dir = f"{pkg_models_prefix}{os.sep}{model_type}"
+                    
+                    # Handle subdirectories in model path
+                    rel_path = os.path.basename(model_name)
+                    if '/' in model_name or '\\' in model_name:
+                        rel_dir = os.path.dirname(model_name)
+                        rel_path = model_name
+                        dest_dir = os.path.join(dest_dir, rel_dir)
+                        os.makedirs(dest_dir, exist_ok=True)
+                    
+                    dest_path = os.path.join(dest_dir, os.path.basename(rel_path))
+                    
+                    # Handle large model prompting
+                    if model_size > size_threshold:
+                        size_gb = model_size / (1024 * 1024 * 1024)
+                        logger.info(f"Large model detected: {model_name} ({size_gb:.2f} GB)")
+                        
+                        # Start hashing now so it runs while the user decides;
+                        # it is stopped if the user doesn't add a download URL
+                        hash_stop = threading.Event()
+                        hash_stops.append(hash_stop)
+                        hash_future = hash_executor.submit(self._calculate_file_hash, model_path, hash_stop)
+                        print(f"\nModel '{model_name}' is large ({size_gb:.2f} GB)")
+                        print("Options:")
+                        print("1. Include in package (not recommended for large files)")
+                        print("2. Add download URL to config.json (recommended)")
+                        print("3. Skip this model")
                         
-                        if model_url:
-                            # Calculate file hash for verification
-                            logger.info("  - Calculating hash for verification...")
-                            file_hash = self._calculate_file_hash(model_path)
+                        choice = input("Enter choice (1-3): ")
+                        
+                        if choice != "2":
+                            hash_stop.set()
+                            
+                        if choice == "1":
+                            logger.info(f"  - Copying large model {model_name}...")
+                            model_copies.append((model_path, dest_path))
+                            models_processed[model_type].append(model_name)
+                        elif choice == "2":
+                            # Get model URL
+                            print("\nPlease provide a download URL for this model.")
+                            print("Suggested sources: Civitai, Hugging Face, or other model repositories")
+                            model_url = input("URL: ")
                             
-                            # Add to external models list
-                            external_models.append({
-                                "name": os.path.basename(model_name),
-                                "type": model_type,
-                                "path": rel_path if '/' in model_name or '\\' in model_name else None,
-                                "url": model_url,
-                                "hash": file_hash,
-                                "size": model_size
-                            })
-                            logger.info(f"  - Added {model_name} as external download")
+                            if model_url:
+                                # Calculate file hash for verification
+                                logger.info("  - Calculating hash for verification...")
+                                file_hash = hash_future.result()
+                                
+                                # Add to external models list
+                                external_models.append({
+                                    "name": os.path.basename(model_name),
+                                    "type": model_type,
+                                    "path": rel_path if '/' in model_name or '\\' in model_name else None,
+                                    "url": model_url,
+                                    "hash": file_hash,
+                                    "size": model_size
+                                })
+                                logger.info(f"  - Added {model_name} as external download")
+                            else:
+                                hash_stop.set()
+                                logger.info("  - No URL provided, skipping model")
                         else:
-                            logger.info("  - No URL provided, skipping model")
+                            logger.info(f"  - Skipping model {model_name}")
                     else:
-                        logger.info(f"  - Skipping model {model_name}")
-                else:
-                    # Regular-sized model, include it directly
-                    logger.info(f"  - Copying model {model_name} ({size_mb:.2f} MB)...")
-                    shutil.copy2(model_path, dest_path)
-                    models_processed[model_type].append(model_name)
+                        # Regular-sized model, include it directly
+                        logger.info(f"  - Copying model {model_name} ({size_mb:.2f} MB)...")
+                        model_copies.append((model_path, dest_path))
+                        models_processed[model_type].append(model_name)
+            
+        finally:
+            for hash_stop in hash_stops:
+                hash_stop.set()
+            hash_executor.shutdown(wait=False)
+        
+        # Copy the included models in parallel; this helps when they can't be hard linked
+        if model_copies:
+            with ThreadPoolExecutor(max_workers=min(4, len(model_copies))) as pool:
+                list(pool.map(lambda copy_job: _fast_copy(*copy_job), model_copies))
         
         # Create config.json
         logger.info("Creating config.json...")
@@ -445,8 +910,8 @@ class InteractivePackageCreator:
         }
         
         # Save config
-        with open(config_path, 'w') as f:
-            json.dump(package_config, f, indent=2)
+        with open(config_path, 'wb') as f:
+            f.write(_dumps_indented(package_config))
         
         # Copy model downloader script if we have external models
         if external_models:
@@ -459,9 +924,9 @@ class InteractivePackageCreator:
             else:
                 logger.warning("Warning: model_downloader.py not found in current directory. Model downloading may not work.")
         
-        # Create README.md with package info
+        # Create README.md with package info, assembled in memory and written at once
         readme_path = os.path.join(temp_dir, "README.md")
-        with open(readme_path, 'w') as f:
+        with io.StringIO() as f:
             f.write(f"# {output_name}\n\n")
             f.write(f"Package created from {os.path.basename(workflow_path)}\n\n")
             
@@ -498,16 +963,34 @@ class InteractivePackageCreator:
             f.write("1. Install the package on your RunPod server\n")
             f.write("2. Run the installation script\n")
             f.write("3. The workflow will be available in ComfyUI\n")
+            
+            Path(readme_path).write_text(f.getvalue(), encoding='utf-8')
         
         # Create ZIP file
         logger.info("Creating ZIP archive...")
         zip_path = os.path.join(output_dir, f"{output_name}.zip")
         with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for root, _, files in os.walk(temp_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    arcname = os.path.relpath(file_path, temp_dir)
-                    zipf.write(file_path, arcname)
+            for file_path, arcname, st in _walk_arc(temp_dir):
+                # Build the header from the stat we already have instead of letting write() stat again
+                zinfo = zipfile.ZipInfo(arcname, date_time=time.localtime(st.st_mtime)[:6])
+                zinfo.external_attr = (st.st_mode & 0xFFFF) << 16
+                zinfo.file_size = st.st_size
+                
+                # Model weights barely compress, so store them as-is
+                if arcname.lower().endswith(STORED_EXTENSIONS):
+                    zinfo.compress_type = zipfile.ZIP_STORED
+                else:
+                    zinfo.compress_type = zipfile.ZIP_DEFLATED
+                    # open() takes the level from the ZipInfo; the attribute is
+                    # public from Python 3.13 and private before that
+                    if hasattr(zinfo, 'compress_level'):
+                        zinfo.compress_level = 1
+                    else:
+                        zinfo._compresslevel = 1
+                
+                with open(file_path, 'rb') as src, \
+                        zipf.open(zinfo, 'w', force_zip64=st.st_size >= zipfile.ZIP64_LIMIT) as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
         
         logger.info(f"Package created successfully in {zip_path}")
         
@@ -539,6 +1022,9 @@ class InteractivePackageCreator:
             print("No models found in the workflow")
             return models_by_type
         
+        # Index the search paths while the user classifies the first model
+        self._start_path_indexing()
+        
         print("\nWe'll now go through each model to classify and locate it.")
         print("For each model, you'll select the type and provide the location.\n")
         
@@ -579,32 +1065,16 @@ class InteractivePackageCreator:
         """
         # Try to guess the model type from the file extension or name
         extension = os.path.splitext(model_ref)[1].lower()
-        suggested_type = None
-        
-        if extension in ('.pt', '.pth'):
-            if 'upscale' in model_ref.lower() or 'esrgan' in model_ref.lower():
-                suggested_type = "upscale_models"
-            elif 'face' in model_ref.lower() or 'gfpgan' in model_ref.lower():
-                suggested_type = "facerestore_models"
-        elif extension == '.onnx':
-            suggested_type = "insightface"
-        elif extension in ('.safetensors', '.ckpt'):
-            if 'lora' in model_ref.lower():
-                suggested_type = "loras"
-            elif 'vae' in model_ref.lower():
-                suggested_type = "vae"
-            elif 'embedding' in model_ref.lower():
-                suggested_type = "embeddings"
-            elif 'control' in model_ref.lower():
-                suggested_type = "controlnet"
-            else:
-                suggested_type = "checkpoints"
+        pattern, keyword_types, default_type = _EXT_PATTERNS.get(extension, (None, (), None))
+        match = pattern.match(model_ref) if pattern else None
+        suggested_type = keyword_types[match.lastindex - 1] if match else default_type
         
-        # Present options to the user
-        print("What type of model is this?")
-        for i, (model_type, description) in enumerate(MODEL_TYPES, 1):
-            marker = "→" if model_type == suggested_type else " "
-            print(f"{marker} {i}. {description} ({model_type})")
+        # Present options to the user, marking the suggested type
+        menu = "\n".join(
+            "→" + line[1:] if model_type == suggested_type else line
+            for model_type, line in _MENU_LINES
+        )
+        sys.stdout.write("What type of model is this?\n" + menu + "\n")
             
         # Get user selection
         while True:
@@ -635,36 +1105,44 @@ class InteractivePackageCreator:
         # Normalize model name and get filename
         model_name = os.path.basename(model_ref)
         model_name_lower = model_name.lower()
+        # (match confidence, path, size) tuples; sizes are kept from the existence check
         model_candidates = []
+        seen_paths = set()
         
         # Search in the default paths for this model type
         for base_path in self.model_search_paths.get(model_type, []):
             if os.path.exists(base_path):
                 # Try the direct path first
                 full_path = os.path.join(base_path, model_ref)
-                if os.path.exists(full_path):
-                    model_candidates.append((1, full_path))
+                if full_path not in seen_paths:
+                    size = _file_size(full_path)
+                    if size is not None:
+                        model_candidates.append((1, full_path, size))
+                        seen_paths.add(full_path)
                     
                 # Try just the filename
                 filename_path = os.path.join(base_path, model_name)
-                if os.path.exists(filename_path) and filename_path != full_path:
-                    model_candidates.append((2, filename_path))
+                if filename_path not in seen_paths:
+                    size = _file_size(filename_path)
+                    if size is not None:
+                        model_candidates.append((2, filename_path, size))
+                        seen_paths.add(filename_path)
                 
                 # Look in subdirectories
-                for root, dirs, files in os.walk(base_path):
-                    for file in files:
-                        if file.lower() == model_name_lower:
-                            path = os.path.join(root, file)
-                            if path not in [p for _, p in model_candidates]:
-                                model_candidates.append((3, path))
+                for path in self._index_base_path(base_path).get(model_name_lower, []):
+                    if path not in seen_paths:
+                        size = _file_size(path)
+                        if size is not None:
+                            model_candidates.append((3, path, size))
+                            seen_paths.add(path)
                                 
         # If we found matches, present them to the user
         if model_candidates:
             print(f"Found {len(model_candidates)} potential matches:")
             model_candidates.sort()  # Sort by match confidence
             
-            for i, (_, path) in enumerate(model_candidates, 1):
-                size_mb = os.path.getsize(path) / (1024 * 1024)
+            for i, (_, path, size) in enumerate(model_candidates, 1):
+                size_mb = size / (1024 * 1024)
                 print(f"{i}. {path} ({size_mb:.2f} MB)")
                 
             print(f"M. Manually enter path")
@@ -747,32 +1225,8 @@ class InteractivePackageCreator:
         if not pattern:
             return None
             
-        # Search in all base directories
-        matches = []
-        for base_dir in base_dirs:
-            if os.path.exists(base_dir):
-                # First try direct glob in base directory
-                direct_matches = glob.glob(os.path.join(base_dir, pattern))
-                for match in direct_matches:
-                    if os.path.isfile(match):
-                        size_mb = os.path.getsize(match) / (1024 * 1024)
-                        matches.append((match, size_mb))
-                        
-                # Then try recursive search with **
-                if '**' in pattern:
-                    recursive_matches = glob.glob(os.path.join(base_dir, pattern), recursive=True)
-                    for match in recursive_matches:
-                        if os.path.isfile(match) and match not in [m for m, _ in matches]:
-                            size_mb = os.path.getsize(match) / (1024 * 1024)
-                            matches.append((match, size_mb))
-                else:
-                    # If no ** in pattern, also try a recursive search
-                    recursive_pattern = os.path.join(base_dir, "**", pattern)
-                    recursive_matches = glob.glob(recursive_pattern, recursive=True)
-                    for match in recursive_matches:
-                        if os.path.isfile(match) and match not in [m for m, _ in matches]:
-                            size_mb = os.path.getsize(match) / (1024 * 1024)
-                            matches.append((match, size_mb))
+        # Search all base directories in one pass
+        matches = [(path, size / (1024 * 1024)) for path, size in _iter_matches(base_dirs, pattern)]
         
         if not matches:
             print("No matches found.")
@@ -799,101 +1253,150 @@ class InteractivePackageCreator:
             except ValueError:
                 print("Please enter a valid number or 'M'")
     
-    def _copy_tree_filtered(self, src: str, dst: str) -> None:
+    def _copy_tree_filtered(self, src: str, dst: str, hardlink: bool = True) -> None:
         """
         Copy directory tree while filtering out unnecessary files
         
         Args:
             src: Source directory path
             dst: Destination directory path
+            hardlink: Hard link files when src and dst share a filesystem;
+                pass False if the copies will be modified
         """
         # Create destination directory if it doesn't exist
         os.makedirs(dst, exist_ok=True)
         
-        # Directories to skip
-        skip_dirs = {
-            '.git', '__pycache__', '.github', '.pytest_cache', '.vscode',
-            'node_modules', 'dist', 'build', '.ipynb_checkpoints', 'venv',
-            'env', '.env', '.venv', '.mypy_cache', '.ruff_cache', '.egg-info',
-            '__MACOSX', '.DS_Store'
-        }
-        
-        # File patterns to skip
-        skip_patterns = (
-            '*.pyc', '*.pyo', '*.so', '*.egg', '*.whl', '*.zip', '*.tar.gz',
-            '*.log', '*.db', '*.sqlite', '*.swp', '*~', '*.bak', '*.tmp',
-            '*.pth', '*.onnx', '.DS_Store', 'Thumbs.db', '.gitignore',
-            '.gitattributes', '.gitmodules', '*.png', '*.jpg', '*.jpeg', 
-            '*.webp', '*.gif', '*.mp4', '*.mp3', '*.avi', '*.mov', 
-            '.env*', '*.o', '*.a', '*.dll', '*.exe'
-        )
-        
-        # Max single file size to copy (100MB)
-        max_file_size = 100 * 1024 * 1024
+        # Links only work within one filesystem, so check once instead of failing per file
+        if hardlink:
+            try:
+                hardlink = os.stat(src).st_dev == os.stat(dst).st_dev
+            except OSError:
+                hardlink = False
         
-        # Walk the source directory
-        for root, dirs, files in os.walk(src):
-            # Remove directories to skip in-place (important to modify in-place as walk uses this list)
-            dirs[:] = [d for d in dirs if d not in skip_dirs]
-            
-            # Get relative path
-            rel_path = os.path.relpath(root, src)
-            if rel_path == '.':
-                rel_path = ''
-            
-            # Create subdirectories in destination
-            if rel_path:
-                os.makedirs(os.path.join(dst, rel_path), exist_ok=True)
+        # Walk the source directory with a worklist of (source, destination) directories;
+        # destination paths are built by concatenation since the separator is known
+        sep = os.sep
+        pending = deque([(src, dst)])
+        while pending:
+            src_dir, dst_dir = pending.popleft()
+            try:
+                with os.scandir(src_dir) as it:
+                    entries = list(it)
+            except OSError:
+                # Unreadable directories are skipped
+                continue
             
-            # Copy files
-            for file in files:
-                src_file = os.path.join(root, file)
-                dst_file = os.path.join(dst, rel_path, file)
+            for entry in entries:
+                file = entry.name
+                src_file = entry.path
+                dst_file = dst_dir + sep + file
+                
+                if entry.is_symlink():
+                    # Directory symlinks are not followed; file symlinks stage
+                    # their target so no (possibly relative) link can dangle
+                    try:
+                        if entry.is_dir():
+                            continue
+                        src_file = os.path.realpath(src_file)
+                        # The size limit applies to the target, not the link
+                        file_size = os.stat(src_file).st_size
+                    except OSError as e:
+                        logger.warning(f"Error resolving {entry.path}: {e}")
+                        continue
+                
+                # Create subdirectories in destination
+                elif entry.is_dir(follow_symlinks=False):
+                    if file not in _SKIP_DIRS:
+                        os.makedirs(dst_file, exist_ok=True)
+                        pending.append((src_file, dst_file))
+                    continue
+                
+                # Regular files are stat'ed once, cached on the entry
+                else:
+                    file_size = entry.stat(follow_symlinks=False).st_size
                 
                 # Skip based on patterns
-                if any(fnmatch.fnmatch(file, pattern) for pattern in skip_patterns):
+                if _SKIP_FILE_RE.match(file):
                     logger.debug(f"Skipping file (pattern match): {src_file}")
                     continue
                 
                 # Skip large binary files
-                try:
-                    file_size = os.path.getsize(src_file)
-                    if file_size > max_file_size:
-                        # Exceptions for important files regardless of size
-                        if not (file.endswith('.py') or file.endswith('.txt') or 
-                                file.endswith('.md') or file.endswith('.json') or
-                                file.endswith('.yaml') or file.endswith('.yml') or
-                                file.endswith('.html') or file.endswith('.js') or
-                                file.endswith('.css')):
-                            logger.debug(f"Skipping large file ({file_size / 1024 / 1024:.2f}MB): {src_file}")
-                            continue
-                except Exception:
-                    pass
+                if file_size > _MAX_COPY_FILE_SIZE and not file.endswith(_ALWAYS_COPY_EXTENSIONS):
+                    # Files with important extensions are copied regardless of size
+                    logger.debug(f"Skipping large file ({file_size / 1024 / 1024:.2f}MB): {src_file}")
+                    continue
                 
-                # Copy the file
+                # Hard link the file, copying it if that isn't possible
+                if hardlink:
+                    try:
+                        os.link(src_file, dst_file)
+                        continue
+                    except OSError:
+                        pass
                 try:
-                    shutil.copy2(src_file, dst_file)
-                except (shutil.SameFileError, PermissionError) as e:
+                    _copy_file(src_file, dst_file)
+                except OSError as e:
                     logger.warning(f"Error copying {src_file}: {e}")
     
-    def _calculate_file_hash(self, file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    def _calculate_file_hash(self, file_path: str, stop: Optional[threading.Event] = None) -> Optional[str]:
         """
         Calculate MD5 hash of a file
         
+        Hashes are cached on disk and reused while the file's size and
+        modification time are unchanged.
+        
         Args:
             file_path: Path to the file to hash
-            chunk_size: Size of chunks to read at a time (default: 1MB)
+            stop: Event that abandons the hash when set, checked between chunks
             
         Returns:
-            MD5 hash as a hex string
+            MD5 hash as a hex string, or None if stopped
         """
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        
+        # Reuse the hash from an earlier run if the file hasn't changed since
+        if self.hash_cache is None:
+            try:
+                self.hash_cache = load_json_file(HASH_CACHE_FILE)
+            except Exception:
+                self.hash_cache = {}
+        
+        cached = self.hash_cache.get(file_path)
+        if cached and cached.get("size") == stat.st_size and cached.get("mtime_ns") == stat.st_mtime_ns:
+            return cached["md5"]
+        
         md5 = hashlib.md5()
         
-        with open(file_path, 'rb') as f:
-            while True:
-                data = f.read(chunk_size)
-                if not data:
-                    break
-                md5.update(data)
+        # Hash the memory map in large slices; empty files can't be mapped
+        if stat.st_size:
+            with open(file_path, 'rb') as f:
+                # The file is read front to back once
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    with memoryview(mm) as view:
+                        for offset in range(0, stat.st_size, HASH_CHUNK_SIZE):
+                            if stop is not None and stop.is_set():
+                                return None
+                            md5.update(view[offset:offset + HASH_CHUNK_SIZE])
+        
+        self.hash_cache[file_path] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "md5": md5.hexdigest()
+        }
+        
+        # Write the cache atomically so concurrent runs never see a partial file
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.hash_cache, f)
+            os.replace(temp_path, HASH_CACHE_FILE)
+        except Exception:
+            pass
                 
         return md5.hexdigest()
@@ -14,16 +14,21 @@ Features:
 
 import os
 import sys
+import asyncio
 import json
 import time
+import functools
+import mmap
 import hashlib
+import importlib.util
 import tempfile
-import shutil
+import threading
 import argparse
 import logging
+from contextlib import closing
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Union, Any
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
 
 # Configure logging
 logging.basicConfig(
@@ -33,31 +38,232 @@ logging.basicConfig(
 )
 logger = logging.getLogger("ModelDownloader")
 
-# Attempt to import requests, install if not available
+# httpx keeps connections alive across downloads and speaks HTTP/2 (with the h2 package)
 try:
-    import requests
-    from requests.adapters import HTTPAdapter
-    from urllib3.util.retry import Retry
-    REQUESTS_AVAILABLE = True
+    import httpx
+    HTTPX_AVAILABLE = True
+    HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
 except ImportError:
-    REQUESTS_AVAILABLE = False
-    logger.warning("Requests module not found, attempting installation...")
+    HTTPX_AVAILABLE = False
+    HTTP2_AVAILABLE = False
+
+# Otherwise use requests, installing it if not available
+REQUESTS_AVAILABLE = False
+if not HTTPX_AVAILABLE:
     try:
-        import subprocess
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "requests"])
         import requests
         from requests.adapters import HTTPAdapter
         from urllib3.util.retry import Retry
         REQUESTS_AVAILABLE = True
-        logger.info("Successfully installed requests.")
-    except Exception as e:
-        logger.warning(f"Could not install requests: {e}. Will use urllib instead.")
+    except ImportError:
+        logger.warning("Requests module not found, attempting installation...")
+        try:
+            import subprocess
+            subprocess.check_call([sys.executable, "-m", "pip", "install", "requests"])
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            REQUESTS_AVAILABLE = True
+            logger.info("Successfully installed requests.")
+        except Exception as e:
+            logger.warning(f"Could not install requests: {e}. Will use urllib instead.")
+
+# blake3 verifies large models much faster than MD5; used for models that provide a blake3 hash
+try:
+    from blake3 import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+
+# aiohttp runs many concurrent downloads on one event loop instead of a thread each
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+
+# --parallel values from which downloads use asyncio (when aiohttp is installed)
+ASYNC_DOWNLOAD_MIN_WORKERS = 8
+
+# Bytes read from the network and written to disk at a time
+DOWNLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Seconds between redraws of a download's progress line
+PROGRESS_REDRAW_INTERVAL = 0.1
+
+# Status codes retried with exponential backoff, matching the requests session's Retry policy
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+RETRY_BACKOFF_FACTOR = 0.5
+MAX_STATUS_RETRIES = 5
+
+# Times a failed byte range is resumed from its last written offset
+MAX_SEGMENT_RETRIES = 5
+
+# Files at least this large are fetched with parallel range requests when the server allows it
+RANGED_DOWNLOAD_MIN_SIZE = 64 * 1024 * 1024
+
+# Process umask, read once since setting it is not thread-safe
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_civitai_config(config_path: str) -> Dict[str, Any]:
+    """
+    Load a Civitai config file, parsing each path only once per process
+    
+    Args:
+        config_path: Path to civitai_config.json
+        
+    Returns:
+        Parsed config; treat as read-only since it is shared
+    """
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_all(file, data: bytes) -> None:
+    """
+    Write a chunk to an unbuffered file, retrying short writes
+    
+    Args:
+        file: File opened with buffering=0
+        data: Chunk to write
+    """
+    with memoryview(data) as view:
+        while view:
+            view = view[file.write(view):]
+
+
+def _preallocate(fd: int, size: int) -> None:
+    """
+    Reserve disk space for a download so it is written as few, contiguous extents
+    
+    Args:
+        fd: File descriptor of the download
+        size: Expected size in bytes; nothing is done if unknown (0)
+    """
+    if size <= 0 or not hasattr(os, "posix_fallocate"):
+        return
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except OSError as e:
+        # Not supported by every filesystem; the download works without it
+        logger.debug(f"Could not preallocate {size} bytes: {e}")
+
+
+def _new_hasher(hash_algorithm: str = "md5"):
+    """Create a hash object for the given algorithm ("md5" or "blake3")"""
+    return blake3() if hash_algorithm == "blake3" else hashlib.md5()
+
+
+def compute_file_hash(file_path: str, hash_algorithm: str = "md5") -> str:
+    """
+    Compute the hash of a file
+    
+    Module-level so it can run in a process pool.
+    
+    Args:
+        file_path: Path to the file to hash
+        hash_algorithm: "md5" or "blake3"
+        
+    Returns:
+        Hash as a hex string
+    """
+    if hash_algorithm == "blake3":
+        hasher = blake3()
+        hasher.update_mmap(file_path)
+        return hasher.hexdigest()
+    
+    with open(file_path, "rb") as f:
+        if os.name == "posix" and os.fstat(f.fileno()).st_size:
+            # Hash the whole memory map in one call, without per-chunk bytes objects
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            hash_md5 = hashlib.md5()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                hash_md5.update(mm)
+            return hash_md5.hexdigest()
+        
+        if hasattr(hashlib, "file_digest"):
+            # Python 3.11+: hashes the whole file in C
+            return hashlib.file_digest(f, "md5").hexdigest()
+        
+        hash_md5 = hashlib.md5()
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hash_md5.update(chunk)
+        return hash_md5.hexdigest()
+
+
+class DownloadProgress:
+    """
+    Progress line for one download
+    
+    The line is redrawn at most every PROGRESS_REDRAW_INTERVAL seconds, and
+    only on a terminal; otherwise a single summary is logged at the end.
+    """
+    
+    def __init__(self, display_name: str, total_size: int):
+        """
+        Args:
+            display_name: Name shown in the progress line
+            total_size: Expected size in bytes, or 0 if unknown
+        """
+        self.display_name = display_name
+        self.total_size = total_size
+        self.downloaded = 0
+        self.start_time = time.monotonic()
+        self.next_draw = 0.0
+        self.is_tty = sys.stdout.isatty()
+    
+    def update(self, size: int) -> None:
+        """Count newly downloaded bytes, redrawing the line if it is due"""
+        self.downloaded += size
+        if self.is_tty:
+            now = time.monotonic()
+            if now >= self.next_draw:
+                self.next_draw = now + PROGRESS_REDRAW_INTERVAL
+                self._draw(now)
+    
+    def finish(self) -> None:
+        """Draw the final state of the download"""
+        now = time.monotonic()
+        if self.is_tty:
+            self._draw(now)
+        else:
+            logger.info(f"{self.display_name}: {self.downloaded/1024/1024:.1f}MB downloaded "
+                        f"in {now - self.start_time:.0f}s")
+    
+    def _draw(self, now: float) -> None:
+        """Write the progress line with ETA"""
+        downloaded = self.downloaded
+        total_size = self.total_size
+        elapsed = now - self.start_time
+        rate = downloaded / elapsed if elapsed > 0 else 0
+        eta = (total_size - downloaded) / rate if rate > 0 else 0
+        
+        if total_size > 0:
+            percent = downloaded / total_size * 100
+            bar_len = 40
+            filled_len = int(bar_len * downloaded // total_size)
+            bar = '=' * filled_len + ' ' * (bar_len - filled_len)
+            
+            sys.stdout.write(f"\r{self.display_name}: [{bar}] {percent:.1f}% | "
+                             f"{downloaded/1024/1024:.1f}/{total_size/1024/1024:.1f}MB | "
+                             f"ETA: {eta:.0f}s")
+        else:
+            sys.stdout.write(f"\r{self.display_name}: {downloaded/1024/1024:.1f}MB downloaded")
+        
+        sys.stdout.flush()
 
 
 class ModelDownloader:
     """Handles downloading models with proper error handling and retry logic"""
     
-    def __init__(self, base_dir: str, config_path: Optional[str] = None, max_workers: int = 1):
+    def __init__(self, base_dir: str, config_path: Optional[str] = None, max_workers: int = 1,
+                 segments: int = 4):
         """
         Initialize the model downloader
         
@@ -65,13 +271,21 @@ class ModelDownloader:
             base_dir: Base directory where ComfyUI is installed
             config_path: Path to the config.json file (optional)
             max_workers: Maximum number of concurrent downloads (default: 1)
+            segments: Connections used for each large download (default: 4)
         """
         self.base_dir = os.path.abspath(base_dir)
         self.config_path = config_path
         self.max_workers = max_workers
+        self.segments = max(1, segments)
         self.models_dir = self._ensure_models_directory()
         self.civitai_api_key = self._get_civitai_api_key()
-        self.session = self._create_robust_session() if REQUESTS_AVAILABLE else None
+        self.session = self._create_robust_session() if HTTPX_AVAILABLE or REQUESTS_AVAILABLE else None
+        # Digests of existing files hashed ahead of the downloads, keyed by path
+        self.existing_hashes = {}
+        # Pool that hashes completed downloads during parallel runs, and the
+        # (path, expected hash, digest future, display name) entries awaiting a check
+        self.hash_pool = None
+        self.pending_hashes = []
         
     def _ensure_models_directory(self) -> str:
         """Ensure the models directory structure exists"""
@@ -102,28 +316,38 @@ class ModelDownloader:
             return api_key
         
         # Then try config files
+        script_dir = os.path.dirname(os.path.abspath(__file__))
         config_paths = [
             os.path.join(self.base_dir, "civitai_config.json"),
-            os.path.join(os.path.dirname(os.path.abspath(__file__)), "civitai_config.json"),
-            os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "civitai_config.json")
+            os.path.join(script_dir, "civitai_config.json"),
+            os.path.join(os.path.dirname(script_dir), "civitai_config.json")
         ]
         
         for config_path in config_paths:
             if os.path.exists(config_path):
                 try:
-                    with open(config_path, 'r') as f:
-                        config = json.load(f)
-                        if config.get("api_key"):
-                            logger.info(f"Using Civitai API key from {config_path}")
-                            return config["api_key"]
+                    config = _load_civitai_config(config_path)
+                    if config.get("api_key"):
+                        logger.info(f"Using Civitai API key from {config_path}")
+                        return config["api_key"]
                 except Exception as e:
                     logger.warning(f"Error reading Civitai config file {config_path}: {e}")
         
         logger.warning("No Civitai API key found. Some downloads may fail.")
         return None
     
-    def _create_robust_session(self) -> requests.Session:
-        """Create a requests session with retry logic"""
+    def _create_robust_session(self) -> "Union[httpx.Client, requests.Session]":
+        """Create an httpx client or requests session with retry logic"""
+        if HTTPX_AVAILABLE:
+            # Keep-alive connections are reused across models; the transport retries failed connects
+            limits = httpx.Limits(max_keepalive_connections=32)
+            transport = httpx.HTTPTransport(retries=5, http2=HTTP2_AVAILABLE, limits=limits)
+            return httpx.Client(
+                transport=transport,
+                timeout=httpx.Timeout(60.0, connect=30.0),
+                headers={"User-Agent": "ComfyUI-ModelDownloader/1.0"}
+            )
+        
         session = requests.Session()
         
         # Configure retry strategy
@@ -134,9 +358,13 @@ class ModelDownloader:
             allowed_methods=["GET", "HEAD"]
         )
         
+        # Size the connection pool for every parallel download and range segment
+        pool_size = max(10, self.max_workers * self.segments)
+        
         # Mount the adapter with our retry strategy for all http/https requests
-        session.mount("http://", HTTPAdapter(max_retries=retries))
-        session.mount("https://", HTTPAdapter(max_retries=retries))
+        for prefix in ("http://", "https://"):
+            session.mount(prefix, HTTPAdapter(max_retries=retries, pool_connections=pool_size,
+                                              pool_maxsize=pool_size))
         
         # Add default headers including user agent
         session.headers.update({
@@ -145,6 +373,28 @@ class ModelDownloader:
         
         return session
     
+    def _get_stream(self, url: str, headers: Dict[str, str]):
+        """Start a streaming GET request, following redirects"""
+        if HTTPX_AVAILABLE:
+            # The httpx transport only retries connects, so back off on 429/5xx here like urllib3's Retry
+            for attempt in range(MAX_STATUS_RETRIES + 1):
+                request = self.session.build_request("GET", url, headers=headers)
+                response = self.session.send(request, stream=True, follow_redirects=True)
+                if response.status_code not in RETRY_STATUS_CODES or attempt == MAX_STATUS_RETRIES:
+                    return response
+                response.close()
+                wait_time = RETRY_BACKOFF_FACTOR * (2 ** attempt)
+                logger.warning(f"Received status code {response.status_code}, retrying in {wait_time}s... "
+                               f"({attempt + 1}/{MAX_STATUS_RETRIES})")
+                time.sleep(wait_time)
+        return self.session.get(url, headers=headers, stream=True)
+    
+    def _iter_chunks(self, response, chunk_size: int = DOWNLOAD_CHUNK_SIZE):
+        """Iterate over the body of a streaming response"""
+        if HTTPX_AVAILABLE:
+            return response.iter_bytes(chunk_size)
+        return response.iter_content(chunk_size=chunk_size)
+    
     def _get_headers_for_url(self, url: str) -> Dict[str, str]:
         """Get headers for a specific URL, including API keys if needed"""
         headers = {}
@@ -155,80 +405,235 @@ class ModelDownloader:
             
         return headers
     
-    def download_with_requests(self, url: str, dest_path: str, display_name: str) -> bool:
-        """Download file using requests with progress reporting and retry"""
+    def _make_temp_file(self, dest_path: str) -> str:
+        """Create an empty temporary file in the destination's directory"""
+        fd, temp_file = tempfile.mkstemp(dir=os.path.dirname(dest_path),
+                                         prefix=f".{os.path.basename(dest_path)}.", suffix=".part")
+        os.close(fd)
+        # mkstemp creates the file private; give the model the usual permissions
+        os.chmod(temp_file, 0o666 & ~_UMASK)
+        return temp_file
+    
+    def _remove_temp_file(self, temp_file: Optional[str]) -> None:
+        """Remove a temporary download file if it is still there"""
+        if temp_file and os.path.exists(temp_file):
+            try:
+                os.unlink(temp_file)
+            except OSError as e:
+                logger.warning(f"Could not remove temporary file {temp_file}: {e}")
+    
+    def download_with_requests(self, url: str, dest_path: str, display_name: str,
+                               hash_algorithm: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+        """
+        Download file using httpx or requests with progress reporting and retry
+        
+        Args:
+            url: URL to download
+            dest_path: Final path of the file
+            display_name: Name shown in progress output
+            hash_algorithm: If given, hash the data as it is written
+            
+        Returns:
+            Tuple of (success, hex digest or None); the digest may be a Future
+            when hashing is deferred to self.hash_pool
+        """
         if not self.session:
-            logger.error("Requests session not available")
-            return False
+            logger.error("HTTP session not available")
+            return False, None
         
-        # Create temporary directory for downloading
-        temp_dir = tempfile.mkdtemp()
-        temp_file = os.path.join(temp_dir, os.path.basename(dest_path))
+        temp_file = None
+        response = None
         
         try:
             # Create directory structure if needed
             os.makedirs(os.path.dirname(dest_path), exist_ok=True)
             
+            # Download next to the destination so the final move is a rename
+            temp_file = self._make_temp_file(dest_path)
+            
             # Get headers for this URL
             headers = self._get_headers_for_url(url)
             
+            # Large files from servers that accept ranges are fetched over several connections
+            ranged = self._probe_ranges(url, headers) if self.segments > 1 and hasattr(os, "pwrite") else None
+            if ranged:
+                final_url, total_size = ranged
+                # Don't send the API key on to the storage host a redirect led to
+                range_headers = headers if final_url == url else {}
+                if self._download_ranges(final_url, temp_file, total_size, range_headers, display_name):
+                    os.replace(temp_file, dest_path)
+                    print(f"\nDownload complete: {display_name}")
+                    # Segments arrive out of order, so the file is hashed once it is complete
+                    if hash_algorithm and self.hash_pool is not None:
+                        # Hash on the pool so this thread can start its next download
+                        return True, self.hash_pool.submit(compute_file_hash, dest_path, hash_algorithm)
+                    return True, compute_file_hash(dest_path, hash_algorithm) if hash_algorithm else None
+                
+                logger.warning(f"Ranged download of {display_name} failed, retrying over a single connection")
+            
             # Start download
-            response = self.session.get(url, headers=headers, stream=True)
+            response = self._get_stream(url, headers)
             if response.status_code != 200:
                 logger.error(f"Error: Received status code {response.status_code} from server.")
                 if "civitai.com" in url and response.status_code in [401, 403]:
                     logger.error("This may be due to missing or invalid Civitai API key.")
-                return False
+                return False, None
                 
+            hasher = _new_hasher(hash_algorithm) if hash_algorithm else None
             total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            start_time = time.time()
+            progress = DownloadProgress(display_name, total_size)
             
-            with open(temp_file, 'wb') as file:
-                for data in response.iter_content(chunk_size=1024*1024):  # 1MB chunks
-                    downloaded += len(data)
-                    file.write(data)
-                    
-                    # Display progress with ETA
-                    elapsed = time.time() - start_time
-                    rate = downloaded / elapsed if elapsed > 0 else 0
-                    eta = (total_size - downloaded) / rate if rate > 0 else 0
-                    
-                    if total_size > 0:
-                        percent = downloaded / total_size * 100
-                        bar_len = 40
-                        filled_len = int(bar_len * downloaded // total_size)
-                        bar = '=' * filled_len + ' ' * (bar_len - filled_len)
-                        
-                        sys.stdout.write(f"\r{display_name}: [{bar}] {percent:.1f}% | "
-                                        f"{downloaded/1024/1024:.1f}/{total_size/1024/1024:.1f}MB | "
-                                        f"ETA: {eta:.0f}s")
-                    else:
-                        sys.stdout.write(f"\r{display_name}: {downloaded/1024/1024:.1f}MB downloaded")
-                    
-                    sys.stdout.flush()
+            # Unbuffered: the chunks are already large, so each is a single write()
+            with open(temp_file, 'wb', buffering=0) as file:
+                _preallocate(file.fileno(), total_size)
+                for data in self._iter_chunks(response):
+                    _write_all(file, data)
+                    if hasher:
+                        hasher.update(data)
+                    progress.update(len(data))
+                
+                # Drop any preallocated space the server didn't fill
+                file.truncate()
+            progress.finish()
             
             # Move from temp to final destination
-            shutil.move(temp_file, dest_path)
+            os.replace(temp_file, dest_path)
             print(f"\nDownload complete: {display_name}")
-            return True
+            return True, hasher.hexdigest() if hasher else None
             
         except Exception as e:
             logger.error(f"Error downloading {display_name}: {e}")
-            return False
+            return False, None
+            
+        finally:
+            if response is not None:
+                response.close()
+            # Clean up a partial download
+            self._remove_temp_file(temp_file)
+    
+    def _probe_ranges(self, url: str, headers: Dict[str, str]) -> Optional[Tuple[str, int]]:
+        """
+        Check whether a download can be split into range requests
+        
+        Args:
+            url: URL to download
+            headers: Headers for the URL
+            
+        Returns:
+            Tuple of (URL after redirects, content length), or None if the
+            file is small or the server doesn't support ranges
+        """
+        try:
+            if HTTPX_AVAILABLE:
+                response = self.session.head(url, headers=headers, follow_redirects=True)
+            else:
+                response = self.session.head(url, headers=headers, allow_redirects=True)
+            response.close()
+        except Exception as e:
+            logger.debug(f"HEAD request failed for {url}: {e}")
+            return None
+        
+        if response.status_code != 200 or response.headers.get("accept-ranges", "").lower() != "bytes":
+            return None
+        
+        total_size = int(response.headers.get("content-length", 0))
+        if total_size < RANGED_DOWNLOAD_MIN_SIZE:
+            return None
+        
+        return str(response.url), total_size
+    
+    def _download_ranges(self, url: str, temp_file: str, total_size: int, headers: Dict[str, str],
+                         display_name: str) -> bool:
+        """
+        Download a file as parallel byte ranges written in place with pwrite
+        
+        A range that fails is resumed from its last written offset, with
+        exponential backoff, before the download is given up.
+        
+        Args:
+            url: URL to download
+            temp_file: File to write into
+            total_size: Size of the file in bytes
+            headers: Headers for the URL
+            display_name: Name shown in progress output
             
+        Returns:
+            True if every range was downloaded
+        """
+        segment_size = -(-total_size // self.segments)
+        ranges = [(start, min(start + segment_size, total_size) - 1)
+                  for start in range(0, total_size, segment_size)]
+        
+        lock = threading.Lock()
+        failed = threading.Event()
+        progress = DownloadProgress(display_name, total_size)
+        
+        def fetch(first: int, last: int) -> None:
+            # Next byte to write, kept across attempts so a retry resumes where the last one stopped
+            position = [first]
+            for attempt in range(MAX_SEGMENT_RETRIES + 1):
+                try:
+                    fetch_from(position, last)
+                    if position[0] != last + 1:
+                        raise IOError(f"Connection closed after {position[0] - first} of {last - first + 1} bytes")
+                    return
+                except Exception as e:
+                    # Stop early once another range has failed
+                    if failed.is_set() or attempt == MAX_SEGMENT_RETRIES:
+                        raise
+                    wait_time = RETRY_BACKOFF_FACTOR * (2 ** attempt)
+                    logger.warning(f"Range {first}-{last} of {display_name} failed at byte {position[0]}, "
+                                   f"resuming in {wait_time}s... ({attempt + 1}/{MAX_SEGMENT_RETRIES}): {e}")
+                    time.sleep(wait_time)
+        
+        def fetch_from(position: List[int], last: int) -> None:
+            range_headers = dict(headers)
+            range_headers["Range"] = f"bytes={position[0]}-{last}"
+            with closing(self._get_stream(url, range_headers)) as response:
+                if response.status_code != 206:
+                    raise IOError(f"Range request returned status code {response.status_code}")
+                
+                for data in self._iter_chunks(response):
+                    # Stop early once another range has failed
+                    if failed.is_set():
+                        return
+                    with memoryview(data) as view:
+                        while view:
+                            written = os.pwrite(fd, view, position[0])
+                            position[0] += written
+                            view = view[written:]
+                    
+                    with lock:
+                        progress.update(len(data))
+        
+        fd = os.open(temp_file, os.O_WRONLY)
+        try:
+            _preallocate(fd, total_size)
+            # Size the file even where preallocation isn't supported
+            os.ftruncate(fd, total_size)
+            with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+                futures = [executor.submit(fetch, first, last) for first, last in ranges]
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception:
+                        failed.set()
+                        raise
+            progress.finish()
+            return True
+        except Exception as e:
+            logger.error(f"Error downloading {display_name}: {e}")
+            return False
         finally:
-            # Clean up temp dir
-            shutil.rmtree(temp_dir, ignore_errors=True)
+            os.close(fd)
     
-    def download_with_urllib(self, url: str, dest_path: str, display_name: str) -> bool:
-        """Fallback download method using urllib"""
+    def download_with_urllib(self, url: str, dest_path: str, display_name: str,
+                             hash_algorithm: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+        """Fallback download method using urllib; returns (success, hex digest or None)"""
         from urllib.request import urlopen, Request
         import ssl
         
-        # Create a temporary file for downloading
-        temp_dir = tempfile.mkdtemp()
-        temp_file = os.path.join(temp_dir, os.path.basename(dest_path))
+        temp_file = None
         
         # Create context to avoid SSL issues
         ctx = ssl.create_default_context()
@@ -244,6 +649,9 @@ class ModelDownloader:
             # Create directory structure if needed
             os.makedirs(os.path.dirname(dest_path), exist_ok=True)
             
+            # Download next to the destination so the final move is a rename
+            temp_file = self._make_temp_file(dest_path)
+            
             # Start download with retry logic
             retry_count = 0
             max_retries = 5
@@ -253,35 +661,24 @@ class ModelDownloader:
                     # Start download
                     with urlopen(request, context=ctx) as response:
                         total = int(response.info().get('Content-Length', 0))
-                        downloaded = 0
-                        start_time = time.time()
+                        progress = DownloadProgress(display_name, total)
+                        # Restart the hash along with the file on every attempt
+                        hasher = _new_hasher(hash_algorithm) if hash_algorithm else None
                         
-                        with open(temp_file, 'wb') as f:
+                        with open(temp_file, 'wb', buffering=0) as f:
+                            _preallocate(f.fileno(), total)
                             while True:
-                                chunk = response.read(1024*1024)  # 1MB chunks
+                                chunk = response.read(DOWNLOAD_CHUNK_SIZE)
                                 if not chunk:
                                     break
-                                downloaded += len(chunk)
-                                f.write(chunk)
-                                
-                                # Display progress with ETA
-                                elapsed = time.time() - start_time
-                                rate = downloaded / elapsed if elapsed > 0 else 0
-                                eta = (total - downloaded) / rate if rate > 0 else 0
-                                
-                                if total > 0:
-                                    percent = downloaded / total * 100
-                                    bar_len = 40
-                                    filled_len = int(bar_len * downloaded // total)
-                                    bar = '=' * filled_len + ' ' * (bar_len - filled_len)
-                                    
-                                    sys.stdout.write(f"\r{display_name}: [{bar}] {percent:.1f}% | "
-                                                    f"{downloaded/1024/1024:.1f}/{total/1024/1024:.1f}MB | "
-                                                    f"ETA: {eta:.0f}s")
-                                else:
-                                    sys.stdout.write(f"\r{display_name}: {downloaded/1024/1024:.1f}MB downloaded")
-                                
-                                sys.stdout.flush()
+                                _write_all(f, chunk)
+                                if hasher:
+                                    hasher.update(chunk)
+                                progress.update(len(chunk))
+                            
+                            # Drop any preallocated space the server didn't fill
+                            f.truncate()
+                        progress.finish()
                     
                     # If we get here, download completed successfully
                     break
@@ -295,30 +692,28 @@ class ModelDownloader:
                         time.sleep(wait_time)
                     else:
                         logger.error(f"Maximum retries reached. Download failed.")
-                        return False
+                        return False, None
             
             # Move from temp to final destination
-            shutil.move(temp_file, dest_path)
+            os.replace(temp_file, dest_path)
             print(f"\nDownload complete: {display_name}")
-            return True
+            return True, hasher.hexdigest() if hasher else None
             
         except Exception as e:
             logger.error(f"Error downloading {display_name}: {e}")
-            return False
+            return False, None
             
         finally:
-            # Clean up temp dir
-            shutil.rmtree(temp_dir, ignore_errors=True)
+            # Clean up a partial download
+            self._remove_temp_file(temp_file)
     
-    def verify_hash(self, file_path: str, expected_hash: str) -> bool:
-        """Verify the MD5 hash of a file"""
+    def verify_hash(self, file_path: str, expected_hash: str, hash_algorithm: str = "md5") -> bool:
+        """Verify the MD5 (or blake3) hash of a file"""
         logger.info(f"Verifying file integrity for {os.path.basename(file_path)}...")
-        hash_md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        actual_hash = hash_md5.hexdigest()
-        
+        return self._check_hash(expected_hash, compute_file_hash(file_path, hash_algorithm))
+    
+    def _check_hash(self, expected_hash: str, actual_hash: str) -> bool:
+        """Compare a computed hash against the expected one"""
         if actual_hash.lower() == expected_hash.lower():
             logger.info("Hash verification successful")
             return True
@@ -326,60 +721,136 @@ class ModelDownloader:
             logger.warning(f"Hash verification failed! Expected {expected_hash}, got {actual_hash}")
             return False
     
-    def download_model(self, url: str, dest_path: str, display_name: str, expected_hash: Optional[str] = None) -> bool:
+    def _existing_file_ok(self, dest_path: str, display_name: str, expected_hash: Optional[str],
+                          hash_algorithm: str) -> bool:
+        """Check whether a model is already downloaded (with the expected hash, if given)"""
+        if not os.path.exists(dest_path):
+            return False
+        
+        # If hash is provided, verify existing file
+        if expected_hash:
+            # Existing files may already have been hashed up front
+            actual_hash = self.existing_hashes.pop(dest_path, None)
+            if actual_hash is not None:
+                verified = self._check_hash(expected_hash, actual_hash)
+            else:
+                verified = self.verify_hash(dest_path, expected_hash, hash_algorithm)
+            if verified:
+                logger.info(f"File already exists with correct hash: {display_name}. Skipping download.")
+                return True
+            else:
+                logger.warning(f"Hash mismatch for existing file. Re-downloading {display_name}...")
+                return False
+        
+        size_mb = os.path.getsize(dest_path) / (1024 * 1024)
+        logger.info(f"File already exists ({size_mb:.2f}MB): {display_name}. Skipping download.")
+        return True
+    
+    def download_model(self, url: str, dest_path: str, display_name: str, expected_hash: Optional[str] = None,
+                       hash_algorithm: str = "md5") -> bool:
         """Download a model using the best available method"""
         # Create any necessary directories
         os.makedirs(os.path.dirname(dest_path), exist_ok=True)
         
         # Check if file already exists and has correct hash
-        if os.path.exists(dest_path):
-            # If hash is provided, verify existing file
-            if expected_hash:
-                if self.verify_hash(dest_path, expected_hash):
-                    logger.info(f"File already exists with correct hash: {display_name}. Skipping download.")
-                    return True
-                else:
-                    logger.warning(f"Hash mismatch for existing file. Re-downloading {display_name}...")
-            else:
-                size_mb = os.path.getsize(dest_path) / (1024 * 1024)
-                logger.info(f"File already exists ({size_mb:.2f}MB): {display_name}. Skipping download.")
-                return True
+        if self._existing_file_ok(dest_path, display_name, expected_hash, hash_algorithm):
+            return True
         
-        # Choose download method
-        if REQUESTS_AVAILABLE and self.session:
-            success = self.download_with_requests(url, dest_path, display_name)
+        # Choose download method; the data is hashed as it arrives when a hash is expected
+        stream_algorithm = hash_algorithm if expected_hash else None
+        if self.session:
+            success, actual_hash = self.download_with_requests(url, dest_path, display_name, stream_algorithm)
         else:
-            success = self.download_with_urllib(url, dest_path, display_name)
+            success, actual_hash = self.download_with_urllib(url, dest_path, display_name, stream_algorithm)
         
-        # Verify hash if provided and download succeeded
-        if success and expected_hash and not self.verify_hash(dest_path, expected_hash):
+        # Verify hash if provided and download succeeded; a deferred hash is checked later
+        if success and expected_hash and isinstance(actual_hash, Future):
+            self.pending_hashes.append((dest_path, expected_hash, actual_hash, display_name))
+        elif success and expected_hash and not self._check_hash(expected_hash, actual_hash):
             logger.warning(f"Hash verification failed for {display_name}. The download may be corrupted.")
             return False
         
         return success
     
+    def _model_dest_path(self, model: Dict[str, Any]) -> str:
+        """Determine where a model from the config is saved"""
+        path_component = model.get("path", "")
+        dest_dir = os.path.join(self.models_dir, model["type"])
+        if path_component:
+            path_dir = os.path.dirname(path_component)
+            if path_dir:
+                dest_dir = os.path.join(dest_dir, path_dir)
+        
+        return os.path.join(dest_dir, os.path.basename(path_component) if path_component else model["name"])
+    
+    def _check_pending_hashes(self) -> set:
+        """
+        Check the downloads whose hashes were computed on the hash pool
+        
+        Returns:
+            Set of destination paths that failed verification
+        """
+        failed_paths = set()
+        for dest_path, expected_hash, future, display_name in self.pending_hashes:
+            try:
+                verified = self._check_hash(expected_hash, future.result())
+            except Exception as e:
+                logger.error(f"Error verifying {display_name}: {e}")
+                verified = False
+            if not verified:
+                logger.warning(f"Hash verification failed for {display_name}. The download may be corrupted.")
+                failed_paths.add(dest_path)
+        
+        self.pending_hashes = []
+        return failed_paths
+    
+    def _model_expected_hash(self, model: Dict[str, Any]) -> Tuple[Optional[str], str]:
+        """Get the expected hash of a model and its algorithm"""
+        # Prefer the faster blake3 hash when the package provides one
+        if model.get("blake3") and BLAKE3_AVAILABLE:
+            return model["blake3"], "blake3"
+        return model.get("hash"), "md5"
+    
+    def _hash_existing_files(self, models: List[Dict[str, Any]]) -> None:
+        """
+        Hash already-downloaded models in parallel processes
+        
+        The digests are stored in self.existing_hashes so download_model can
+        decide whether to skip a file without hashing it again.
+        """
+        jobs = []
+        for model in models:
+            try:
+                expected_hash, hash_algorithm = self._model_expected_hash(model)
+                dest_path = self._model_dest_path(model)
+            except KeyError:
+                continue
+            if expected_hash and os.path.exists(dest_path):
+                jobs.append((dest_path, hash_algorithm))
+        
+        if len(jobs) < 2:
+            return
+        
+        logger.info(f"Verifying file integrity for {len(jobs)} existing files...")
+        try:
+            with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as executor:
+                paths, algorithms = zip(*jobs)
+                self.existing_hashes = dict(zip(paths, executor.map(compute_file_hash, paths, algorithms)))
+        except Exception as e:
+            # download_model falls back to hashing each file itself
+            logger.warning(f"Error verifying existing files: {e}")
+    
     def process_model(self, model: Dict[str, Any], index: int, total: int) -> bool:
         """Process a single model download"""
         try:
             name = model["name"]
-            model_type = model["type"]
             url = model["url"]
-            expected_hash = model.get("hash")
-            path_component = model.get("path", "")
+            expected_hash, hash_algorithm = self._model_expected_hash(model)
             
             logger.info(f"[{index}/{total}] Processing {name}")
             
-            # Determine destination path
-            dest_dir = os.path.join(self.models_dir, model_type)
-            if path_component:
-                path_dir = os.path.dirname(path_component)
-                if path_dir:
-                    dest_dir = os.path.join(dest_dir, path_dir)
-            
-            dest_path = os.path.join(dest_dir, os.path.basename(path_component) if path_component else name)
-            
             # Download the model
-            return self.download_model(url, dest_path, name, expected_hash)
+            return self.download_model(url, self._model_dest_path(model), name, expected_hash, hash_algorithm)
             
         except KeyError as e:
             logger.error(f"Error: Missing required field in model definition: {e}")
@@ -388,6 +859,110 @@ class ModelDownloader:
             logger.error(f"Error processing model {index}: {e}")
             return False
     
+    @staticmethod
+    def _write_and_hash(file, data: bytes, hasher) -> None:
+        """Write a downloaded chunk and feed it to the hasher, run off the event loop"""
+        _write_all(file, data)
+        if hasher:
+            hasher.update(data)
+    
+    async def _download_models_async(self, models: List[Dict[str, Any]]) -> List[bool]:
+        """
+        Download models concurrently with aiohttp
+        
+        Args:
+            models: Model definitions from the config
+            
+        Returns:
+            List of per-model results
+        """
+        connector = aiohttp.TCPConnector(limit=self.max_workers)
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers={"User-Agent": "ComfyUI-ModelDownloader/1.0"}) as session:
+            return list(await asyncio.gather(*(
+                self._process_model_async(session, model, i, len(models))
+                for i, model in enumerate(models, 1)
+            )))
+    
+    async def _process_model_async(self, session: "aiohttp.ClientSession", model: Dict[str, Any],
+                                   index: int, total: int) -> bool:
+        """Process a single model download on the event loop"""
+        try:
+            name = model["name"]
+            url = model["url"]
+            expected_hash, hash_algorithm = self._model_expected_hash(model)
+            dest_path = self._model_dest_path(model)
+        except KeyError as e:
+            logger.error(f"Error: Missing required field in model definition: {e}")
+            return False
+        
+        logger.info(f"[{index}/{total}] Processing {name}")
+        
+        loop = asyncio.get_running_loop()
+        # Hashing an existing file would block the event loop
+        if await loop.run_in_executor(None, self._existing_file_ok, dest_path, name, expected_hash, hash_algorithm):
+            return True
+        
+        temp_file = None
+        try:
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            temp_file = self._make_temp_file(dest_path)
+            headers = self._get_headers_for_url(url)
+            
+            # Retry with exponential backoff, restarting the file and hash each attempt
+            max_retries = 5
+            for attempt in range(1, max_retries + 1):
+                hasher = _new_hasher(hash_algorithm) if expected_hash else None
+                try:
+                    async with session.get(url, headers=headers) as response:
+                        if response.status in RETRY_STATUS_CODES and attempt < max_retries:
+                            wait_time = RETRY_BACKOFF_FACTOR * (2 ** (attempt - 1))
+                            logger.warning(f"Received status code {response.status} for {name}, retrying in "
+                                           f"{wait_time}s... ({attempt}/{max_retries})")
+                            # Hand the connection back to the pool before waiting
+                            response.release()
+                            await asyncio.sleep(wait_time)
+                            continue
+                        if response.status != 200:
+                            logger.error(f"Error: Received status code {response.status} from server.")
+                            if "civitai.com" in url and response.status in [401, 403]:
+                                logger.error("This may be due to missing or invalid Civitai API key.")
+                            return False
+                        
+                        with open(temp_file, 'wb', buffering=0) as file:
+                            await loop.run_in_executor(None, _preallocate, file.fileno(),
+                                                       response.content_length or 0)
+                            async for data in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                                # Disk writes and hashing would otherwise stall every other download
+                                await loop.run_in_executor(None, self._write_and_hash, file, data, hasher)
+                            file.truncate()
+                    break
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if attempt == max_retries:
+                        logger.error(f"Maximum retries reached. Download failed.")
+                        return False
+                    wait_time = 2 ** attempt
+                    logger.warning(f"Download of {name} failed, retrying in {wait_time}s... ({attempt}/{max_retries})")
+                    logger.warning(f"Error: {str(e)}")
+                    await asyncio.sleep(wait_time)
+            
+            os.replace(temp_file, dest_path)
+            logger.info(f"Download complete: {name}")
+            
+        except Exception as e:
+            logger.error(f"Error downloading {name}: {e}")
+            return False
+            
+        finally:
+            self._remove_temp_file(temp_file)
+        
+        if expected_hash and not self._check_hash(expected_hash, hasher.hexdigest()):
+            logger.warning(f"Hash verification failed for {name}. The download may be corrupted.")
+            return False
+        
+        return True
+    
     def download_models_from_config(self) -> bool:
         """Process model downloads from a config file"""
         if not self.config_path:
@@ -396,7 +971,7 @@ class ModelDownloader:
         
         # Load config
         try:
-            with open(self.config_path, 'r') as f:
+            with open(self.config_path, 'r', encoding='utf-8') as f:
                 config = json.load(f)
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse config file: {e}")
@@ -418,14 +993,29 @@ class ModelDownloader:
         
         # Process models in parallel if requested
         if self.max_workers > 1:
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                futures = []
-                for i, model in enumerate(models, 1):
-                    futures.append(executor.submit(self.process_model, model, i, len(models)))
+            # Hashing is CPU-bound, so files already on disk are checked across processes first
+            self._hash_existing_files(models)
+            if AIOHTTP_AVAILABLE and self.max_workers >= ASYNC_DOWNLOAD_MIN_WORKERS:
+                # Many concurrent downloads are cheaper as tasks on one event loop than as threads
+                results = asyncio.run(self._download_models_async(models))
+            else:
+                # hashlib and blake3 release the GIL on large buffers, so hashing threads run in parallel
+                with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as self.hash_pool:
+                    with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                        futures = []
+                        for i, model in enumerate(models, 1):
+                            futures.append(executor.submit(self.process_model, model, i, len(models)))
+                        
+                        # Collect results
+                        for future in futures:
+                            results.append(future.result())
+                    
+                    failed_paths = self._check_pending_hashes()
+                self.hash_pool = None
                 
-                # Collect results
-                for future in futures:
-                    results.append(future.result())
+                if failed_paths:
+                    results = [result and self._model_dest_path(model) not in failed_paths
+                               for model, result in zip(models, results)]
         else:
             # Process sequentially
             for i, model in enumerate(models, 1):
@@ -451,6 +1041,7 @@ def main():
                         default=os.environ.get("COMFYUI_DIR", os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
     parser.add_argument("--config", help="Path to config.json file", default=None)
     parser.add_argument("--parallel", type=int, help="Number of parallel downloads (default: 1)", default=1)
+    parser.add_argument("--segments", type=int, help="Connections per large download (default: 4)", default=4)
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
     parser.add_argument("--quiet", "-q", action="store_true", help="Minimize output")
     args = parser.parse_args()
@@ -491,7 +1082,8 @@ def main():
     downloader = ModelDownloader(
         base_dir=comfyui_dir,
         config_path=config_path,
-        max_workers=args.parallel
+        max_workers=args.parallel,
+        segments=args.segments
     )
     
     # Start downloads
@@ -4,119 +4,787 @@ Simplified ComfyUI Workflow Parser
 Extracts model references from ComfyUI workflow files without trying to resolve paths.
 """
 
+import bisect
+import copy
+import functools
+import hashlib
 import json
+import mmap
 import os
 import re
-from typing import Dict, List, Set, Any
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Set, Tuple, Any, Optional
+
+# orjson parses workflow files considerably faster than the stdlib; fall back if missing
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# ijson lets large workflows be streamed node by node instead of loaded whole
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# Below this size a full parse is cheaper than streaming
+STREAMING_THRESHOLD = 1024 * 1024
+
+# Only these node fields are needed to find custom nodes and model references
+_NODE_FIELDS = ('type', 'properties', 'widgets_values')
+
+# Where the node array lives in known workflow formats: the standard ComfyUI
+# format and the nested format sometimes used
+_NODE_PATHS = (('nodes',), ('workflow', 'nodes'))
+
+# Node properties that may name the custom node package a node belongs to
+_NODE_ID_KEYS = ('cnr_id', 'aux_id', 'Node name for S&R', 'custom_node_id', 'node_id')
+
+# Widget values with one of these file extensions are treated as model references
+_MODEL_EXTENSIONS = frozenset(('safetensors', 'ckpt', 'pt', 'pth', 'bin', 'onnx', 'msgpack'))
+
+# Last characters of those extensions in either case, for a cheap first rejection
+_MODEL_EXTENSION_TAILS = frozenset(ext[-1] for ext in _MODEL_EXTENSIONS) | frozenset(ext[-1].upper() for ext in _MODEL_EXTENSIONS)
+
+# Various patterns for node IDs in Python code
+_NODE_ID_PATTERNS = (
+    r'NODE_CLASS_MAPPINGS\s*\[\s*[\'"]([^\'"]+)[\'"]\s*\]',
+    r'cnr_id["\s\']+:\s*["\']([^"\']+)["\']',
+    r'aux_id["\s\']+:\s*["\']([^"\']+)["\']',
+    r'id_mapping\s*=\s*[\'"]([\w\d_\-\/]+)[\'"]',
+    r'ID\s*=\s*[\'"]([\w\d_\-\/]+)[\'"]',
+    r'class\s+([\w\d_]+)\s*\([\w\d_\.]+Node\s*\)',
+    r'@inertia\.aat\(\s*[\'"]([\w\d_\-\/]+)[\'"]',
+    r'register_node\s*\(\s*[\'"]([\w\d_\-\/]+)[\'"]',
+)
+
+# All of the above as one alternation, compiled once; it runs on the raw
+# bytes of a file so only the matched IDs need decoding
+_NODE_ID_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in _NODE_ID_PATTERNS).encode())
+
+# A literal every ID pattern requires; files containing none of them can't
+# match, so they skip the regex
+_NODE_ID_LITERALS = (
+    b'NODE_CLASS_MAPPINGS', b'cnr_id', b'aux_id', b'id_mapping', b'ID',
+    b'class', b'@inertia.aat', b'register_node',
+)
+
+
+# Python files at least this large are memory-mapped for scanning instead of read
+MMAP_SCAN_THRESHOLD = 1024 * 1024
+
+
+def _match_node_ids(content) -> List[str]:
+    """
+    Find the node IDs declared in Python source
+    
+    Args:
+        content: Raw source, as bytes or a memory map
+        
+    Returns:
+        Matched IDs in file order
+    """
+    if not any(content.find(literal) != -1 for literal in _NODE_ID_LITERALS):
+        return []
+    
+    # One pass over the file finds matches of every ID pattern;
+    # each alternative has a single group, so lastindex picks the ID
+    return [m.group(m.lastindex).decode('utf-8', 'ignore') for m in _NODE_ID_RE.finditer(content)]
+
+
+def _scan_file_node_ids(file_path: str, max_bytes: Optional[int] = None) -> List[str]:
+    """
+    Find the node IDs declared in a Python file
+    
+    Large files are memory-mapped so they are scanned in the page cache
+    without being copied.
+    
+    Args:
+        file_path: Path to the Python file
+        max_bytes: Only scan this many bytes from the start of the file
+        
+    Returns:
+        Matched IDs in file order
+    """
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if max_bytes is not None:
+            size = min(size, max_bytes)
+        if size < MMAP_SCAN_THRESHOLD:
+            return _match_node_ids(f.read(size))
+        with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+            return _match_node_ids(mm)
+
+# Prefixes and suffixes commonly added to package folder names in node IDs
+_PACKAGE_PREFIXES = ("", "comfyui-", "comfyui_", "sd-", "sd_")
+_PACKAGE_SUFFIXES = ("", "-nodes", "_nodes", "-comfyui", "_comfyui")
+
+# Package metadata files that may name the package
+_METADATA_FILES = ("node_info.json", "manifest.json", "config.json", "package.json")
+
+# Modules of a subpackage that register its nodes
+_ENTRY_MODULES = ("__init__.py", "nodes.py")
+
+# Directories that never declare node IDs (hidden directories are skipped as well)
+_SKIP_SCAN_DIRS = frozenset({'__pycache__', 'node_modules', 'venv', 'tests', 'test'})
+
+# Basic node types likely to be part of core ComfyUI
+_CORE_NODE_TYPES = frozenset(('note', 'reroute', 'primitive', 'output', 'input'))
+
+
+@functools.lru_cache(maxsize=1024)
+def _node_type_candidates(node_type: str) -> Tuple[str, ...]:
+    """
+    Get the custom node IDs a node type may belong to, most specific first
+    
+    Results are cached since the same node types recur across workflows.
+    
+    Args:
+        node_type: Lowercase node type
+        
+    Returns:
+        The node type itself, then package-style variations of it
+    """
+    candidates = [node_type]
+    
+    # Some common patterns for node types
+    parts = node_type.split('_')
+    if len(parts) > 1:
+        # Try prefix as potential package name
+        candidates.append(parts[0])
+        candidates.append(f"{parts[0]}/{node_type}")
+        
+        # If 3+ parts, try first two as package
+        if len(parts) >= 3:
+            prefix = f"{parts[0]}_{parts[1]}"
+            candidates.append(prefix)
+            candidates.append(f"{prefix}/{node_type}")
+    
+    return tuple(candidates)
+
+
+def _package_name_candidates(node_id: str) -> Iterator[str]:
+    """
+    Yield the package folder names a node ID may be a naming variation of
+    
+    Variations are the folder name with one of the common prefixes and/or
+    suffixes, optionally in GitHub "unknown/..." form; they are undone here
+    instead of being generated for every package.
+    
+    Args:
+        node_id: Lowercase custom node ID
+        
+    Yields:
+        Candidate lowercase folder names
+    """
+    if node_id.startswith("unknown/"):
+        node_id = node_id[len("unknown/"):]
+    
+    for prefix in _PACKAGE_PREFIXES:
+        if not node_id.startswith(prefix):
+            continue
+        rest = node_id[len(prefix):]
+        for suffix in _PACKAGE_SUFFIXES:
+            if rest.endswith(suffix) and len(rest) > len(suffix):
+                yield rest[:len(rest) - len(suffix)]
+
+
+def _has_model_extension(value: str) -> bool:
+    """
+    Check whether a widget value names a model file
+    
+    Args:
+        value: Widget value
+        
+    Returns:
+        True if the value's file extension is one of _MODEL_EXTENSIONS
+    """
+    # Most widget values are rejected by their last character alone
+    if value[-1:] not in _MODEL_EXTENSION_TAILS:
+        return False
+    dot = value.rfind('.')
+    return dot >= 0 and value[dot + 1:].lower() in _MODEL_EXTENSIONS
+
+
+def load_json_file(path: str) -> Any:
+    """
+    Load a JSON file, using orjson when available
+    
+    Args:
+        path: Path to the JSON file
+        
+    Returns:
+        The decoded JSON document
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+        
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson is stricter than json (e.g. NaN values), so retry with the stdlib parser
+            pass
+            
+    return json.loads(data)
+
+
+def _is_node_list(value: Any) -> bool:
+    """Check whether a JSON value looks like an array of workflow nodes"""
+    return isinstance(value, list) and len(value) > 0 and isinstance(value[0], dict) and 'type' in value[0]
+
+
+def find_workflow_nodes(workflow: Any) -> Optional[List[Any]]:
+    """
+    Find the array of nodes in a decoded workflow of any supported format
+    
+    Args:
+        workflow: The decoded workflow JSON
+        
+    Returns:
+        The workflow's nodes, or None if no node array was found
+    """
+    if isinstance(workflow, list):
+        # Some workflows might just be an array of nodes
+        if len(workflow) > 0 and isinstance(workflow[0], dict):
+            return workflow
+        return None
+    
+    if not isinstance(workflow, dict):
+        return None
+    
+    for path in _NODE_PATHS:
+        value = workflow
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            return value
+    
+    # Try to find an array of nodes at any top level key, in document order
+    # so the result depends only on the workflow itself
+    for value in workflow.values():
+        if _is_node_list(value):
+            return value
+    
+    return None
+
+
+def stream_workflow_nodes(path: str) -> Optional[List[Any]]:
+    """
+    Stream the nodes of a standard or nested-format workflow file, keeping
+    only the fields the parser looks at (embedded previews and links are dropped)
+    
+    Args:
+        path: Path to the workflow JSON file
+        
+    Returns:
+        List of trimmed nodes, or None if the file has no node array at a known path
+    """
+    for node_path in _NODE_PATHS:
+        nodes = []
+        with open(path, 'rb') as f:
+            for node in ijson.items(f, '.'.join(node_path) + '.item', use_float=True):
+                if isinstance(node, dict):
+                    node = {key: node[key] for key in _NODE_FIELDS if key in node}
+                nodes.append(node)
+                
+        if nodes:
+            return nodes
+            
+    return None
+
+
+# Parse results kept per parser
+RESULT_CACHE_SIZE = 32
+
+# Threads used to scan custom node packages
+SCAN_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Directory for on-disk caches shared between runs
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "comfyui_packager"
+)
+
 
 class WorkflowParser:
     """Parses ComfyUI workflows to extract model references and custom node dependencies"""
     
-    def __init__(self, comfyui_path: str):
+    def __init__(self, comfyui_path: str, use_cache: bool = True):
         """
         Initialize the workflow parser with the ComfyUI installation directory
         
         Args:
             comfyui_path: Path to the ComfyUI installation
+            use_cache: Whether to reuse the on-disk custom node inventory between runs;
+                if False, custom_nodes is rescanned and the cache refreshed
         """
         self.comfyui_path = os.path.abspath(comfyui_path)
+        self.use_cache = use_cache
         self.custom_node_packages = self._get_custom_node_packages()
+        # Package names for each package path, reported with resolved custom nodes
+        self._basename_cache = {path: os.path.basename(path) for path in dict.fromkeys(self.custom_node_packages.values())}
+        # Lowercase package folder names to paths, for node IDs that are naming variations of them
+        self._package_names = {package_name.lower(): path for path, package_name in self._basename_cache.items()}
+        # Lookup tables for partial matches of node IDs, built on first use
+        self._match_index = None
+        # Parse results by workflow path, each stored as (mtime_ns, size, result)
+        self._result_cache = OrderedDict()
         
     def _get_custom_node_packages(self) -> Dict[str, str]:
         """
         Get mapping of custom node identifiers to their installation paths
         
+        The mapping is cached on disk and reused as long as the modification
+        times and sizes of the files the scan reads are unchanged.
+        
         Returns:
             Dictionary mapping custom node IDs to their paths
         """
         custom_nodes_dir = os.path.join(self.comfyui_path, "custom_nodes")
-        custom_node_packages = {}
         
         if not os.path.exists(custom_nodes_dir):
-            return custom_node_packages
+            return {}
         
-        for node_package in os.listdir(custom_nodes_dir):
-            package_path = os.path.join(custom_nodes_dir, node_package)
-            if not os.path.isdir(package_path):
+        snapshot = self._get_inventory_snapshot(custom_nodes_dir)
+        cache_file = os.path.join(
+            CACHE_DIR,
+            f"inventory_{hashlib.sha1(self.comfyui_path.encode('utf-8')).hexdigest()[:16]}.json"
+        )
+        
+        # Reuse the cached inventory if nothing has changed since it was written;
+        # without use_cache the inventory is rescanned and the cache refreshed
+        if self.use_cache:
+            try:
+                cached = load_json_file(cache_file)
+                if cached.get("comfyui_path") == self.comfyui_path and cached.get("snapshot") == snapshot:
+                    return cached["packages"]
+            except Exception:
+                pass
+        
+        custom_node_packages = self._scan_custom_node_packages(custom_nodes_dir)
+        
+        # Write the cache atomically so concurrent runs never see a partial file
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "comfyui_path": self.comfyui_path,
+                    "snapshot": snapshot,
+                    "packages": custom_node_packages
+                }, f)
+            os.replace(temp_path, cache_file)
+        except Exception:
+            pass
+        
+        return custom_node_packages
+    
+    def _get_inventory_snapshot(self, custom_nodes_dir: str) -> Dict[str, Any]:
+        """
+        Get the state of every file the package scan reads
+        
+        Editing a file in place doesn't change its directory's mtime, so each
+        scanned file is recorded individually; the directory mtimes catch
+        packages and files being added or removed.
+        
+        Args:
+            custom_nodes_dir: Path to the custom_nodes directory
+            
+        Returns:
+            Dictionary mapping package names to their directory mtime and the
+            [mtime_ns, size] of each scanned file
+        """
+        packages = []
+        with os.scandir(custom_nodes_dir) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    packages.append(entry.path)
+        
+        snapshot = {".": os.stat(custom_nodes_dir).st_mtime_ns}
+        if packages:
+            with ThreadPoolExecutor(max_workers=min(SCAN_WORKERS, len(packages))) as executor:
+                for package_path, package_state in zip(packages, executor.map(self._get_package_snapshot, packages)):
+                    snapshot[os.path.basename(package_path)] = package_state
+        return snapshot
+    
+    def _get_package_snapshot(self, package_path: str) -> Dict[str, Any]:
+        """
+        Get the mtimes and sizes of the files scanned in one package
+        
+        Args:
+            package_path: Path to the package
+            
+        Returns:
+            Dictionary mapping file paths relative to the package to [mtime_ns, size],
+            plus the package directory's mtime under "."
+        """
+        try:
+            package_state = {".": os.stat(package_path).st_mtime_ns}
+        except OSError:
+            return {}
+        metadata_files, py_files = self._list_scan_files(package_path)
+        for file_path in metadata_files + py_files:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                # Missing entry modules are expected
                 continue
-                
-            # Use the folder name as an identifier (lowercase for case-insensitive matching)
-            custom_node_packages[node_package.lower()] = package_path
+            package_state[os.path.relpath(file_path, package_path)] = [stat.st_mtime_ns, stat.st_size]
+        return package_state
+    
+    def _list_scan_files(self, package_path: str) -> Tuple[List[str], List[str]]:
+        """
+        List the files read when scanning a package for node IDs
+        
+        Node mappings live in the package's top-level modules or in the entry
+        modules of its direct subpackages, so deeper files are not included.
+        
+        Args:
+            package_path: Path to the package
             
-            # Look for any metadata or configuration files that might have node IDs
-            metadata_files = [
-                os.path.join(package_path, "node_info.json"),
-                os.path.join(package_path, "manifest.json"),
-                os.path.join(package_path, "config.json"),
-                os.path.join(package_path, "package.json"),
-            ]
+        Returns:
+            Tuple of (metadata files present, Python files); the entry modules
+            of subpackages are listed whether or not they exist
+        """
+        # One listing of the package serves both the metadata and the source lookups
+        try:
+            with os.scandir(package_path) as it:
+                entries = list(it)
+        except OSError:
+            entries = []
+        entry_names = {entry.name for entry in entries}
+        
+        metadata_files = [os.path.join(package_path, name) for name in _METADATA_FILES if name in entry_names]
+        
+        py_files = [entry.path for entry in entries if entry.name.endswith('.py') and entry.is_file()]
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False) and not entry.name.startswith('.') and entry.name not in _SKIP_SCAN_DIRS:
+                py_files.extend(os.path.join(entry.path, name) for name in _ENTRY_MODULES)
+        
+        return metadata_files, py_files
+    
+    def _scan_custom_node_packages(self, custom_nodes_dir: str) -> Dict[str, str]:
+        """
+        Scan the custom_nodes directory for node package identifiers
+        
+        Packages are scanned concurrently; the work is mostly small file
+        reads, so threads overlap the I/O well.
+        
+        Args:
+            custom_nodes_dir: Path to the custom_nodes directory
             
-            for metadata_file in metadata_files:
-                if os.path.exists(metadata_file):
-                    try:
-                        with open(metadata_file, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                            
-                        # Extract ID information from metadata
-                        if isinstance(data, dict):
-                            for key in ['id', 'identifier', 'name', 'package_name']:
-                                if key in data and isinstance(data[key], str):
-                                    custom_node_packages[data[key].lower()] = package_path
-                                    
-                    except Exception:
-                        pass
+        Returns:
+            Dictionary mapping custom node IDs to their paths
+        """
+        packages = []
+        for node_package in os.listdir(custom_nodes_dir):
+            package_path = os.path.join(custom_nodes_dir, node_package)
+            if os.path.isdir(package_path):
+                packages.append((node_package, package_path))
+        
+        custom_node_packages = {}
+        if not packages:
+            return custom_node_packages
+        
+        # Merge in directory order so later packages win conflicts as in a sequential scan
+        with ThreadPoolExecutor(max_workers=min(SCAN_WORKERS, len(packages))) as executor:
+            for package_ids in executor.map(lambda package: self._scan_one_package(*package), packages):
+                custom_node_packages.update(package_ids)
+        
+        return custom_node_packages
+    
+    def _scan_one_package(self, node_package: str, package_path: str) -> Dict[str, str]:
+        """
+        Find the node package identifiers of one custom node package
+        
+        Args:
+            node_package: Folder name of the package
+            package_path: Path to the package
             
-            # Search Python files for node IDs
-            for root, _, files in os.walk(package_path):
-                for file in files:
-                    if file.endswith('.py'):
-                        try:
-                            file_path = os.path.join(root, file)
-                            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                content = f.read()
-                                
-                            # Various patterns for node IDs in Python code
-                            id_patterns = [
-                                r'NODE_CLASS_MAPPINGS\s*\[\s*[\'"]([^\'"]+)[\'"]\s*\]',
-                                r'cnr_id["\s\']+:\s*["\']([^"\']+)["\']',
-                                r'aux_id["\s\']+:\s*["\']([^"\']+)["\']',
-                                r'id_mapping\s*=\s*[\'"]([\w\d_\-\/]+)[\'"]',
-                                r'ID\s*=\s*[\'"]([\w\d_\-\/]+)[\'"]',
-                                r'class\s+([\w\d_]+)\s*\([\w\d_\.]+Node\s*\)',
-                                r'@inertia\.aat\(\s*[\'"]([\w\d_\-\/]+)[\'"]',
-                                r'register_node\s*\(\s*[\'"]([\w\d_\-\/]+)[\'"]',
-                            ]
-                            
-                            for pattern in id_patterns:
-                                matches = re.findall(pattern, content)
-                                for match in matches:
-                                    custom_node_packages[match.lower()] = package_path
-                                    if "/" not in match:
-                                        custom_node_packages[f"{node_package.lower()}/{match.lower()}"] = package_path
-                        except:
-                            # Silently ignore errors in reading files
-                            pass
+        Returns:
+            Dictionary mapping the package's node IDs to its path
+        """
+        package_ids = {}
+        
+        # Use the folder name as an identifier (lowercase for case-insensitive matching)
+        package_ids[node_package.lower()] = package_path
+        
+        metadata_files, py_files = self._list_scan_files(package_path)
+        
+        # Look for any metadata or configuration files that might have node IDs
+        for metadata_file in metadata_files:
+            try:
+                data = load_json_file(metadata_file)
+                    
+                # Extract ID information from metadata
+                if isinstance(data, dict):
+                    for key in ['id', 'identifier', 'name', 'package_name']:
+                        if key in data and isinstance(data[key], str):
+                            package_ids[data[key].lower()] = package_path
                             
-            # Add commonly used naming patterns based on folder name
-            package_name_lower = node_package.lower()
-            common_prefixes = ["", "comfyui-", "comfyui_", "sd-", "sd_"]
-            common_suffixes = ["", "-nodes", "_nodes", "-comfyui", "_comfyui"]
+            except Exception:
+                pass
+        
+        # Search Python files for node IDs
+        for file_path in py_files:
+            try:
+                for match in _scan_file_node_ids(file_path):
+                    package_ids[match.lower()] = package_path
+                    if "/" not in match:
+                        package_ids[f"{node_package.lower()}/{match.lower()}"] = package_path
+            except:
+                # Silently ignore errors in reading files (including missing entry modules)
+                pass
+        
+        return package_ids
+    
+    def _find_variation_match(self, node_id: str) -> Optional[str]:
+        """
+        Find the package whose folder name a node ID is a naming variation of
+        
+        Args:
+            node_id: Lowercase custom node ID
             
-            for prefix in common_prefixes:
-                for suffix in common_suffixes:
-                    variation = f"{prefix}{package_name_lower}{suffix}"
-                    if variation != package_name_lower:
-                        custom_node_packages[variation] = package_path
-                    custom_node_packages[f"unknown/{variation}"] = package_path
+        Returns:
+            Path of the matching package, or None
+        """
+        for package_name in _package_name_candidates(node_id):
+            path = self._package_names.get(package_name)
+            if path:
+                return path
+        return None
+    
+    def _resolve_node_id(self, node_id: str) -> Optional[str]:
+        """
+        Find the package path for a custom node ID
         
-        return custom_node_packages
+        Args:
+            node_id: Lowercase custom node ID
+            
+        Returns:
+            Path of the matching package, or None if nothing matches
+        """
+        # Check for direct match, then for a variation of a package folder name
+        path = self.custom_node_packages.get(node_id) or self._find_variation_match(node_id)
+        if path:
+            return path
+        
+        # Check for partial matches
+        return self._find_partial_match(node_id)
+    
+    def _build_match_index(self) -> Tuple[List[str], str, List[int], Dict[str, int], Dict[str, int], Dict[str, int]]:
+        """
+        Index the keys of custom_node_packages for _find_partial_match
+        
+        Returns:
+            Tuple of (keys in order, keys joined by NUL, start offset of each
+            key in the joined string, key -> position, normalized key -> first
+            position, last path segment -> first position)
+        """
+        keys = list(self.custom_node_packages)
+        starts = []
+        offset = 0
+        for key in keys:
+            starts.append(offset)
+            offset += len(key) + 1
+        
+        positions = {key: i for i, key in enumerate(keys)}
+        normalized = {}
+        tails = {}
+        for i, key in enumerate(keys):
+            normalized.setdefault(key.replace('-', '_'), i)
+            tails.setdefault(key.split('/')[-1], i)
+        
+        return keys, '\0'.join(keys), starts, positions, normalized, tails
+    
+    def _find_partial_match(self, node_id: str) -> Optional[str]:
+        """
+        Find the first package ID (in insertion order) that partially matches a node ID
+        
+        A package ID matches if either ID contains the other, they are equal
+        after normalizing '-' to '_', or their last path segments are equal.
+        Index lookups replace a scan over every package ID.
+        
+        Args:
+            node_id: Lowercase node ID without a direct match
+            
+        Returns:
+            Path of the matching package, or None
+        """
+        if self._match_index is None:
+            self._match_index = self._build_match_index()
+        keys, joined, starts, positions, normalized, tails = self._match_index
+        
+        candidates = []
+        
+        # First package ID containing the node ID; a NUL-free ID can't span two keys
+        if '\0' not in node_id:
+            found = joined.find(node_id)
+            if found >= 0:
+                candidates.append(bisect.bisect_right(starts, found) - 1)
+        
+        # Package IDs contained in the node ID are among its substrings
+        length = len(node_id)
+        for start in range(length):
+            for end in range(start + 1, length + 1):
+                position = positions.get(node_id[start:end])
+                if position is not None:
+                    candidates.append(position)
+        
+        position = normalized.get(node_id.replace('-', '_'))
+        if position is not None:
+            candidates.append(position)
+        position = tails.get(node_id.split('/')[-1])
+        if position is not None:
+            candidates.append(position)
+        
+        if not candidates:
+            return None
+        return self.custom_node_packages[keys[min(candidates)]]
+    
+    def _load_workflow_nodes(self, workflow_path: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Load the nodes of a workflow file in any supported format
+        
+        Args:
+            workflow_path: Path to the workflow JSON file
+            
+        Returns:
+            List of node dictionaries, or None if no nodes were found
+        """
+        nodes = None
+        if IJSON_AVAILABLE and os.path.getsize(workflow_path) >= STREAMING_THRESHOLD:
+            nodes = stream_workflow_nodes(workflow_path)
+        
+        if nodes is None:
+            workflow = load_json_file(workflow_path)
+            
+            # Handle different workflow formats
+            nodes = find_workflow_nodes(workflow)
+            if nodes is None:
+                if isinstance(workflow, dict):
+                    print(f"Warning: Could not identify nodes structure in {workflow_path}")
+                else:
+                    print(f"Warning: Unknown workflow format in {workflow_path}")
+                return None
+            
+        return [node for node in nodes if isinstance(node, dict)]
+    
+    def _iter_custom_nodes_in(self, node_list: List[Dict[str, Any]]) -> Iterator[Tuple[str, str]]:
+        """
+        Yield the custom node packages used by a list of nodes, each once
+        
+        Args:
+            node_list: Workflow nodes
+            
+        Yields:
+            (package_id, package_path) tuples
+        """
+        # Extract custom node package IDs declared in node properties
+        custom_node_ids = {
+            node['properties'][id_key].lower()
+            for node in node_list if isinstance(node.get('properties'), dict)
+            for id_key in _NODE_ID_KEYS
+            if isinstance(node['properties'].get(id_key), str) and node['properties'][id_key].strip()
+        }
+        
+        seen_paths = set()
+        
+        # Resolve custom node paths from declared IDs
+        for node_id in custom_node_ids:
+            path = self._resolve_node_id(node_id)
+            if path and path not in seen_paths:
+                seen_paths.add(path)
+                yield self._basename_cache[path], path
+        
+        # Track node types to find custom nodes that don't explicitly declare themselves
+        node_types = {node['type'].lower() for node in node_list if 'type' in node}
+        
+        # Check node types against known custom nodes
+        # Some custom nodes don't declare themselves but have distinct node types,
+        # so try variations of each type until one resolves
+        for node_type in node_types - _CORE_NODE_TYPES:
+            for candidate in _node_type_candidates(node_type):
+                if candidate in custom_node_ids:
+                    # Already resolved (or not) as a declared ID
+                    continue
+                path = self._resolve_node_id(candidate)
+                if path:
+                    if path not in seen_paths:
+                        seen_paths.add(path)
+                        yield self._basename_cache[path], path
+                    break
     
-    def parse_workflow(self, workflow_path: str) -> Dict[str, Any]:
+    def _iter_model_references_in(self, node_list: List[Dict[str, Any]]) -> Iterator[str]:
+        """
+        Yield the model references in a list of nodes, each once
+        
+        Model references are any reasonably long string widget value with a
+        model file extension.
+        
+        Args:
+            node_list: Workflow nodes
+            
+        Yields:
+            Model reference strings
+        """
+        seen = set()
+        for node in node_list:
+            values = node.get('widgets_values')
+            if not isinstance(values, list):
+                continue
+            for value in values:
+                if (isinstance(value, str) and len(value) >= 5 and value not in seen
+                        and _has_model_extension(value)):
+                    seen.add(value)
+                    yield value
+    
+    def iter_custom_nodes(self, workflow_path: str) -> Iterator[Tuple[str, str]]:
+        """
+        Yield the custom node dependencies of a workflow as they are resolved
+        
+        Args:
+            workflow_path: Path to the workflow JSON file
+            
+        Yields:
+            (package_id, package_path) tuples, without duplicates
+        """
+        node_list = self._load_workflow_nodes(workflow_path)
+        if node_list:
+            yield from self._iter_custom_nodes_in(node_list)
+    
+    def iter_model_references(self, workflow_path: str) -> Iterator[str]:
+        """
+        Yield the model references of a workflow as they are found
+        
+        Args:
+            workflow_path: Path to the workflow JSON file
+            
+        Yields:
+            Model reference strings, without duplicates
+        """
+        node_list = self._load_workflow_nodes(workflow_path)
+        if node_list:
+            yield from self._iter_model_references_in(node_list)
+    
+    def parse_workflow(self, workflow_path: str, raise_errors: bool = False) -> Dict[str, Any]:
         """
         Parse a workflow file to extract model references and custom node dependencies
         
+        Results are cached per parser and reused while the file's mtime and
+        size are unchanged.
+        
         Args:
             workflow_path: Path to the workflow JSON file
+            raise_errors: Raise errors reading the workflow instead of
+                reporting them and returning an empty result
             
         Returns:
             Dictionary with parsed dependencies:
@@ -125,144 +793,77 @@ class WorkflowParser:
                 'model_references': [model_reference_string, ...]
             }
         """
+        try:
+            stat = os.stat(workflow_path)
+        except OSError:
+            return self._parse_workflow_file(workflow_path, raise_errors)
+        
+        cached = self._result_cache.get(workflow_path)
+        if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            self._result_cache.move_to_end(workflow_path)
+            return copy.deepcopy(cached[2])
+        
+        result = self._parse_workflow_file(workflow_path, raise_errors)
+        
+        self._result_cache[workflow_path] = (stat.st_mtime_ns, stat.st_size, result)
+        self._result_cache.move_to_end(workflow_path)
+        if len(self._result_cache) > RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+        
+        return copy.deepcopy(result)
+    
+    def _parse_workflow_file(self, workflow_path: str, raise_errors: bool = False) -> Dict[str, Any]:
+        """
+        Parse a workflow file without consulting the result cache
+        
+        Args:
+            workflow_path: Path to the workflow JSON file
+            raise_errors: Raise errors instead of reporting them
+            
+        Returns:
+            Dictionary with parsed dependencies, as for parse_workflow
+        """
         result = {
             'custom_nodes': [],
             'model_references': []
         }
         
         try:
-            with open(workflow_path, 'r', encoding='utf-8') as f:
-                workflow = json.load(f)
-            
-            # Handle different workflow formats
-            if isinstance(workflow, dict):
-                if 'nodes' in workflow:
-                    # Standard ComfyUI format
-                    nodes = workflow['nodes']
-                elif 'workflow' in workflow and isinstance(workflow['workflow'], dict) and 'nodes' in workflow['workflow']:
-                    # Nested format sometimes used
-                    nodes = workflow['workflow']['nodes']
-                else:
-                    # Try to find an array of nodes at any top level key
-                    nodes = None
-                    for key, value in workflow.items():
-                        if isinstance(value, list) and len(value) > 0 and isinstance(value[0], dict) and 'type' in value[0]:
-                            nodes = value
-                            break
-                    
-                    if nodes is None:
-                        print(f"Warning: Could not identify nodes structure in {workflow_path}")
-                        return result
-            elif isinstance(workflow, list) and len(workflow) > 0 and isinstance(workflow[0], dict):
-                # Some workflows might just be an array of nodes
-                nodes = workflow
-            else:
-                print(f"Warning: Unknown workflow format in {workflow_path}")
+            # The file is loaded once and shared by both passes
+            node_list = self._load_workflow_nodes(workflow_path)
+            if node_list is None:
                 return result
-                
-            # Track custom node IDs and models
-            custom_node_ids = set()
-            model_references = set()
             
-            # Track node types to find custom nodes that don't explicitly declare themselves
-            node_types = set()
-            
-            # Process each node
-            for node in nodes:
-                if not isinstance(node, dict):
-                    continue
-                
-                # Keep track of all node types
-                if 'type' in node:
-                    node_types.add(node['type'].lower())
-                
-                # Extract custom node package ID
-                if 'properties' in node and isinstance(node['properties'], dict):
-                    props = node['properties']
-                    
-                    # Look for custom node identifiers in properties
-                    for id_key in ['cnr_id', 'aux_id', 'Node name for S&R', 'custom_node_id', 'node_id']:
-                        if id_key in props and props[id_key]:
-                            node_id = props[id_key]
-                            if isinstance(node_id, str) and node_id.strip():
-                                custom_node_ids.add(node_id.lower())
-                
-                # Extract model references from widgets
-                if 'widgets_values' in node and isinstance(node['widgets_values'], list):
-                    values = node['widgets_values']
-                    
-                    # Check if any widget value looks like a model path
-                    for value in values:
-                        if not isinstance(value, str) or not value:
-                            continue
-                            
-                        # Skip values that are clearly not model files
-                        if value.lower() in ('randomize', 'true', 'false', 'enable', 'disable', 'none'):
-                            continue
-                        
-                        # Skip very short values
-                        if len(value) < 5:
-                            continue
-                            
-                        # If it has a file extension that looks like a model, add it
-                        model_extensions = ('.safetensors', '.ckpt', '.pt', '.pth', '.bin', '.onnx', '.msgpack')
-                        if any(value.lower().endswith(ext) for ext in model_extensions):
-                            model_references.add(value)
-            
-            # Check node types against known custom nodes
-            # Some custom nodes don't declare themselves but have distinct node types
-            for node_type in node_types:
-                # Skip basic node types likely to be part of core ComfyUI
-                if node_type in ('note', 'reroute', 'primitive', 'output', 'input'):
-                    continue
-                    
-                # Add variations of the node type as potential custom node IDs
-                custom_node_ids.add(node_type)
-                
-                # Some common patterns for node types
-                parts = node_type.split('_')
-                if len(parts) > 1:
-                    # Try prefix as potential package name
-                    custom_node_ids.add(parts[0])
-                    custom_node_ids.add(f"{parts[0]}/{node_type}")
-                    
-                    # If 3+ parts, try first two as package
-                    if len(parts) >= 3:
-                        prefix = f"{parts[0]}_{parts[1]}"
-                        custom_node_ids.add(prefix)
-                        custom_node_ids.add(f"{prefix}/{node_type}")
-            
-            # Resolve custom node paths from IDs
-            resolved_nodes = set()
-            for node_id in custom_node_ids:
-                # Check for direct match
-                if node_id in self.custom_node_packages:
-                    path = self.custom_node_packages[node_id]
-                    package_name = os.path.basename(path)
-                    resolved_nodes.add((package_name, path))
-                else:
-                    # Check for partial matches
-                    for package_id, path in self.custom_node_packages.items():
-                        # Various matching strategies
-                        if (node_id in package_id or package_id in node_id or
-                            node_id.replace('-', '_') == package_id.replace('-', '_') or
-                            node_id.split('/')[-1] == package_id.split('/')[-1]):
-                            package_name = os.path.basename(path)
-                            resolved_nodes.add((package_name, path))
-                            break
-            
-            result['custom_nodes'] = list(resolved_nodes)
-            result['model_references'] = list(model_references)
+            result['custom_nodes'] = list(self._iter_custom_nodes_in(node_list))
+            result['model_references'] = list(self._iter_model_references_in(node_list))
             
             return result
             
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"Error parsing workflow: {e}")
             import traceback
             traceback.print_exc()
             return result
 
 
+@functools.lru_cache(maxsize=4)
+def get_parser(comfyui_path: str, use_cache: bool = True) -> WorkflowParser:
+    """
+    Get a shared WorkflowParser for a ComfyUI installation
+    
+    Args:
+        comfyui_path: Path to the ComfyUI installation
+        use_cache: Whether to reuse the on-disk custom node inventory;
+            pass False to rescan custom_nodes and refresh it
+        
+    Returns:
+        WorkflowParser instance, reused for repeated calls with the same arguments
+    """
+    return WorkflowParser(comfyui_path, use_cache=use_cache)
+
+
 def main():
     """Simple command-line script to extract model references from a workflow"""
     import argparse
@@ -270,10 +871,12 @@ def main():
     parser = argparse.ArgumentParser(description="ComfyUI Simplified Workflow Parser")
     parser.add_argument("comfyui_path", help="Path to ComfyUI installation")
     parser.add_argument("workflow_path", help="Path to workflow JSON file")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Rescan custom_nodes instead of using the cached node inventory")
     
     args = parser.parse_args()
     
-    parser = WorkflowParser(args.comfyui_path)
+    parser = WorkflowParser(args.comfyui_path, use_cache=not args.no_cache)
     result = parser.parse_workflow(args.workflow_path)
     
     print("\nCustom Nodes:")
@@ -10,28 +10,683 @@ Key features:
 - Support for multiple workflow formats
 """
 
+import bisect
+import copy
+import functools
+import hashlib
 import json
+import logging
+import mmap
 import os
 import re
 import sys
+import tempfile
 import yaml
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Set, Tuple, Optional, Any, Union
+from typing import Dict, Iterator, List, Sequence, Set, Tuple, Optional, Any, Union
+
+logger = logging.getLogger("WorkflowParser")
+
+
+# Prefer the libyaml-based loader, which parses much faster than the pure-Python one
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
+# orjson parses JSON considerably faster than the stdlib; fall back if missing
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# ijson lets large workflows be streamed node by node instead of loaded whole
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# Below this size a full parse is cheaper than streaming
+STREAMING_THRESHOLD = 1024 * 1024
+
+# Directory for the on-disk index of node IDs found in custom node packages
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "comfyui_workflow_parser"
+)
+SCAN_CACHE_FILE = os.path.join(CACHE_DIR, "index.json")
+# Bumped whenever the cached entries or the way packages are scanned change
+SCAN_CACHE_VERSION = 3
+
+# Prefixes and suffixes commonly added to package folder names in node IDs
+_PACKAGE_PREFIXES = ("", "comfyui-", "comfyui_", "sd-", "sd_")
+_PACKAGE_SUFFIXES = ("", "-nodes", "_nodes", "-comfyui", "_comfyui")
+
+# Parse results kept per parser
+RESULT_CACHE_SIZE = 32
+
+# Threads used to deep-scan custom node packages
+SCAN_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Node classes are usually declared near the top of a file and NODE_CLASS_MAPPINGS
+# at the end, so only this much of each end of a large file is scanned
+NODE_ID_SCAN_LIMIT = 256 * 1024
+
+# Directories that never declare node IDs (hidden directories are skipped as well)
+_SKIP_SCAN_DIRS = frozenset({'__pycache__', 'node_modules', 'venv', 'tests', 'test', 'third_party', 'vendor'})
+_VENDORED_FILE_SUFFIXES = ('_pb2.py',)
+
+# Other names a model type may be configured under, tried when it has no paths
+_MODEL_TYPE_ALIASES = {
+    'checkpoints': ('checkpoint', 'stable-diffusion', 'sd'),
+    'loras': ('lora', 'locon', 'lycoris'),
+    'vae': ('vae_approx', 'vaes'),
+}
+
+# Model types searched when a model isn't found under its own type
+_FALLBACK_MODEL_TYPES = {
+    'checkpoints': ('loras', 'vae', 'diffusion_models'),
+    'loras': ('checkpoints', 'embedding'),
+    'vae': ('checkpoints',),
+    'embedding': ('loras',),
+    'controlnet': ('checkpoints',),
+}
+
+# Folders inside model directories that are not searched for models
+_SKIP_MODEL_DIRS = frozenset(('__pycache__', 'previews', 'thumbnails'))
+
+# Widget values with one of these file extensions are treated as model files
+_MODEL_EXTENSIONS = frozenset(('safetensors', 'ckpt', 'pt', 'pth', 'bin', 'onnx', 'msgpack'))
+
+# Last characters of those extensions in either case, for a cheap first rejection
+_MODEL_EXTENSION_TAILS = frozenset(ext[-1] for ext in _MODEL_EXTENSIONS) | frozenset(ext[-1].upper() for ext in _MODEL_EXTENSIONS)
+
+# Basic node types likely to be part of core ComfyUI
+_CORE_NODE_TYPES = frozenset(('note', 'reroute', 'primitive', 'output', 'input'))
+
+# Common built-in ComfyUI node types (lowercase), for installations whose
+# own node mappings can't be read. No custom package declares these, so
+# they never trigger a scan of every package
+_BUILTIN_NODE_TYPES = frozenset(name.lower() for name in (
+    'KSampler', 'KSamplerAdvanced', 'KSamplerSelect', 'SamplerCustom', 'SamplerCustomAdvanced',
+    'BasicScheduler', 'BasicGuider', 'CFGGuider', 'RandomNoise', 'FluxGuidance',
+    'CheckpointLoader', 'CheckpointLoaderSimple', 'unCLIPCheckpointLoader', 'UNETLoader',
+    'CLIPLoader', 'DualCLIPLoader', 'CLIPSetLastLayer', 'CLIPTextEncode',
+    'CLIPTextEncodeSDXL', 'CLIPTextEncodeSDXLRefiner', 'CLIPVisionLoader', 'CLIPVisionEncode',
+    'VAELoader', 'VAEDecode', 'VAEEncode', 'VAEDecodeTiled', 'VAEEncodeTiled', 'VAEEncodeForInpaint',
+    'LoraLoader', 'LoraLoaderModelOnly', 'HypernetworkLoader', 'UpscaleModelLoader', 'ImageUpscaleWithModel',
+    'ControlNetLoader', 'DiffControlNetLoader', 'ControlNetApply', 'ControlNetApplyAdvanced',
+    'StyleModelLoader', 'StyleModelApply', 'GLIGENLoader', 'GLIGENTextBoxApply', 'unCLIPConditioning',
+    'ConditioningCombine', 'ConditioningAverage', 'ConditioningConcat', 'ConditioningSetArea',
+    'ConditioningSetAreaPercentage', 'ConditioningSetMask', 'ConditioningSetTimestepRange',
+    'ConditioningZeroOut', 'InpaintModelConditioning', 'ModelSamplingDiscrete',
+    'EmptyLatentImage', 'LatentUpscale', 'LatentUpscaleBy', 'LatentComposite', 'LatentBlend',
+    'LatentCrop', 'LatentFlip', 'LatentRotate', 'LatentFromBatch', 'RepeatLatentBatch',
+    'SetLatentNoiseMask', 'SaveLatent', 'LoadLatent',
+    'LoadImage', 'LoadImageMask', 'SaveImage', 'PreviewImage', 'EmptyImage', 'ImageScale', 'ImageScaleBy',
+    'ImageInvert', 'ImageBatch', 'ImagePadForOutpaint', 'ImageCrop', 'ImageBlend', 'ImageBlur',
+    'ImageSharpen', 'ImageQuantize', 'PrimitiveNode', 'MarkdownNote',
+))
+
+# Keys of a NODE_CLASS_MAPPINGS dict literal, as used by ComfyUI's own node modules
+_MAPPINGS_DICT_RE = re.compile(rb'NODE_CLASS_MAPPINGS\s*=\s*\{(.*?)\}', re.DOTALL)
+_MAPPINGS_KEY_RE = re.compile(rb'[\'"]([^\'"]+)[\'"]\s*:')
+
+# Map node type substrings to model types - expanded for better coverage
+_NODE_TYPE_MODEL_TYPES = {
+    # Checkpoints
+    'checkpoint': 'checkpoints',
+    'checkpointloader': 'checkpoints', 
+    'load': 'checkpoints',
+    'sdxl': 'checkpoints',
+    'model': 'checkpoints',
+    'loadcheckpoint': 'checkpoints',
+    'diffus': 'checkpoints',
+    
+    # VAEs
+    'vae': 'vae',
+    'vaeloader': 'vae',
+    'loadvae': 'vae',
+    'variational': 'vae',
+    'encoder': 'vae',
+    'decoder': 'vae',
+    
+    # CLIP models
+    'clip': 'clip',
+    'loadclip': 'clip',
+    'cliploader': 'clip',
+    
+    # CLIP Vision
+    'clipvision': 'clip_vision',
+    'visionloader': 'clip_vision',
+    'loadcv': 'clip_vision',
+    
+    # LoRAs
+    'lora': 'loras',
+    'loraloader': 'loras',
+    'loadlora': 'loras',
+    'loha': 'loras',
+    'lycoris': 'loras',
+    
+    # Embeddings
+    'embedding': 'embeddings',
+    'textualinversion': 'embeddings',
+    'loadembedding': 'embeddings',
+    'ti': 'embeddings',
+    
+    # Hypernetworks
+    'hypernetwork': 'hypernetworks',
+    'loadhyper': 'hypernetworks',
+    
+    # ControlNet
+    'controlnet': 'controlnet',
+    'loadcontrol': 'controlnet',
+    'control': 'controlnet',
+    
+    # Upscalers
+    'upscale': 'upscale_models',
+    'upscaler': 'upscale_models',
+    'esrgan': 'upscale_models',
+    'loadupscale': 'upscale_models',
+    
+    # Face models
+    'facedetection': 'insightface',
+    'insightface': 'insightface',
+    'facerestore': 'facerestore_models',
+    'gfpgan': 'facerestore_models',
+    'codeformer': 'facerestore_models',
+    
+    # Object detection
+    'ultralytics': 'ultralytics',
+    'yolo': 'ultralytics',
+    'detection': 'ultralytics',
+    
+    # Text models
+    'llm': 'llm',
+    'textgen': 'llm',
+    'languagemodel': 'llm',
+    
+    # Segmentation
+    'sam': 'sams',
+    'segment': 'sams',
+    'segmentanything': 'sams',
+}
+
+# Node type markers of multi-model nodes, in the order _refine_model_type
+# tries them, with the widget count each needs: (category, markers, min values)
+_REFINE_CATEGORIES = (
+    ('lora', ('lora', 'lycoris'), 3),
+    ('control', ('control',), 2),
+    ('upscale', ('upscale',), 2),
+    ('loader', ('loader',), 2),
+)
+
+# Only these node fields are needed to find custom nodes and models
+_NODE_FIELDS = ('type', 'properties', 'widgets_values')
+
+# Node properties that may name the custom node package a node belongs to
+_NODE_ID_KEYS = ('cnr_id', 'aux_id', 'Node name for S&R', 'custom_node_id', 'node_id')
+
+# Where the node array lives in known workflow formats: the standard ComfyUI
+# format and the nested format sometimes used
+_NODE_PATHS = (('nodes',), ('workflow', 'nodes'))
+
+# Various patterns for node IDs in Python code
+_NODE_ID_PATTERNS = (
+    # Common pattern for ComfyUI node class mappings
+    r'NODE_CLASS_MAPPINGS\s*\[\s*[\'"]([^\'"]+)[\'"]\s*\]',
+    
+    # Node identifiers
+    r'cnr_id["\s\']+:\s*["\']([^"\']+)["\']',
+    r'aux_id["\s\']+:\s*["\']([^"\']+)["\']',
+    r'id_mapping\s*=\s*[\'"]([\w\d_\-\/]+)[\'"]',
+    r'ID\s*=\s*[\'"]([\w\d_\-\/]+)[\'"]',
+    
+    # Class definitions that often correspond to node names
+    r'class\s+([\w\d_]+)\s*\([\w\d_\.]+Node\s*\)',
+    
+    # Less specific patterns, but might catch some node IDs
+    r'@inertia\.aat\(\s*[\'"]([\w\d_\-\/]+)[\'"]',
+    r'register_node\s*\(\s*[\'"]([\w\d_\-\/]+)[\'"]',
+)
+
+# All of the above as one alternation, compiled once; it runs on the raw
+# bytes of a file so only the matched IDs need decoding
+_NODE_ID_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in _NODE_ID_PATTERNS).encode())
+
+# A literal every ID pattern requires; files containing none of them can't
+# match, so they skip the regex
+_NODE_ID_LITERALS = (
+    b'NODE_CLASS_MAPPINGS', b'cnr_id', b'aux_id', b'id_mapping', b'ID',
+    b'class', b'@inertia.aat', b'register_node',
+)
+
+
+# Python files at least this large are memory-mapped for scanning instead of read
+MMAP_SCAN_THRESHOLD = 1024 * 1024
+
+
+def _match_node_ids(content) -> List[str]:
+    """
+    Find the node IDs declared in Python source
+    
+    Args:
+        content: Raw source, as bytes or a memory map
+        
+    Returns:
+        Matched IDs in file order
+    """
+    if not any(content.find(literal) != -1 for literal in _NODE_ID_LITERALS):
+        return []
+    
+    # One pass over the file finds matches of every ID pattern;
+    # each alternative has a single group, so lastindex picks the ID
+    return [m.group(m.lastindex).decode('utf-8', 'ignore') for m in _NODE_ID_RE.finditer(content)]
+
+
+def _scan_file_node_ids(file_path: str, max_bytes: Optional[int] = None) -> List[str]:
+    """
+    Find the node IDs declared in a Python file
+    
+    Large files are memory-mapped so they are scanned in the page cache
+    without being copied.
+    
+    Args:
+        file_path: Path to the Python file
+        max_bytes: Only scan this many bytes from each end of the file
+        
+    Returns:
+        Matched IDs in file order
+    """
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if max_bytes is not None and size > 2 * max_bytes:
+            # The mappings that register a pack's nodes usually sit at the end of the file
+            head = f.read(max_bytes)
+            f.seek(size - max_bytes)
+            return _match_node_ids(head) + _match_node_ids(f.read(max_bytes))
+        if size < MMAP_SCAN_THRESHOLD:
+            return _match_node_ids(f.read(size))
+        with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+            return _match_node_ids(mm)
+
+
+# Splits package folder names into words, and words too generic to identify a package
+_PACKAGE_WORD_SPLIT_RE = re.compile(r'[^a-z0-9]+')
+_GENERIC_PACKAGE_WORDS = frozenset({'comfyui', 'comfy', 'node', 'nodes', 'pack', 'suite', 'custom', 'extension', 'extensions'})
+
+
+@functools.lru_cache(maxsize=1024)
+def _node_type_variants(node_type: str) -> Tuple[str, ...]:
+    """
+    Get the custom node IDs a node type may belong to
+    
+    Results are cached since the same node types recur across workflows.
+    
+    Args:
+        node_type: Lowercase node type
+        
+    Returns:
+        The node type itself followed by package-style variations of it
+    """
+    variants = [node_type]
+    
+    # Some common patterns for node types
+    parts = node_type.split('_')
+    if len(parts) > 1:
+        # Try prefix as potential package name
+        variants.append(parts[0])
+        variants.append(f"{parts[0]}/{node_type}")
+        
+        # If 3+ parts, try first two as package
+        if len(parts) >= 3:
+            prefix = f"{parts[0]}_{parts[1]}"
+            variants.append(prefix)
+            variants.append(f"{prefix}/{node_type}")
+    
+    return tuple(variants)
+
+
+def _package_name_candidates(node_id: str) -> Iterator[str]:
+    """
+    Yield the package folder names a node ID may be a naming variation of
+    
+    Variations are the folder name with one of the common prefixes and/or
+    suffixes, optionally in GitHub "unknown/..." form; they are undone here
+    instead of being generated for every package.
+    
+    Args:
+        node_id: Lowercase custom node ID
+        
+    Yields:
+        Candidate lowercase folder names
+    """
+    if node_id.startswith("unknown/"):
+        node_id = node_id[len("unknown/"):]
+    
+    for prefix in _PACKAGE_PREFIXES:
+        if not node_id.startswith(prefix):
+            continue
+        rest = node_id[len(prefix):]
+        for suffix in _PACKAGE_SUFFIXES:
+            if rest.endswith(suffix) and len(rest) > len(suffix):
+                yield rest[:len(rest) - len(suffix)]
+
+
+def _has_model_extension(value: str) -> bool:
+    """
+    Check whether a widget value names a model file
+    
+    Args:
+        value: Widget value
+        
+    Returns:
+        True if the value's file extension is one of _MODEL_EXTENSIONS
+    """
+    # Most widget values are rejected by their last character alone
+    if value[-1:] not in _MODEL_EXTENSION_TAILS:
+        return False
+    dot = value.rfind('.')
+    return dot >= 0 and value[dot + 1:].lower() in _MODEL_EXTENSIONS
+
+
+def _load_json_file(path: str) -> Any:
+    """
+    Load a JSON file, using orjson when available
+    
+    Args:
+        path: Path to the JSON file
+        
+    Returns:
+        The decoded JSON document
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+        
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson is stricter than json (e.g. NaN values), so retry with the stdlib parser
+            pass
+            
+    return json.loads(data)
+
+
+def _is_node_list(value: Any) -> bool:
+    """Check whether a JSON value looks like an array of workflow nodes"""
+    return isinstance(value, list) and len(value) > 0 and isinstance(value[0], dict) and 'type' in value[0]
+
+
+def _find_workflow_nodes(workflow: Any) -> Optional[List[Any]]:
+    """
+    Find the array of nodes in a decoded workflow of any supported format
+    
+    Args:
+        workflow: The decoded workflow JSON
+        
+    Returns:
+        The workflow's nodes, or None if no node array was found
+    """
+    if isinstance(workflow, list):
+        # Some workflows might just be an array of nodes
+        if len(workflow) > 0 and isinstance(workflow[0], dict):
+            return workflow
+        return None
+    
+    if not isinstance(workflow, dict):
+        return None
+    
+    for path in _NODE_PATHS:
+        value = workflow
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            return value
+    
+    # Try to find an array of nodes at any top level key, in document order
+    # so the result depends only on the workflow itself
+    for value in workflow.values():
+        if _is_node_list(value):
+            return value
+    
+    return None
+
+
+def _stream_workflow_nodes(path: str) -> Optional[List[Any]]:
+    """
+    Stream the nodes of a standard or nested-format workflow file, keeping
+    only the fields the parser looks at (embedded previews and links are dropped)
+    
+    Args:
+        path: Path to the workflow JSON file
+        
+    Returns:
+        List of trimmed nodes, or None if the file has no node array at a known path
+    """
+    for node_path in _NODE_PATHS:
+        nodes = []
+        with open(path, 'rb') as f:
+            for node in ijson.items(f, '.'.join(node_path) + '.item', use_float=True):
+                if isinstance(node, dict):
+                    node = {key: node[key] for key in _NODE_FIELDS if key in node}
+                nodes.append(node)
+                
+        if nodes:
+            return nodes
+            
+    return None
+
+
+@functools.lru_cache(maxsize=1024)
+def _filename_variations(base_filename: str) -> Tuple[str, ...]:
+    """
+    Get the filenames a model file may be stored under
+    
+    Args:
+        base_filename: Model filename as referenced by the workflow
+        
+    Returns:
+        The filename and its case, space/underscore and extension
+        variations, without repeats
+    """
+    filename_stem = os.path.splitext(base_filename)[0]
+    possible_filenames = [
+        base_filename,                                # Original filename
+        base_filename.lower(),                        # Lowercase
+        base_filename.replace(' ', '_'),              # Replace spaces with underscores
+        base_filename.lower().replace(' ', '_'),      # Lowercase + underscores
+        base_filename.replace('_', ' '),              # Replace underscores with spaces
+        base_filename.lower().replace('_', ' '),      # Lowercase + spaces
+        # Add model extensions if not present
+        f"{filename_stem}.safetensors" if not base_filename.endswith('.safetensors') else None,
+        f"{filename_stem}.ckpt" if not base_filename.endswith('.ckpt') else None,
+        f"{filename_stem}.pt" if not base_filename.endswith('.pt') else None,
+    ]
+    # Filter out None values and repeats (e.g. an already lowercase name)
+    return tuple(dict.fromkeys(f for f in possible_filenames if f))
+
+
+def _walk_model_dir(path: str) -> List[Tuple[str, List[str], List[str]]]:
+    """
+    Walk a model directory tree
+    
+    Args:
+        path: Top of the tree
+        
+    Returns:
+        The (root, dirs, files) tuples os.walk yields, top-down with
+        subdirectories in name order, without hidden and _SKIP_MODEL_DIRS folders
+    """
+    walk = []
+    # Symlinked folders are listed but not descended into, so link loops can't recurse
+    for root, dirs, files in os.walk(path, topdown=True, followlinks=False):
+        # Hidden folders and preview images never hold the models looked for;
+        # the rest are visited alphabetically so the first match doesn't depend
+        # on the filesystem's listing order
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d not in _SKIP_MODEL_DIRS)
+        walk.append((root, dirs, files))
+    return walk
+
+
+def _extra_model_paths_locations(comfyui_path: str) -> List[str]:
+    """
+    Get the places extra_model_paths.yaml is looked for, in order of preference
+    
+    Args:
+        comfyui_path: Absolute path to the ComfyUI installation
+        
+    Returns:
+        List of candidate file paths
+    """
+    return [
+        os.path.join(comfyui_path, "extra_model_paths.yaml"),
+        # Sometimes it might be in the parent directory if the script is run from a subdir
+        os.path.join(os.path.dirname(comfyui_path), "extra_model_paths.yaml"),
+        # Current working directory
+        os.path.join(os.getcwd(), "extra_model_paths.yaml"),
+    ]
+
+
+def _iter_py_files(top: str) -> Iterator[str]:
+    """
+    Yield the paths of all .py files below a directory
+    
+    Uses os.scandir so file types come from the directory listing; like
+    os.walk, symlinked directories are not descended into. Hidden, test,
+    virtualenv and vendored directories and generated protobuf modules are
+    skipped.
+    
+    Args:
+        top: Directory to search
+        
+    Yields:
+        Paths of the Python files found
+    """
+    stack = [top]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not entry.name.startswith('.') and entry.name not in _SKIP_SCAN_DIRS:
+                            stack.append(entry.path)
+                    elif entry.name.endswith('.py') and not entry.name.endswith(_VENDORED_FILE_SUFFIXES):
+                        yield entry.path
+        except OSError:
+            continue
+
+
+def _file_states(top: str, paths: List[str]) -> Dict[str, List[int]]:
+    """
+    Get the modification time and size of files, for validating cached scans
+    
+    Args:
+        top: Directory the paths are recorded relative to
+        paths: Files to stat; missing ones are left out
+        
+    Returns:
+        Dictionary mapping relative paths to [mtime_ns, size]
+    """
+    states = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        states[os.path.relpath(path, top)] = [stat.st_mtime_ns, stat.st_size]
+    return states
+
+
+def _load_core_node_types(comfyui_path: str) -> frozenset:
+    """
+    Get the node types built into a ComfyUI installation
+    
+    Args:
+        comfyui_path: Path to the ComfyUI installation
+        
+    Returns:
+        Lowercase node types from its nodes.py and comfy_extras modules,
+        plus the common built-in types
+    """
+    core_files = [os.path.join(comfyui_path, "nodes.py")]
+    extras_dir = os.path.join(comfyui_path, "comfy_extras")
+    try:
+        core_files.extend(os.path.join(extras_dir, name) for name in os.listdir(extras_dir) if name.endswith('.py'))
+    except OSError:
+        pass
+    
+    node_types = set(_BUILTIN_NODE_TYPES)
+    for file_path in core_files:
+        try:
+            with open(file_path, 'rb') as f:
+                content = f.read()
+        except OSError:
+            continue
+        for mappings in _MAPPINGS_DICT_RE.finditer(content):
+            node_types.update(key.decode('utf-8', 'ignore').lower()
+                              for key in _MAPPINGS_KEY_RE.findall(mappings.group(1)))
+    return frozenset(node_types)
 
 
 class WorkflowParser:
     """Parses ComfyUI workflows to extract model and custom node dependencies"""
     
-    def __init__(self, comfyui_path: str):
+    def __init__(self, comfyui_path: str, max_scan_bytes: int = NODE_ID_SCAN_LIMIT, use_cache: bool = True):
         """
         Initialize the workflow parser with the ComfyUI installation directory
         
         Args:
             comfyui_path: Path to the ComfyUI installation
+            max_scan_bytes: Bytes read from each end of a custom node Python file when looking for node IDs
+            use_cache: Whether to reuse results of earlier runs (the parsed
+                extra_model_paths.yaml and node IDs of unchanged packages)
         """
         self.comfyui_path = os.path.abspath(comfyui_path)
+        self.max_scan_bytes = max_scan_bytes
+        self.use_cache = use_cache
+        # Cached scans keyed by package path
+        self._scan_cache = self._load_scan_cache() if use_cache else {}
+        self._scan_cache_dirty = False
         self.model_paths = self._load_model_paths()
+        # Package folder names to paths, and the memoized IDs of deep-scanned packages
+        self._package_dirs = {}
+        self._deep_scanned = {}
+        # Node types built into the ComfyUI installation, read on first use
+        self._core_node_types = None
+        # Lowercase package folder names to paths, for node IDs that are naming variations of them
+        self._package_names = {}
+        # Lookup tables for partial matches of node IDs, rebuilt when packages are added
+        self._match_index = None
+        # Model types guessed for node types, shared by every workflow this parser reads
+        self._model_type_cache = {}
+        # Refinement categories matched by node types, shared like the model type cache
+        self._refine_category_cache = {}
+        # Parse results by workflow path, each stored as (mtime_ns, size, result)
+        self._result_cache = OrderedDict()
+        # Entry names of model directories, each stored as (mtime_ns, names)
+        self._model_dir_entries = {}
+        # Listings and walks of model directories made while resolving models;
+        # cleared by refresh()
+        self._listdir_cache = {}
+        self._walk_cache = {}
+        # Files under each model directory by lowercase name, built from its walk
+        self._model_index = {}
+        # Subdirectories of model directories by lowercase name: immediate ones
+        # (names, from the listing) and anywhere in the tree (paths, from the walk)
+        self._subdir_index = {}
+        self._tree_dir_index = {}
+        # Resolved model paths by (model_type, model_name); None for models not found
+        self._resolve_cache = {}
         self.custom_node_packages = self._get_custom_node_packages()
+        # Package names for each package path, reported with resolved custom nodes
+        self._basename_cache = {path: name for name, path in self._package_dirs.items()}
         
     def _load_model_paths(self) -> Dict[str, List[str]]:
         """
@@ -65,18 +720,12 @@ class WorkflowParser:
         }
         
         # Look for extra_model_paths.yaml in multiple locations
-        extra_paths_locations = [
-            os.path.join(self.comfyui_path, "extra_model_paths.yaml"),
-            # Sometimes it might be in the parent directory if the script is run from a subdir
-            os.path.join(os.path.dirname(self.comfyui_path), "extra_model_paths.yaml"),
-            # Current working directory
-            os.path.join(os.getcwd(), "extra_model_paths.yaml"),
-        ]
+        extra_paths_locations = _extra_model_paths_locations(self.comfyui_path)
         
         # Debug output to help troubleshoot
-        print("Searching for extra_model_paths.yaml in:")
+        logger.info("Searching for extra_model_paths.yaml in:")
         for path in extra_paths_locations:
-            print(f" - {path} {'(FOUND)' if os.path.exists(path) else '(not found)'}")
+            logger.info(" - %s %s", path, '(FOUND)' if os.path.exists(path) else '(not found)')
         
         extra_paths_file = None
         for path in extra_paths_locations:
@@ -86,15 +735,14 @@ class WorkflowParser:
         
         if extra_paths_file:
             try:
-                print(f"Loading model paths from {extra_paths_file}")
-                with open(extra_paths_file, 'r', encoding='utf-8') as f:
-                    yaml_data = yaml.safe_load(f)
+                logger.info("Loading model paths from %s", extra_paths_file)
+                yaml_data = self._load_extra_paths_yaml(extra_paths_file)
                 
                 if yaml_data:
                     # Process each UI configuration
                     for ui_name, ui_config in yaml_data.items():
                         if not isinstance(ui_config, dict) or 'base_path' not in ui_config:
-                            print(f"Warning: Invalid configuration for {ui_name}, skipping")
+                            logger.warning("Invalid configuration for %s, skipping", ui_name)
                             continue
                             
                         # Get and normalize base path
@@ -112,11 +760,11 @@ class WorkflowParser:
                             
                         # Verify the base path exists
                         if not os.path.exists(base_path):
-                            print(f"Warning: Base path does not exist: {base_path}")
+                            logger.warning("Base path does not exist: %s", base_path)
                             continue
                             
                         is_default = ui_config.get('is_default', False)
-                        print(f"Using base path for {ui_name}: {base_path} (default: {is_default})")
+                        logger.info("Using base path for %s: %s (default: %s)", ui_name, base_path, is_default)
                         
                         # Process each model type in the UI config
                         for model_type, rel_path in ui_config.items():
@@ -146,7 +794,7 @@ class WorkflowParser:
                                     else:
                                         full_path = os.path.abspath(os.path.join(base_path, path))
                                     
-                                    print(f" - Adding path for {model_type}: {full_path}")
+                                    logger.info(" - Adding path for %s: %s", model_type, full_path)
                                     
                                     # If this is the default UI, prioritize its paths
                                     if is_default:
@@ -154,16 +802,67 @@ class WorkflowParser:
                                     else:
                                         model_paths[model_type_normalized].append(full_path)
             except Exception as e:
-                print(f"Error loading extra_model_paths.yaml: {e}")
+                logger.error("Error loading extra_model_paths.yaml: %s", e)
                 import traceback
                 traceback.print_exc()
                 
         return model_paths
     
+    def _load_extra_paths_yaml(self, yaml_path: str) -> Any:
+        """
+        Load an extra_model_paths.yaml file, reusing a JSON copy of an earlier parse
+        
+        The parsed document is cached in CACHE_DIR and reused while the
+        file's mtime and size are unchanged, since JSON loads much faster
+        than YAML.
+        
+        Args:
+            yaml_path: Path to the YAML file
+            
+        Returns:
+            The parsed YAML document
+        """
+        stat = os.stat(yaml_path)
+        key = [stat.st_mtime_ns, stat.st_size]
+        cache_file = os.path.join(
+            CACHE_DIR,
+            f"model_paths_{hashlib.sha1(os.path.abspath(yaml_path).encode('utf-8')).hexdigest()[:16]}.json"
+        )
+        
+        if self.use_cache:
+            try:
+                cached = _load_json_file(cache_file)
+                if cached.get("key") == key:
+                    return cached["data"]
+            except Exception:
+                pass
+        
+        with open(yaml_path, 'r', encoding='utf-8') as f:
+            yaml_data = yaml.load(f, Loader=_SafeLoader)
+        
+        if self.use_cache:
+            # Write the cache atomically so concurrent runs never see a partial file;
+            # documents JSON can't represent (e.g. dates) are simply not cached
+            try:
+                data = json.dumps({"key": key, "data": yaml_data})
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(temp_path, cache_file)
+            except Exception:
+                pass
+        
+        return yaml_data
+    
     def _get_custom_node_packages(self) -> Dict[str, str]:
         """
         Get mapping of custom node identifiers to their installation paths
         
+        Only folder names are recorded here (naming variations of them are
+        matched by _find_variation_match); IDs declared inside a package are
+        added by _deep_scan_package when a workflow needs them.
+        
         Returns:
             Dictionary mapping custom node IDs to their paths
         """
@@ -173,96 +872,287 @@ class WorkflowParser:
         if not os.path.exists(custom_nodes_dir):
             return custom_node_packages
         
-        for node_package in os.listdir(custom_nodes_dir):
-            package_path = os.path.join(custom_nodes_dir, node_package)
-            if not os.path.isdir(package_path):
+        with os.scandir(custom_nodes_dir) as it:
+            package_entries = list(it)
+        
+        for entry in package_entries:
+            # Packages are often symlinked into custom_nodes, so links are followed here
+            if not entry.is_dir():
                 continue
+            node_package = entry.name
+            package_path = entry.path
                 
             # Use the folder name as an identifier (lowercase for case-insensitive matching)
             custom_node_packages[node_package.lower()] = package_path
+            self._package_dirs[node_package] = package_path
+            self._package_names[node_package.lower()] = package_path
+        
+        return custom_node_packages
+    
+    def _find_variation_match(self, node_id: str) -> Optional[str]:
+        """
+        Find the package whose folder name a node ID is a naming variation of
+        
+        Args:
+            node_id: Lowercase custom node ID
             
-            # Look for any metadata or configuration files that might have node IDs
-            metadata_files = [
-                os.path.join(package_path, "node_info.json"),
-                os.path.join(package_path, "manifest.json"),
-                os.path.join(package_path, "config.json"),
-                os.path.join(package_path, "package.json"),
-            ]
-            
-            for metadata_file in metadata_files:
-                if os.path.exists(metadata_file):
-                    try:
-                        with open(metadata_file, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                            
-                        # Extract ID information from metadata
-                        if isinstance(data, dict):
-                            for key in ['id', 'identifier', 'name', 'package_name']:
-                                if key in data and isinstance(data[key], str):
-                                    custom_node_packages[data[key].lower()] = package_path
-                                    
-                    except Exception:
-                        pass
+        Returns:
+            Path of the matching package, or None
+        """
+        for package_name in _package_name_candidates(node_id):
+            path = self._package_names.get(package_name)
+            if path:
+                return path
+        return None
+    
+    def _load_scan_cache(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Load the node IDs found by earlier runs
+        
+        Returns:
+            Dictionary mapping package paths to the states of their scanned
+            files and their node IDs, empty if there is no usable cache
+        """
+        try:
+            cached = _load_json_file(SCAN_CACHE_FILE)
+            if cached.get("version") == SCAN_CACHE_VERSION and cached.get("max_scan_bytes") == self.max_scan_bytes:
+                return cached["packages"]
+        except Exception:
+            pass
+        
+        return {}
+    
+    def _save_scan_cache(self) -> None:
+        """Write the node ID cache if packages were scanned since it was loaded"""
+        if not self.use_cache or not self._scan_cache_dirty:
+            return
+        
+        data = {"version": SCAN_CACHE_VERSION, "max_scan_bytes": self.max_scan_bytes, "packages": self._scan_cache}
+        
+        # Write the cache atomically so concurrent runs never see a partial file
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                f.write(orjson.dumps(data) if ORJSON_AVAILABLE else json.dumps(data).encode('utf-8'))
+            os.replace(temp_path, SCAN_CACHE_FILE)
+            self._scan_cache_dirty = False
+        except Exception:
+            pass
+    
+    def _deep_scan_package(self, node_package: str, package_path: str) -> Dict[str, str]:
+        """
+        Find the node IDs a package declares in its metadata and Python files
+        
+        Results are memoized per package, and reused from the on-disk cache
+        while the mtime and size of every file the scan reads are unchanged.
+        
+        Args:
+            node_package: Folder name of the package
+            package_path: Path to the package
             
-            # Search Python files for node IDs
-            for root, _, files in os.walk(package_path):
-                for file in files:
-                    if file.endswith('.py'):
-                        try:
-                            file_path = os.path.join(root, file)
-                            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                content = f.read()
-                                
-                            # Various patterns for node IDs in Python code
-                            id_patterns = [
-                                # Common pattern for ComfyUI node class mappings
-                                r'NODE_CLASS_MAPPINGS\s*\[\s*[\'"]([^\'"]+)[\'"]\s*\]',
-                                
-                                # Node identifiers
-                                r'cnr_id["\s\']+:\s*["\']([^"\']+)["\']',
-                                r'aux_id["\s\']+:\s*["\']([^"\']+)["\']',
-                                r'id_mapping\s*=\s*[\'"]([\w\d_\-\/]+)[\'"]',
-                                r'ID\s*=\s*[\'"]([\w\d_\-\/]+)[\'"]',
-                                
-                                # Class definitions that often correspond to node names
-                                r'class\s+([\w\d_]+)\s*\([\w\d_\.]+Node\s*\)',
-                                
-                                # Less specific patterns, but might catch some node IDs
-                                r'@inertia\.aat\(\s*[\'"]([\w\d_\-\/]+)[\'"]',
-                                r'register_node\s*\(\s*[\'"]([\w\d_\-\/]+)[\'"]',
-                            ]
-                            
-                            for pattern in id_patterns:
-                                matches = re.findall(pattern, content)
-                                for match in matches:
-                                    custom_node_packages[match.lower()] = package_path
-                                    # Also add with common prefixes/suffixes for better matching
-                                    if "/" not in match:
-                                        custom_node_packages[f"{node_package.lower()}/{match.lower()}"] = package_path
-                        except:
-                            # Silently ignore errors in reading files
-                            pass
-                            
-            # Add commonly used naming patterns based on folder name
-            package_name_lower = node_package.lower()
-            common_prefixes = ["", "comfyui-", "comfyui_", "sd-", "sd_"]
-            common_suffixes = ["", "-nodes", "_nodes", "-comfyui", "_comfyui"]
-            
-            for prefix in common_prefixes:
-                for suffix in common_suffixes:
-                    variation = f"{prefix}{package_name_lower}{suffix}"
-                    if variation != package_name_lower:
-                        custom_node_packages[variation] = package_path
+        Returns:
+            Dictionary mapping the declared node IDs to the package path
+        """
+        if package_path in self._deep_scanned:
+            return self._deep_scanned[package_path]
+        
+        # Look for any metadata or configuration files that might have node IDs
+        metadata_files = [
+            os.path.join(package_path, "node_info.json"),
+            os.path.join(package_path, "manifest.json"),
+            os.path.join(package_path, "config.json"),
+            os.path.join(package_path, "package.json"),
+        ]
+        py_files = list(_iter_py_files(package_path))
+        
+        # Editing a file doesn't change its directory's mtime, so the cache
+        # entry is checked against each file; the file list catches additions
+        file_states = _file_states(package_path, metadata_files + py_files) if self.use_cache else None
+        cached = self._scan_cache.get(package_path)
+        if cached and cached.get("files") == file_states:
+            package_ids = dict.fromkeys(cached["ids"], package_path)
+            self._deep_scanned[package_path] = package_ids
+            return package_ids
+        
+        package_ids = {}
+        
+        for metadata_file in metadata_files:
+            if os.path.exists(metadata_file):
+                try:
+                    data = _load_json_file(metadata_file)
                         
-                    # GitHub format: username/repo-name
-                    custom_node_packages[f"unknown/{variation}"] = package_path
+                    # Extract ID information from metadata
+                    if isinstance(data, dict):
+                        for key in ['id', 'identifier', 'name', 'package_name']:
+                            if key in data and isinstance(data[key], str):
+                                package_ids[data[key].lower()] = package_path
+                                
+                except Exception:
+                    pass
         
-        return custom_node_packages
+        # Search Python files for node IDs
+        for file_path in py_files:
+            try:
+                for match in _scan_file_node_ids(file_path, self.max_scan_bytes):
+                    package_ids[match.lower()] = package_path
+                    # Also add with common prefixes/suffixes for better matching
+                    if "/" not in match:
+                        package_ids[f"{node_package.lower()}/{match.lower()}"] = package_path
+            except:
+                # Silently ignore errors in reading files
+                pass
+        
+        self._deep_scanned[package_path] = package_ids
+        if file_states is not None:
+            self._scan_cache[package_path] = {"files": file_states, "ids": list(package_ids)}
+            self._scan_cache_dirty = True
+        return package_ids
+    
+    def _deep_scan_candidates(self, unresolved_ids: List[str]) -> None:
+        """
+        Deep-scan the packages that may provide unresolved node IDs
+        
+        Packages are scanned in two rounds. The likely ones go first: a
+        package is a candidate when a distinctive word of its folder name
+        (e.g. "impact" for ComfyUI-Impact-Pack) appears in one of the IDs.
+        If IDs are still unresolved after that, the remaining packages are
+        scanned too, since a package may declare node IDs that share no word
+        with its folder. Node types built into ComfyUI never come from a
+        package, so they don't trigger that fallback. Declared IDs are added
+        to custom_node_packages without replacing folder-name entries.
+        
+        Args:
+            unresolved_ids: Node IDs with no direct match yet
+        """
+        unscanned = [(node_package, package_path) for node_package, package_path in self._package_dirs.items()
+                     if package_path not in self._deep_scanned]
+        if not unscanned:
+            return
+        
+        candidates = []
+        for node_package, package_path in unscanned:
+            words = [word for word in _PACKAGE_WORD_SPLIT_RE.split(node_package.lower())
+                     if len(word) >= 3 and word not in _GENERIC_PACKAGE_WORDS]
+            if any(word in node_id for word in words for node_id in unresolved_ids):
+                candidates.append((node_package, package_path))
+        
+        scanned = self._scan_packages(candidates)
+        
+        # Fall back to every other package for custom IDs the candidates don't declare
+        found_ids = set()
+        for package_ids in scanned.values():
+            found_ids.update(package_ids)
+        if self._core_node_types is None:
+            self._core_node_types = _load_core_node_types(self.comfyui_path)
+        if any(node_id not in found_ids and node_id not in self._core_node_types for node_id in unresolved_ids):
+            candidate_paths = {package_path for _, package_path in candidates}
+            scanned.update(self._scan_packages([package for package in unscanned
+                                                if package[1] not in candidate_paths]))
+        
+        if not scanned:
+            return
+        
+        # Merge in directory order, whichever round scanned a package
+        for _, package_path in unscanned:
+            for node_id, path in scanned.get(package_path, {}).items():
+                if self._find_variation_match(node_id) is None:
+                    self.custom_node_packages.setdefault(node_id, path)
+        self._match_index = None
+    
+    def _scan_packages(self, packages: List[Tuple[str, str]]) -> Dict[str, Dict[str, str]]:
+        """
+        Deep-scan packages concurrently
+        
+        Args:
+            packages: (folder name, package path) pairs
+            
+        Returns:
+            Dictionary mapping package paths to the node IDs they declare
+        """
+        if not packages:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(SCAN_WORKERS, len(packages))) as executor:
+            results = executor.map(lambda package: self._deep_scan_package(*package), packages)
+            return {package_path: package_ids for (_, package_path), package_ids in zip(packages, results)}
+    
+    def _build_match_index(self) -> Tuple[List[str], str, List[int], Dict[str, int], Dict[str, int], Dict[str, int]]:
+        """
+        Index the keys of custom_node_packages for _find_partial_match
+        
+        Returns:
+            Tuple of (keys in order, keys joined by NUL, start offset of each
+            key in the joined string, key -> position, normalized key -> first
+            position, last path segment -> first position)
+        """
+        keys = list(self.custom_node_packages)
+        starts = []
+        offset = 0
+        for key in keys:
+            starts.append(offset)
+            offset += len(key) + 1
+        
+        positions = {key: i for i, key in enumerate(keys)}
+        normalized = {}
+        tails = {}
+        for i, key in enumerate(keys):
+            normalized.setdefault(key.replace('-', '_'), i)
+            tails.setdefault(key.split('/')[-1], i)
+        
+        return keys, '\0'.join(keys), starts, positions, normalized, tails
+    
+    def _find_partial_match(self, node_id: str) -> Optional[str]:
+        """
+        Find the first package ID (in insertion order) that partially matches a node ID
+        
+        A package ID matches if either ID contains the other, they are equal
+        after normalizing '-' to '_', or their last path segments are equal.
+        Index lookups replace a scan over every package ID.
+        
+        Args:
+            node_id: Lowercase node ID without a direct match
+            
+        Returns:
+            Path of the matching package, or None
+        """
+        if self._match_index is None:
+            self._match_index = self._build_match_index()
+        keys, joined, starts, positions, normalized, tails = self._match_index
+        
+        candidates = []
+        
+        # First package ID containing the node ID; a NUL-free ID can't span two keys
+        if '\0' not in node_id:
+            found = joined.find(node_id)
+            if found >= 0:
+                candidates.append(bisect.bisect_right(starts, found) - 1)
+        
+        # Package IDs contained in the node ID are among its substrings
+        length = len(node_id)
+        for start in range(length):
+            for end in range(start + 1, length + 1):
+                position = positions.get(node_id[start:end])
+                if position is not None:
+                    candidates.append(position)
+        
+        position = normalized.get(node_id.replace('-', '_'))
+        if position is not None:
+            candidates.append(position)
+        position = tails.get(node_id.split('/')[-1])
+        if position is not None:
+            candidates.append(position)
+        
+        if not candidates:
+            return None
+        return self.custom_node_packages[keys[min(candidates)]]
     
     def parse_workflow(self, workflow_path: str) -> Dict[str, Any]:
         """
         Parse a workflow file to extract model and custom node dependencies
         
+        Results are cached per parser and reused while the file's mtime and
+        size are unchanged.
+        
         Args:
             workflow_path: Path to the workflow JSON file
             
@@ -277,6 +1167,35 @@ class WorkflowParser:
                 }
             }
         """
+        try:
+            stat = os.stat(workflow_path)
+        except OSError:
+            return self._parse_workflow_file(workflow_path)
+        
+        cached = self._result_cache.get(workflow_path)
+        if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            self._result_cache.move_to_end(workflow_path)
+            return copy.deepcopy(cached[2])
+        
+        result = self._parse_workflow_file(workflow_path)
+        
+        self._result_cache[workflow_path] = (stat.st_mtime_ns, stat.st_size, result)
+        self._result_cache.move_to_end(workflow_path)
+        if len(self._result_cache) > RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+        
+        return copy.deepcopy(result)
+    
+    def _parse_workflow_file(self, workflow_path: str) -> Dict[str, Any]:
+        """
+        Parse a workflow file without consulting the result cache
+        
+        Args:
+            workflow_path: Path to the workflow JSON file
+            
+        Returns:
+            Dictionary with parsed dependencies, as for parse_workflow
+        """
         result = {
             'custom_nodes': [],
             'models': {}
@@ -287,38 +1206,26 @@ class WorkflowParser:
             result['models'][model_type] = []
         
         try:
-            with open(workflow_path, 'r', encoding='utf-8') as f:
-                workflow = json.load(f)
-            
-            # Handle different workflow formats
-            if isinstance(workflow, dict):
-                if 'nodes' in workflow:
-                    # Standard ComfyUI format
-                    nodes = workflow['nodes']
-                elif 'workflow' in workflow and isinstance(workflow['workflow'], dict) and 'nodes' in workflow['workflow']:
-                    # Nested format sometimes used
-                    nodes = workflow['workflow']['nodes']
-                else:
-                    # Try to find an array of nodes at any top level key
-                    nodes = None
-                    for key, value in workflow.items():
-                        if isinstance(value, list) and len(value) > 0 and isinstance(value[0], dict) and 'type' in value[0]:
-                            nodes = value
-                            break
-                    
-                    if nodes is None:
-                        print(f"Warning: Could not identify nodes structure in {workflow_path}")
-                        return result
-            elif isinstance(workflow, list) and len(workflow) > 0 and isinstance(workflow[0], dict):
-                # Some workflows might just be an array of nodes
-                nodes = workflow
-            else:
-                print(f"Warning: Unknown workflow format in {workflow_path}")
-                return result
+            # Large workflows are streamed, keeping only the node fields used below
+            nodes = None
+            if IJSON_AVAILABLE and os.path.getsize(workflow_path) >= STREAMING_THRESHOLD:
+                nodes = _stream_workflow_nodes(workflow_path)
+            
+            if nodes is None:
+                workflow = _load_json_file(workflow_path)
+                
+                # Handle different workflow formats
+                nodes = _find_workflow_nodes(workflow)
+                if nodes is None:
+                    if isinstance(workflow, dict):
+                        logger.warning("Could not identify nodes structure in %s", workflow_path)
+                    else:
+                        logger.warning("Unknown workflow format in %s", workflow_path)
+                    return result
                 
             # Track custom node IDs and models
             custom_node_ids = set()
-            found_models = {}
+            found_models = defaultdict(set)
             
             # Track node types to find custom nodes that don't explicitly declare themselves
             node_types = set()
@@ -328,104 +1235,85 @@ class WorkflowParser:
                 if not isinstance(node, dict):
                     continue
                 
+                # Each field is looked up once and reused below
+                node_type = node.get('type')
+                props = node.get('properties')
+                values = node.get('widgets_values')
+                
                 # Keep track of all node types
-                if 'type' in node:
-                    node_types.add(node['type'].lower())
+                if node_type is None:
+                    node_type = ''
+                else:
+                    node_type = node_type.lower()
+                    node_types.add(node_type)
                 
                 # Extract custom node package ID
-                if 'properties' in node and isinstance(node['properties'], dict):
-                    props = node['properties']
-                    
+                if isinstance(props, dict):
                     # Look for custom node identifiers in properties
-                    for id_key in ['cnr_id', 'aux_id', 'Node name for S&R', 'custom_node_id', 'node_id']:
-                        if id_key in props and props[id_key]:
-                            node_id = props[id_key]
-                            if isinstance(node_id, str) and node_id.strip():
-                                custom_node_ids.add(node_id.lower())
+                    for id_key in _NODE_ID_KEYS:
+                        node_id = props.get(id_key)
+                        if node_id and isinstance(node_id, str) and node_id.strip():
+                            custom_node_ids.add(node_id.lower())
                 
                 # Extract model paths from widgets
-                if 'widgets_values' in node and isinstance(node['widgets_values'], list):
-                    values = node['widgets_values']
-                    
+                if isinstance(values, list):
                     # Determine model type from node type
-                    node_type = node.get('type', '').lower()
                     model_type = self._guess_model_type(node_type)
                     
                     # Check if any widget value looks like a model path
                     for value_idx, value in enumerate(values):
-                        if not isinstance(value, str) or not value:
-                            continue
-                            
-                        # Skip values that are clearly not model files
-                        if value.lower() in ('randomize', 'true', 'false', 'enable', 'disable', 'none'):
-                            continue
-                        
-                        # Skip very short values
-                        if len(value) < 5:
+                        # Cheap rejections first: non-strings and very short values
+                        # (flags such as 'true' or 'randomize' fail the extension check)
+                        if type(value) is not str or len(value) < 5:
                             continue
                             
                         # If it has a file extension that looks like a model, add it
-                        model_extensions = ('.safetensors', '.ckpt', '.pt', '.pth', '.bin', '.onnx', '.msgpack')
-                        if any(value.lower().endswith(ext) for ext in model_extensions):
+                        if _has_model_extension(value):
                             # If we didn't guess the model type from the node, try from the extension
                             if not model_type:
                                 model_type = self._guess_model_type_from_filename(value)
                             
                             if model_type:
                                 # Store model in the category
-                                if model_type not in found_models:
-                                    found_models[model_type] = set()
                                 found_models[model_type].add(value)
                                 
                                 # Try to determine model type based on widget index and node type
                                 # This helps with nodes that load multiple model types
                                 alt_type = self._refine_model_type(node_type, value_idx, len(values), value)
                                 if alt_type and alt_type != model_type:
-                                    if alt_type not in found_models:
-                                        found_models[alt_type] = set()
                                     found_models[alt_type].add(value)
             
             # Check node types against known custom nodes
             # Some custom nodes don't declare themselves but have distinct node types
             for node_type in node_types:
                 # Skip basic node types likely to be part of core ComfyUI
-                if node_type in ('note', 'reroute', 'primitive', 'output', 'input'):
+                if node_type in _CORE_NODE_TYPES:
                     continue
                     
                 # Add variations of the node type as potential custom node IDs
-                custom_node_ids.add(node_type)
-                
-                # Some common patterns for node types
-                parts = node_type.split('_')
-                if len(parts) > 1:
-                    # Try prefix as potential package name
-                    custom_node_ids.add(parts[0])
-                    custom_node_ids.add(f"{parts[0]}/{node_type}")
-                    
-                    # If 3+ parts, try first two as package
-                    if len(parts) >= 3:
-                        prefix = f"{parts[0]}_{parts[1]}"
-                        custom_node_ids.add(prefix)
-                        custom_node_ids.add(f"{prefix}/{node_type}")
+                custom_node_ids.update(_node_type_variants(node_type))
+            
+            # Scan the sources of likely packages for IDs not matched by folder name
+            unresolved_ids = [node_id for node_id in custom_node_ids
+                              if node_id not in self.custom_node_packages and self._find_variation_match(node_id) is None]
+            if unresolved_ids:
+                self._deep_scan_candidates(unresolved_ids)
+                self._save_scan_cache()
             
             # Resolve custom node paths from IDs
             resolved_nodes = set()
             for node_id in custom_node_ids:
-                # Check for direct match
-                if node_id in self.custom_node_packages:
-                    path = self.custom_node_packages[node_id]
-                    package_name = os.path.basename(path)
+                # Check for direct match, then for a variation of a package folder name
+                path = self.custom_node_packages.get(node_id) or self._find_variation_match(node_id)
+                if path:
+                    package_name = self._basename_cache[path]
                     resolved_nodes.add((package_name, path))
                 else:
                     # Check for partial matches
-                    for package_id, path in self.custom_node_packages.items():
-                        # Various matching strategies
-                        if (node_id in package_id or package_id in node_id or
-                            node_id.replace('-', '_') == package_id.replace('-', '_') or
-                            node_id.split('/')[-1] == package_id.split('/')[-1]):
-                            package_name = os.path.basename(path)
-                            resolved_nodes.add((package_name, path))
-                            break
+                    path = self._find_partial_match(node_id)
+                    if path:
+                        package_name = self._basename_cache[path]
+                        resolved_nodes.add((package_name, path))
             
             result['custom_nodes'] = list(resolved_nodes)
             
@@ -443,7 +1331,7 @@ class WorkflowParser:
             return result
             
         except Exception as e:
-            print(f"Error parsing workflow: {e}")
+            logger.error("Error parsing workflow: %s", e)
             import traceback
             traceback.print_exc()
             return result
@@ -460,91 +1348,18 @@ class WorkflowParser:
         """
         node_type = node_type.lower()
         
-        # Map node types to model types - expanded for better coverage
-        type_mapping = {
-            # Checkpoints
-            'checkpoint': 'checkpoints',
-            'checkpointloader': 'checkpoints', 
-            'load': 'checkpoints',
-            'sdxl': 'checkpoints',
-            'model': 'checkpoints',
-            'loadcheckpoint': 'checkpoints',
-            'diffus': 'checkpoints',
-            
-            # VAEs
-            'vae': 'vae',
-            'vaeloader': 'vae',
-            'loadvae': 'vae',
-            'variational': 'vae',
-            'encoder': 'vae',
-            'decoder': 'vae',
-            
-            # CLIP models
-            'clip': 'clip',
-            'loadclip': 'clip',
-            'cliploader': 'clip',
-            
-            # CLIP Vision
-            'clipvision': 'clip_vision',
-            'visionloader': 'clip_vision',
-            'loadcv': 'clip_vision',
-            
-            # LoRAs
-            'lora': 'loras',
-            'loraloader': 'loras',
-            'loadlora': 'loras',
-            'loha': 'loras',
-            'lycoris': 'loras',
-            
-            # Embeddings
-            'embedding': 'embeddings',
-            'textualinversion': 'embeddings',
-            'loadembedding': 'embeddings',
-            'ti': 'embeddings',
-            
-            # Hypernetworks
-            'hypernetwork': 'hypernetworks',
-            'loadhyper': 'hypernetworks',
-            
-            # ControlNet
-            'controlnet': 'controlnet',
-            'loadcontrol': 'controlnet',
-            'control': 'controlnet',
-            
-            # Upscalers
-            'upscale': 'upscale_models',
-            'upscaler': 'upscale_models',
-            'esrgan': 'upscale_models',
-            'loadupscale': 'upscale_models',
-            
-            # Face models
-            'facedetection': 'insightface',
-            'insightface': 'insightface',
-            'facerestore': 'facerestore_models',
-            'gfpgan': 'facerestore_models',
-            'codeformer': 'facerestore_models',
-            
-            # Object detection
-            'ultralytics': 'ultralytics',
-            'yolo': 'ultralytics',
-            'detection': 'ultralytics',
-            
-            # Text models
-            'llm': 'llm',
-            'textgen': 'llm',
-            'languagemodel': 'llm',
-            
-            # Segmentation
-            'sam': 'sams',
-            'segment': 'sams',
-            'segmentanything': 'sams',
-        }
+        model_type = self._model_type_cache.get(node_type, False)
+        if model_type is not False:
+            return model_type
         
-        for key, value in type_mapping.items():
+        model_type = None
+        for key, value in _NODE_TYPE_MODEL_TYPES.items():
             if key in node_type:
-                return value
-                
-        return None
+                model_type = value
+                break
+        
+        self._model_type_cache[node_type] = model_type
+        return model_type
     
     def _guess_model_type_from_filename(self, filename: str) -> Optional[str]:
         """
@@ -557,46 +1372,65 @@ class WorkflowParser:
             The guessed model type or None
         """
         filename = filename.lower()
+        extension = filename[filename.rfind('.') + 1:] if '.' in filename else ''
+        
+        # Path markers such as '/embeddings/' or '/clip_vision/' contain the
+        # shorter markers tested here, so they need no separate checks
         
         # Checkpoints and LoRAs usually have these extensions
-        if filename.endswith('.safetensors') or filename.endswith('.ckpt'):
+        if extension in ('safetensors', 'ckpt'):
             # Try to determine by filename patterns
             if 'lora' in filename:
                 return 'loras'
             elif 'vae' in filename:
                 return 'vae'
-            elif 'embedding' in filename or 'embed' in filename or '/embeddings/' in filename:
+            elif 'embed' in filename:
                 return 'embeddings'
             elif 'controlnet' in filename or 'control_' in filename or '/control/' in filename:
                 return 'controlnet'
             elif 'inpaint' in filename and not ('sd15_inpaint' in filename or 'sd_inpaint' in filename):
                 # Likely a controlnet inpaint model
                 return 'controlnet'
-            elif 'clip' in filename and ('vision' in filename or '/clip_vision/' in filename):
-                return 'clip_vision'
-            elif 'clip' in filename or '/clip/' in filename:
-                return 'clip'
+            elif 'clip' in filename:
+                return 'clip_vision' if 'vision' in filename else 'clip'
             else:
                 return 'checkpoints'  # Default for .safetensors/.ckpt
         
         # Other model types
-        elif filename.endswith('.pt') or filename.endswith('.pth'):
-            if 'sam' in filename or '/sam/' in filename:
+        elif extension in ('pt', 'pth'):
+            if 'sam' in filename:
                 return 'sams'
-            elif ('gfpgan' in filename or 'codeformer' in filename or 
-                  'face' in filename or '/facerestore/' in filename):
+            elif 'gfpgan' in filename or 'codeformer' in filename or 'face' in filename:
                 return 'facerestore_models'
-            elif ('upscale' in filename or 'esrgan' in filename or 
-                 '/upscaler/' in filename or '/upscale_models/' in filename):
+            elif 'upscale' in filename or 'esrgan' in filename:
                 return 'upscale_models'
             
-        elif filename.endswith('.onnx'):
-            if 'inswapper' in filename or 'insight' in filename or '/insightface/' in filename:
+        elif extension == 'onnx':
+            if 'inswapper' in filename or 'insight' in filename:
                 return 'insightface'
                 
         # When in doubt, default to checkpoints
         return 'checkpoints'
     
+    def _refine_categories(self, node_type: str) -> Tuple[Tuple[str, int], ...]:
+        """
+        Get the refinement categories a node type matches, computed once per type
+        
+        Args:
+            node_type: Lowercase node type
+            
+        Returns:
+            (category, min_values) pairs in _REFINE_CATEGORIES order
+        """
+        categories = self._refine_category_cache.get(node_type)
+        if categories is None:
+            categories = tuple(
+                (category, min_values) for category, markers, min_values in _REFINE_CATEGORIES
+                if any(marker in node_type for marker in markers)
+            )
+            self._refine_category_cache[node_type] = categories
+        return categories
+    
     def _refine_model_type(self, node_type: str, value_idx: int, total_values: int, value: str) -> Optional[str]:
         """
         Refine model type based on widget position and other heuristics
@@ -610,11 +1444,19 @@ class WorkflowParser:
         Returns:
             Refined model type or None
         """
-        node_type = node_type.lower()
+        # The first category the node has enough widgets for decides
+        category = None
+        for name, min_values in self._refine_categories(node_type.lower()):
+            if total_values >= min_values:
+                category = name
+                break
+        if category is None:
+            return None
+        
         value = value.lower()
         
         # Handle multi-model nodes like LoRA loaders
-        if ('lora' in node_type or 'lycoris' in node_type) and total_values >= 3:
+        if category == 'lora':
             # First value in LoRA nodes is usually the model/checkpoint
             if value_idx == 0 and ('checkpoint' in value or not any(x in value for x in ['lora', 'lyco'])):
                 return 'checkpoints'
@@ -623,18 +1465,18 @@ class WorkflowParser:
                 return 'loras'
         
         # ControlNet nodes often have the controlnet as one param and the model as another
-        elif 'control' in node_type and total_values >= 2:
+        elif category == 'control':
             if value_idx == 0 and ('sd' in value or 'stable' in value):
                 return 'checkpoints'
             elif 'control' in value or value_idx == 1:
                 return 'controlnet'
         
         # Upscalers often have multiple models
-        elif 'upscale' in node_type and total_values >= 2:
+        elif category == 'upscale':
             return 'upscale_models'
             
         # Some nodes handle multiple model types
-        elif 'loader' in node_type and total_values >= 2:
+        elif category == 'loader':
             # Try to determine from value itself
             if 'vae' in value:
                 return 'vae'
@@ -647,10 +1489,266 @@ class WorkflowParser:
         
         return None
     
+    def _model_dir_names(self, base_path: str) -> Set[str]:
+        """
+        Get the entry names of a model directory, listing it at most once per change.
+        
+        Names are normalized with os.path.normcase so lookups behave like
+        os.path.exists on case-insensitive filesystems.
+        
+        Args:
+            base_path: Model directory to list
+            
+        Returns:
+            Set of normalized entry names, empty if the directory can't be read
+        """
+        try:
+            mtime_ns = os.stat(base_path).st_mtime_ns
+        except OSError:
+            return set()
+        
+        cached = self._model_dir_entries.get(base_path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        
+        try:
+            with os.scandir(base_path) as entries:
+                names = {os.path.normcase(entry.name) for entry in entries}
+        except OSError:
+            names = set()
+        
+        self._model_dir_entries[base_path] = (mtime_ns, names)
+        return names
+    
+    def _find_in_model_dir(self, base_path: str, filenames: Sequence[str]) -> Optional[str]:
+        """
+        Find the first of several filenames directly inside a model directory.
+        
+        Args:
+            base_path: Model directory to look in
+            filenames: Candidate filenames, in order of preference
+            
+        Returns:
+            Path of the first candidate present, or None
+        """
+        names = self._model_dir_names(base_path)
+        if not names:
+            return None
+        for filename in filenames:
+            if os.path.normcase(filename) in names:
+                return os.path.join(base_path, filename)
+        return None
+    
+    def _cached_listdir(self, path: str) -> List[Tuple[str, bool]]:
+        """
+        List a model directory once per parser (until refresh)
+        
+        Args:
+            path: Directory to list
+            
+        Returns:
+            (name, is_dir) for each entry, in os.listdir order
+            
+        Raises:
+            OSError: If the directory can't be listed (not cached)
+        """
+        entries = self._listdir_cache.get(path)
+        if entries is None:
+            with os.scandir(path) as it:
+                entries = [(entry.name, entry.is_dir()) for entry in it]
+            self._listdir_cache[path] = entries
+        return entries
+    
+    def _cached_walk(self, path: str) -> List[Tuple[str, List[str], List[str]]]:
+        """
+        Walk a model directory tree once per parser (until refresh)
+        
+        A tree inside one already walked (e.g. models/checkpoints after
+        models/) is taken from that walk instead of being read again.
+        
+        Args:
+            path: Top of the tree
+            
+        Returns:
+            The (root, dirs, files) tuples of _walk_model_dir
+        """
+        walk = self._walk_cache.get(path)
+        if walk is None:
+            walk = self._walk_from_ancestor(path)
+            if walk is None:
+                walk = _walk_model_dir(path)
+            self._walk_cache[path] = walk
+        return walk
+    
+    def _walk_from_ancestor(self, path: str) -> Optional[List[Tuple[str, List[str], List[str]]]]:
+        """
+        Cut the walk of a directory out of a cached walk of an ancestor
+        
+        Args:
+            path: Top of the tree
+            
+        Returns:
+            The walk of path, or None if no cached walk covers it (including
+            when the walk pruned or didn't follow it)
+        """
+        path = os.path.normpath(path)
+        for top, top_walk in self._walk_cache.items():
+            if not path.startswith(os.path.join(os.path.normpath(top), '')):
+                continue
+            # Top-down walks list a subtree contiguously, starting at its root
+            prefix = os.path.join(path, '')
+            for start, (root, _, _) in enumerate(top_walk):
+                if os.path.normpath(root) == path:
+                    end = start + 1
+                    while end < len(top_walk) and os.path.normpath(top_walk[end][0]).startswith(prefix):
+                        end += 1
+                    return top_walk[start:end]
+        return None
+    
+    def _prefetch_walks(self, paths: List[str]) -> None:
+        """
+        Walk the model directory trees not walked yet, in parallel
+        
+        The walks are independent and I/O-bound, so threads overlap them on
+        slow or network storage. Results land in the walk cache; callers still
+        search the trees in their own order.
+        
+        Args:
+            paths: Model directories about to be searched recursively
+        """
+        pending = [path for path in dict.fromkeys(paths)
+                   if path not in self._walk_cache and os.path.isdir(path)]
+        # Nested paths are cut from their ancestor's walk afterwards
+        pending = [path for path in pending
+                   if not any(os.path.normpath(path).startswith(os.path.join(os.path.normpath(other), ''))
+                              for other in pending if other != path)]
+        if len(pending) < 2:
+            return
+        with ThreadPoolExecutor(max_workers=min(SCAN_WORKERS, len(pending))) as executor:
+            for path, walk in zip(pending, executor.map(_walk_model_dir, pending)):
+                self._walk_cache[path] = walk
+    
+    def _model_file_index(self, base_path: str) -> Dict[str, List[Tuple[int, str]]]:
+        """
+        Index the files under a model directory by lowercase name
+        
+        Args:
+            base_path: Top of the model directory tree
+            
+        Returns:
+            Dictionary mapping lowercase filenames to (walk position, path)
+            pairs, in os.walk order
+        """
+        index = self._model_index.get(base_path)
+        if index is None:
+            index = {}
+            position = 0
+            for root, _, files in self._cached_walk(base_path):
+                for file in files:
+                    index.setdefault(file.lower(), []).append((position, os.path.join(root, file)))
+                    position += 1
+            self._model_index[base_path] = index
+        return index
+    
+    def _subdirs_by_name(self, base_path: str) -> Dict[str, List[str]]:
+        """
+        Index the immediate subdirectories of a model directory by lowercase name
+        
+        Args:
+            base_path: Model directory
+            
+        Returns:
+            Dictionary mapping lowercase names to subdirectory names, in
+            os.listdir order
+            
+        Raises:
+            OSError: If the directory can't be listed
+        """
+        index = self._subdir_index.get(base_path)
+        if index is None:
+            index = {}
+            for name, is_dir in self._cached_listdir(base_path):
+                if is_dir:
+                    index.setdefault(name.lower(), []).append(name)
+            self._subdir_index[base_path] = index
+        return index
+    
+    def _tree_dirs_by_name(self, base_path: str) -> Dict[str, List[str]]:
+        """
+        Index the directories anywhere under a model directory by lowercase name
+        
+        Args:
+            base_path: Top of the model directory tree
+            
+        Returns:
+            Dictionary mapping lowercase names to directory paths, in os.walk order
+        """
+        index = self._tree_dir_index.get(base_path)
+        if index is None:
+            index = {}
+            for root, dirs, _ in self._cached_walk(base_path):
+                for dir_name in dirs:
+                    index.setdefault(dir_name.lower(), []).append(os.path.join(root, dir_name))
+            self._tree_dir_index[base_path] = index
+        return index
+    
+    def _find_in_model_tree(self, base_path: str, lowered_filenames: Set[str]) -> List[str]:
+        """
+        Find files anywhere under a model directory by case-insensitive name
+        
+        Args:
+            base_path: Top of the model directory tree
+            lowered_filenames: Lowercase filenames to look for
+            
+        Returns:
+            Paths of the matching files, in the order os.walk finds them
+        """
+        index = self._model_file_index(base_path)
+        matches = [match for name in lowered_filenames for match in index.get(name, ())]
+        matches.sort()
+        return [path for _, path in matches]
+    
+    def refresh(self) -> None:
+        """
+        Forget cached model directory listings, resolved models and parse results
+        
+        Call this when reusing a parser after models may have been added or
+        removed, e.g. across sessions.
+        """
+        self._listdir_cache.clear()
+        self._walk_cache.clear()
+        self._model_index.clear()
+        self._subdir_index.clear()
+        self._tree_dir_index.clear()
+        self._resolve_cache.clear()
+        self._model_dir_entries.clear()
+        self._result_cache.clear()
+    
     def _resolve_model_path(self, model_type: str, model_name: str) -> Optional[str]:
         """
         Resolve a model name to its actual file path.
         
+        Results, including models that weren't found, are cached per parser
+        until refresh().
+        
+        Args:
+            model_type: Type of the model (checkpoints, vae, etc.)
+            model_name: Name of the model file
+            
+        Returns:
+            Full path to the model file or None if not found
+        """
+        key = (model_type, model_name)
+        path = self._resolve_cache.get(key, False)
+        if path is False:
+            path = self._locate_model_path(model_type, model_name)
+            self._resolve_cache[key] = path
+        return path
+    
+    def _locate_model_path(self, model_type: str, model_name: str) -> Optional[str]:
+        """
+        Search the model directories for a model, without the resolution cache
+        
         Args:
             model_type: Type of the model (checkpoints, vae, etc.)
             model_name: Name of the model file
@@ -659,34 +1757,26 @@ class WorkflowParser:
             Full path to the model file or None if not found
         """
         # Debug information
-        print(f"Trying to locate model '{model_name}' of type '{model_type}'...")
+        logger.debug("Trying to locate model '%s' of type '%s'...", model_name, model_type)
         
         # Special case: if it's an absolute path and exists, return it directly
         if os.path.isabs(model_name) and os.path.exists(model_name):
-            print(f"  Found as absolute path: {model_name}")
+            logger.debug("Found as absolute path: %s", model_name)
             return model_name
         
         # Check if the type is available in our paths
         if model_type not in self.model_paths:
             # Try alternate types for common confusions
-            alternate_types = []
-            if model_type == 'checkpoints':
-                alternate_types = ['checkpoint', 'stable-diffusion', 'sd']
-            elif model_type == 'loras':
-                alternate_types = ['lora', 'locon', 'lycoris']
-            elif model_type == 'vae':
-                alternate_types = ['vae_approx', 'vaes']
-            
             # Check if any alternates exist in our paths
-            for alt_type in alternate_types:
+            for alt_type in _MODEL_TYPE_ALIASES.get(model_type, ()):
                 if alt_type in self.model_paths:
-                    print(f"  Using alternate type {alt_type} instead of {model_type}")
+                    logger.debug("Using alternate type %s instead of %s", alt_type, model_type)
                     model_type = alt_type
                     break
             
             # If still not available
             if model_type not in self.model_paths:
-                print(f"  No paths configured for model type: {model_type}")
+                logger.debug("No paths configured for model type: %s", model_type)
                 return None
         
         # Normalize model type
@@ -707,57 +1797,42 @@ class WorkflowParser:
         if has_subdir:
             model_subdir = os.path.dirname(model_name)
             base_filename = os.path.basename(model_name)
-            print(f"  Model appears to be in subdirectory: {model_subdir}")
-        
-        # Create a list of possible filenames (to handle case sensitivity and minor differences)
-        possible_filenames = [
-            base_filename,                                # Original filename
-            base_filename.lower(),                        # Lowercase
-            base_filename.replace(' ', '_'),              # Replace spaces with underscores
-            base_filename.lower().replace(' ', '_'),      # Lowercase + underscores
-            base_filename.replace('_', ' '),              # Replace underscores with spaces
-            base_filename.lower().replace('_', ' '),      # Lowercase + spaces
-            # Add model extensions if not present
-            f"{os.path.splitext(base_filename)[0]}.safetensors" if not base_filename.endswith('.safetensors') else None,
-            f"{os.path.splitext(base_filename)[0]}.ckpt" if not base_filename.endswith('.ckpt') else None,
-            f"{os.path.splitext(base_filename)[0]}.pt" if not base_filename.endswith('.pt') else None,
-        ]
-        # Filter out None values
-        possible_filenames = [f for f in possible_filenames if f]
+            logger.debug("Model appears to be in subdirectory: %s", model_subdir)
+        
+        # Possible filenames (to handle case sensitivity and minor differences)
+        possible_filenames = _filename_variations(base_filename)
+        # Recursive searches match filenames case-insensitively
+        lowered_filenames = {f.lower() for f in possible_filenames}
         
         # Step 1: First try exact match with the full path including subdirectory
-        print(f"  Trying exact match with {len(self.model_paths[model_type])} base paths...")
+        logger.debug("Trying exact match with %s base paths...", len(self.model_paths[model_type]))
         for base_path in self.model_paths[model_type]:
             # Try exact path first
             model_path = os.path.join(base_path, model_name)
-            if os.path.exists(model_path):
-                print(f"  Found exact match: {model_path}")
+            if self._find_in_model_dir(os.path.dirname(model_path), [os.path.basename(model_path)]):
+                logger.debug("Found exact match: %s", model_path)
                 return model_path
         
         # Step 2: If we have a subdirectory, try looking for it specifically
         if has_subdir:
-            print(f"  Checking for subdirectory '{model_subdir}' in base paths...")
+            logger.debug("Checking for subdirectory '%s' in base paths...", model_subdir)
             for base_path in self.model_paths[model_type]:
-                potential_dir = os.path.join(base_path, model_subdir)
-                if os.path.isdir(potential_dir):
-                    for possible_name in possible_filenames:
-                        file_path = os.path.join(potential_dir, possible_name)
-                        if os.path.exists(file_path):
-                            print(f"  Found in subdirectory: {file_path}")
-                            return file_path
+                file_path = self._find_in_model_dir(os.path.join(base_path, model_subdir), possible_filenames)
+                if file_path:
+                    logger.debug("Found in subdirectory: %s", file_path)
+                    return file_path
         
         # Step 3: Check direct match for the filename in base directories
-        print(f"  Trying all {len(possible_filenames)} filename variations directly in base dirs...")
+        logger.debug("Trying all %s filename variations directly in base dirs...", len(possible_filenames))
         for base_path in self.model_paths[model_type]:
-            for possible_name in possible_filenames:
-                direct_path = os.path.join(base_path, possible_name)
-                if os.path.exists(direct_path):
-                    print(f"  Found direct match: {direct_path}")
-                    return direct_path
+            direct_path = self._find_in_model_dir(base_path, possible_filenames)
+            if direct_path:
+                logger.debug("Found direct match: %s", direct_path)
+                return direct_path
                 
         # Step 4: Try searching for subdirectories with similar names
         if has_subdir:
-            print(f"  Checking for similar subdirectory names...")
+            logger.debug("Checking for similar subdirectory names...")
             subdir_lower = model_subdir.lower()
             for base_path in self.model_paths[model_type]:
                 # Skip if base path doesn't exist
@@ -766,137 +1841,158 @@ class WorkflowParser:
                     
                 try:
                     # Look for subdirectories with names that are similar
-                    for item in os.listdir(base_path):
-                        if os.path.isdir(os.path.join(base_path, item)) and item.lower() == subdir_lower:
-                            potential_dir = os.path.join(base_path, item)
-                            for possible_name in possible_filenames:
-                                file_path = os.path.join(potential_dir, possible_name)
-                                if os.path.exists(file_path):
-                                    print(f"  Found in similar subdirectory: {file_path}")
-                                    return file_path
+                    for item in self._subdirs_by_name(base_path).get(subdir_lower, ()):
+                        file_path = self._find_in_model_dir(os.path.join(base_path, item), possible_filenames)
+                        if file_path:
+                            logger.debug("Found in similar subdirectory: %s", file_path)
+                            return file_path
                 except Exception as e:
-                    print(f"  Error checking subdirectories in {base_path}: {e}")
+                    logger.warning("Error checking subdirectories in %s: %s", base_path, e)
         
         # Step 5: Look in any immediate subdirectories (one level)  
-        print("  Checking immediate subdirectories...")
+        logger.debug("Checking immediate subdirectories...")
         for base_path in self.model_paths[model_type]:
             try:
                 if not os.path.exists(base_path):
                     continue
                     
-                for item in os.listdir(base_path):
+                for item, is_dir in self._cached_listdir(base_path):
                     subdir = os.path.join(base_path, item)
-                    if os.path.isdir(subdir):
-                        for possible_name in possible_filenames:
-                            subdir_path = os.path.join(subdir, possible_name)
-                            if os.path.exists(subdir_path):
-                                print(f"  Found in immediate subdirectory: {subdir_path}")
-                                return subdir_path
+                    if is_dir:
+                        subdir_path = self._find_in_model_dir(subdir, possible_filenames)
+                        if subdir_path:
+                            logger.debug("Found in immediate subdirectory: %s", subdir_path)
+                            return subdir_path
                                 
                         # If we have a subdirectory in the model name, also check in this subdir
                         if has_subdir:
-                            nested_dir = os.path.join(subdir, model_subdir)
-                            if os.path.isdir(nested_dir):
-                                for possible_name in possible_filenames:
-                                    nested_path = os.path.join(nested_dir, possible_name)
-                                    if os.path.exists(nested_path):
-                                        print(f"  Found in nested subdirectory: {nested_path}")
-                                        return nested_path
+                            nested_path = self._find_in_model_dir(os.path.join(subdir, model_subdir), possible_filenames)
+                            if nested_path:
+                                logger.debug("Found in nested subdirectory: %s", nested_path)
+                                return nested_path
             except Exception as e:
-                print(f"  Error checking subdirectories in {base_path}: {e}")
+                logger.warning("Error checking subdirectories in %s: %s", base_path, e)
                 
         # Step 6: Deep search - walk the directory structure
-        print("  Starting deep recursive search for model file...")
+        logger.debug("Starting deep recursive search for model file...")
+        self._prefetch_walks(self.model_paths[model_type])
         for base_path in self.model_paths[model_type]:
             try:
                 if not os.path.exists(base_path):
-                    print(f"  Base path does not exist: {base_path}")
+                    logger.debug("Base path does not exist: %s", base_path)
                     continue
                     
                 # When searching for a model with a subdirectory, we've got two search strategies:
                 
                 # 1. Search for the exact file in any subdirectory
-                for root, dirs, files in os.walk(base_path):
-                    for file in files:
-                        if file in possible_filenames or file.lower() in [f.lower() for f in possible_filenames]:
-                            found_path = os.path.join(root, file)
-                            # If looking for a file in a subdirectory, check if we found it in that subdir
-                            if has_subdir:
-                                # Get relative path from base
-                                rel_dir = os.path.relpath(os.path.dirname(found_path), base_path)
-                                # Check if the directory name matches or contains our subdirectory
-                                if (model_subdir.lower() in rel_dir.lower() or 
-                                    os.path.basename(rel_dir).lower() == os.path.basename(model_subdir).lower()):
-                                    print(f"  Found in expected subdirectory structure: {found_path}")
-                                    return found_path
-                            else:
-                                # Not looking for a subdirectory, just return the match
-                                print(f"  Found in recursive search: {found_path}")
-                                return found_path
+                for found_path in self._find_in_model_tree(base_path, lowered_filenames):
+                    # If looking for a file in a subdirectory, check if we found it in that subdir
+                    if has_subdir:
+                        # Get relative path from base
+                        rel_dir = os.path.relpath(os.path.dirname(found_path), base_path)
+                        # Check if the directory name matches or contains our subdirectory
+                        if (model_subdir.lower() in rel_dir.lower() or 
+                            os.path.basename(rel_dir).lower() == os.path.basename(model_subdir).lower()):
+                            logger.debug("Found in expected subdirectory structure: %s", found_path)
+                            return found_path
+                    else:
+                        # Not looking for a subdirectory, just return the match
+                        logger.debug("Found in recursive search: %s", found_path)
+                        return found_path
                 
                 # 2. If we're looking for a subdirectory, try to find it first
                 if has_subdir:
-                    print(f"  Looking specifically for subdirectory '{model_subdir}'...")
-                    for root, dirs, _ in os.walk(base_path):
-                        # Check if any directory matches our subdirectory
-                        for dir_name in dirs:
-                            if dir_name.lower() == os.path.basename(model_subdir).lower():
-                                potential_dir = os.path.join(root, dir_name)
-                                # Check for the file in this directory
-                                for possible_name in possible_filenames:
-                                    file_path = os.path.join(potential_dir, possible_name)
-                                    if os.path.exists(file_path):
-                                        print(f"  Found in matching directory: {file_path}")
-                                        return file_path
+                    logger.debug("Looking specifically for subdirectory '%s'...", model_subdir)
+                    # Check the directories whose name matches our subdirectory
+                    for potential_dir in self._tree_dirs_by_name(base_path).get(os.path.basename(model_subdir).lower(), ()):
+                        file_path = self._find_in_model_dir(potential_dir, possible_filenames)
+                        if file_path:
+                            logger.debug("Found in matching directory: %s", file_path)
+                            return file_path
             except Exception as e:
-                print(f"  Error in recursive search of {base_path}: {e}")
+                logger.warning("Error in recursive search of %s: %s", base_path, e)
         
         # Step 7: Try alternate model types
-        alternate_types = {
-            'checkpoints': ['loras', 'vae', 'diffusion_models'],
-            'loras': ['checkpoints', 'embedding'],
-            'vae': ['checkpoints'],
-            'embedding': ['loras'],
-            'controlnet': ['checkpoints']
-        }
-        
-        if model_type in alternate_types:
-            print(f"  Model not found. Trying alternate types: {alternate_types[model_type]}")
-            for alt_type in alternate_types[model_type]:
+        if model_type in _FALLBACK_MODEL_TYPES:
+            logger.debug("Model not found. Trying alternate types: %s", _FALLBACK_MODEL_TYPES[model_type])
+            for alt_type in _FALLBACK_MODEL_TYPES[model_type]:
                 if alt_type in self.model_paths:
                     for base_path in self.model_paths[alt_type]:
                         # Try direct match in the alternate type directory
                         if has_subdir:
                             # Check with subdirectory
-                            potential_dir = os.path.join(base_path, model_subdir)
-                            if os.path.isdir(potential_dir):
-                                for possible_name in possible_filenames:
-                                    file_path = os.path.join(potential_dir, possible_name)
-                                    if os.path.exists(file_path):
-                                        print(f"  Found in alternate type {alt_type} with subdirectory: {file_path}")
-                                        return file_path
+                            file_path = self._find_in_model_dir(os.path.join(base_path, model_subdir), possible_filenames)
+                            if file_path:
+                                logger.debug("Found in alternate type %s with subdirectory: %s", alt_type, file_path)
+                                return file_path
                         
                         # Try without subdirectory
-                        for possible_name in possible_filenames:
-                            file_path = os.path.join(base_path, possible_name)
-                            if os.path.exists(file_path):
-                                print(f"  Found with alternate type {alt_type}: {file_path}")
-                                return file_path
+                        file_path = self._find_in_model_dir(base_path, possible_filenames)
+                        if file_path:
+                            logger.debug("Found with alternate type %s: %s", alt_type, file_path)
+                            return file_path
                         
                         # Try recursive search in alternate type for just the filename
                         if os.path.exists(base_path):
-                            for root, _, files in os.walk(base_path):
-                                for file in files:
-                                    if file in possible_filenames or file.lower() in [f.lower() for f in possible_filenames]:
-                                        found_path = os.path.join(root, file)
-                                        print(f"  Found in {alt_type} recursive search: {found_path}")
-                                        return found_path
+                            for found_path in self._find_in_model_tree(base_path, lowered_filenames):
+                                logger.debug("Found in %s recursive search: %s", alt_type, found_path)
+                                return found_path
         
         # If we get here, the model wasn't found
-        print(f"Warning: Could not locate model: {model_name} (type: {model_type})")
+        logger.warning("Could not locate model: %s (type: %s)", model_name, model_type)
         return None
 
 
+# Parsers shared by get_parser: installation path -> (fingerprint, parser)
+_PARSER_CACHE: Dict[str, Tuple[Tuple[Optional[int], ...], WorkflowParser]] = {}
+
+
+def _parser_fingerprint(comfyui_path: str) -> Tuple[Optional[int], ...]:
+    """
+    Get the modification times of what a WorkflowParser reads at construction
+    
+    Args:
+        comfyui_path: Absolute path to the ComfyUI installation
+        
+    Returns:
+        Tuple of mtimes (None for missing files) of custom_nodes and the
+        extra_model_paths.yaml candidates
+    """
+    fingerprint = []
+    for path in [os.path.join(comfyui_path, "custom_nodes"), *_extra_model_paths_locations(comfyui_path)]:
+        try:
+            fingerprint.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            fingerprint.append(None)
+    return tuple(fingerprint)
+
+
+def get_parser(comfyui_path: str) -> WorkflowParser:
+    """
+    Get a shared WorkflowParser for a ComfyUI installation
+    
+    Callers that parse several workflows should use this instead of the
+    constructor. A new parser is only built when custom_nodes or
+    extra_model_paths.yaml changed since the cached one was created.
+    
+    Args:
+        comfyui_path: Path to the ComfyUI installation
+        
+    Returns:
+        WorkflowParser instance, reused while the installation is unchanged
+    """
+    comfyui_path = os.path.abspath(comfyui_path)
+    fingerprint = _parser_fingerprint(comfyui_path)
+    
+    cached = _PARSER_CACHE.get(comfyui_path)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+    
+    parser = WorkflowParser(comfyui_path)
+    _PARSER_CACHE[comfyui_path] = (fingerprint, parser)
+    return parser
+
+
 def main():
     """Simple example usage and CLI interface"""
     import argparse
@@ -909,7 +2005,14 @@ def main():
     
     args = parser.parse_args()
     
-    parser = WorkflowParser(args.comfyui_path)
+    # Model resolution details are debug output; keep JSON/YAML output clean
+    logging.basicConfig(
+        level=logging.WARNING if args.json or args.yaml else logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    
+    parser = get_parser(args.comfyui_path)
     dependencies = parser.parse_workflow(args.workflow_path)
     
     if args.json:
@@ -9,6 +9,7 @@ import sys
 import json
 import argparse
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Set, Optional
 
@@ -20,6 +21,35 @@ logging.basicConfig(
 )
 logger = logging.getLogger("InstallationTest")
 
+# Python packages ComfyUI needs at runtime
+REQUIRED_PACKAGES = [
+    "torch",
+    "numpy",
+    "pillow"
+]
+
+# Import names of the packages above that differ from their distribution names
+_IMPORT_NAMES = {"pillow": "PIL"}
+
+
+def _import_name(package: str) -> str:
+    """Get the module name a required package is imported as"""
+    return _IMPORT_NAMES.get(package, package)
+
+
+def _preload_modules(names: List[str]) -> None:
+    """
+    Import modules ahead of use, ignoring any that fail to import
+    
+    Args:
+        names: Module names to import
+    """
+    for name in names:
+        try:
+            __import__(name)
+        except Exception:
+            pass
+
 
 class ComfyUIInstallationTester:
     """Tests a ComfyUI installation for correct setup and functioning"""
@@ -51,16 +81,21 @@ class ComfyUIInstallationTester:
             self.test_gpu_availability
         ]
         
-        test_results = []
-        for test in tests:
-            try:
-                result = test()
-                test_results.append(result)
-                if not result:
-                    logger.warning(f"Test failed: {test.__name__}")
-            except Exception as e:
-                logger.error(f"Error in test {test.__name__}: {e}")
-                test_results.append(False)
+        # Import the Python dependencies in the background while the filesystem
+        # tests run; the dependency and GPU tests then find them already loaded
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(_preload_modules, [_import_name(package) for package in REQUIRED_PACKAGES])
+            
+            test_results = []
+            for test in tests:
+                try:
+                    result = test()
+                    test_results.append(result)
+                    if not result:
+                        logger.warning(f"Test failed: {test.__name__}")
+                except Exception as e:
+                    logger.error(f"Error in test {test.__name__}: {e}")
+                    test_results.append(False)
         
         # Print summary
         passed = sum(1 for result in test_results if result)
@@ -109,17 +144,22 @@ class ComfyUIInstallationTester:
             "models/embeddings"
         ]
         
+        # One listing of models/ answers all the existence checks
+        models_dir = os.path.join(self.comfyui_dir, "models")
+        try:
+            with os.scandir(models_dir) as entries:
+                present = {entry.name for entry in entries if entry.is_dir()}
+        except OSError:
+            present = set()
+        
         missing_dirs = []
         for dir_path in model_dirs:
-            full_path = os.path.join(self.comfyui_dir, dir_path)
-            if not os.path.isdir(full_path):
+            if os.path.basename(dir_path) not in present:
                 missing_dirs.append(dir_path)
                 continue
                 
-            # Check if directory is readable
-            try:
-                os.listdir(full_path)
-            except PermissionError:
+            # Check if directory is readable (listing needs read and search permission)
+            if not os.access(os.path.join(self.comfyui_dir, dir_path), os.R_OK | os.X_OK):
                 logger.error(f"Directory not readable: {dir_path}")
                 return False
         
@@ -174,16 +214,10 @@ class ComfyUIInstallationTester:
     
     def test_python_dependencies(self) -> bool:
         """Check for required Python dependencies"""
-        required_packages = [
-            "torch",
-            "numpy",
-            "pillow"
-        ]
-        
         missing_packages = []
-        for package in required_packages:
+        for package in REQUIRED_PACKAGES:
             try:
-                __import__(package)
+                __import__(_import_name(package))
             except ImportError:
                 missing_packages.append(package)
         